@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_capstone_cache.py
+"""
+Cold vs warm timings for the NO2 forecaster's precomputed cache.
+
+Usage:
+    python benchmarks/bench_capstone_cache.py [--repeat 5] [--start 2024-12-01] [--end 2025-11-30]
+
+cold: parse/merge AQE+AQW, build features and lags, fit the booster, then forecast.
+warm: memory-map the cached frame, load the persisted booster, then forecast.
+Each sample runs in a fresh interpreter so import and page-cache effects match a request.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+
+SAMPLE = """
+import sys, time, json
+t0 = time.perf_counter()
+import capstone_airquality as c
+t1 = time.perf_counter()
+c.load_model()
+t2 = time.perf_counter()
+c.run(sys.argv[1], sys.argv[2])
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "load": t2 - t1, "forecast": t3 - t2, "total": t3 - t0}))
+"""
+
+
+def sample(env, start, end):
+    out = subprocess.run([sys.executable, "-c", SAMPLE, start, end], cwd=SCRIPTS_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    return {key: round(float(np.median([s[key] for s in samples])) * 1000.0, 2) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--start", default="2024-12-01")
+    parser.add_argument("--end", default="2025-11-30")
+    args = parser.parse_args()
+
+    artifacts = tempfile.mkdtemp(prefix="capstone-bench-")
+    env = dict(os.environ, ARTIFACTS_DIR=artifacts, PYTHONPATH=SCRIPTS_DIR)
+    try:
+        cold = []
+        for _ in range(args.repeat):
+            shutil.rmtree(artifacts)
+            os.makedirs(artifacts)
+            cold.append(sample(env, args.start, args.end))
+        warm = [sample(env, args.start, args.end) for _ in range(args.repeat)]
+    finally:
+        shutil.rmtree(artifacts, ignore_errors=True)
+
+    print(json.dumps({"unit": "ms (median)", "cold": summarize(cold), "warm": summarize(warm)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
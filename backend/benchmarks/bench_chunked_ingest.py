@@ -0,0 +1,88 @@
+# backend/benchmarks/bench_chunked_ingest.py
+"""
+Peak memory and wall time of the streamed regression tournament (chunked_regression.py) as the input grows.
+
+Usage:
+    python benchmarks/bench_chunked_ingest.py [--scales 1,10,100] [--chunk-rows 100000]
+
+For each scale N, writes a synthetic tract file with N copies of
+AllYearsAirQualityCalculations.csv (fresh tract ids, jittered concentrations) to a
+temporary directory and runs chunked_regression.run_tournament on it in a fresh
+interpreter. Reports rows, file size, wall time, peak RSS and the models' R2. With
+bounded chunks the peak RSS should stay flat while the file grows.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+SOURCE = os.path.join(BASE_DIR, '..', 'data', 'AllYearsAirQualityCalculations.csv')
+
+SAMPLE = """
+import sys, time, json, resource
+import chunked_regression
+started = time.perf_counter()
+tournament = chunked_regression.run_tournament(sys.argv[1])
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "rows": tournament["rows"],
+    "r2": {name: r["R2"] for name, r in tournament["results"].items()},
+}))
+"""
+
+
+def write_scaled(path, scale):
+    base = pd.read_csv(SOURCE)
+    rng = np.random.default_rng(scale)
+    offset = int(base['geoid20'].max()) + 1
+    with open(path, 'w', newline='') as f:
+        for copy in range(scale):
+            frame = base.copy()
+            frame['geoid20'] = frame['geoid20'] + copy * offset
+            frame['geoid'] = frame['geoid'].astype(str) + f"-{copy}"
+            if copy:
+                frame['pm25_concentration'] *= rng.normal(1.0, 0.02, len(frame))
+            frame.to_csv(f, header=copy == 0, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default="1,10,100")
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in [int(s) for s in args.scales.split(",")]:
+            path = os.path.join(tmp, f"tracts_x{scale}.csv")
+            write_scaled(path, scale)
+            env = dict(os.environ, PYTHONPATH=SCRIPTS_DIR, AIRQUALITY_CHUNK_ROWS=str(args.chunk_rows))
+            proc = subprocess.run([sys.executable, "-c", SAMPLE, path], cwd=SCRIPTS_DIR, env=env,
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                lines = proc.stderr.strip().splitlines()
+                report[f"x{scale}"] = {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            report[f"x{scale}"] = {
+                "rows": result["rows"]["train"] + result["rows"]["test"],
+                "file_mb": round(os.path.getsize(path) / 1024.0 / 1024.0, 1),
+                "seconds": round(result["seconds"], 2),
+                "peak_rss_mb": round(result["peak_rss_kb"] / 1024.0, 1),
+                "r2": {name: round(r2, 4) for name, r2 in result["r2"].items()},
+            }
+            os.remove(path)
+
+    print(json.dumps({"chunk_rows": args.chunk_rows, "scales": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# backend/benchmarks/bench_data_store.py
+"""
+CSV parsing vs the memory-mapped columnar store (data_store.py) for each script's data loader.
+
+Usage:
+    python benchmarks/bench_data_store.py [--repeat 5]
+
+Every loader runs in a fresh interpreter, once with DATA_STORE_FORMAT=csv (parse and
+type the CSV, as the scripts did before) and once against the columnar copies, which
+are ingested up front. Reports, per script and format:
+  load_ms       - median wall time of the loader
+  peak_rss_mb   - peak resident set size of the interpreter after loading
+  load_rss_mb   - growth of the peak RSS caused by the loader (after imports)
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+
+# script -> (import, loader expression)
+LOADERS = {
+    "activity_recommender": ("import activity_recommender as m, data_store",
+                             "data_store.load(m.DATA_FILE)"),
+    "activityrecommendationv2": ("import activityrecommendationv2 as m, data_store",
+                                 "data_store.load(m.DATA_FILE)"),
+    "aqi_prediction": ("import aqi_prediction as m", "m.load_training_data()"),
+    "capstone_airquality": ("import capstone_airquality as m", "m.load_merged()"),
+    "airquality_regression": ("import airquality_regression as m", "m.load_data(m.DATA_FILE)"),
+}
+
+SAMPLE = """
+import sys, time, json, resource
+{imports}
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+samples = []
+for _ in range(int(sys.argv[1])):
+    started = time.perf_counter()
+    frame = {loader}
+    samples.append(time.perf_counter() - started)
+    del frame
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"samples": samples, "base_kb": base, "peak_kb": peak}}))
+"""
+
+
+def run_loader(script, fmt, repeat):
+    imports, loader = LOADERS[script]
+    env = dict(os.environ, DATA_STORE_FORMAT=fmt, PYTHONPATH=SCRIPTS_DIR)
+    proc = subprocess.run([sys.executable, "-c", SAMPLE.format(imports=imports, loader=loader), str(repeat)],
+                          cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "load_ms": round(float(np.median(result["samples"])) * 1000.0, 2),
+        "peak_rss_mb": round(result["peak_kb"] / 1024.0, 1),
+        "load_rss_mb": round((result["peak_kb"] - result["base_kb"]) / 1024.0, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ingest = subprocess.run([sys.executable, "data_store.py", "ingest"], cwd=SCRIPTS_DIR,
+                            capture_output=True, text=True)
+    if ingest.returncode != 0:
+        print(ingest.stdout.strip() or ingest.stderr.strip())
+        sys.exit(1)
+
+    report = {script: {fmt: run_loader(script, fmt, args.repeat) for fmt in ("csv", "columnar")}
+              for script in LOADERS}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# backend/benchmarks/bench_forest.py
+"""
+Compiled forest (forest.CompiledForest) against the sklearn estimator's predict.
+
+Usage:
+    python benchmarks/bench_forest.py [--model activity_recommender|activityrecommendationv2] [--rows 10000] [--repeat 20]
+
+Reports median latency (ms) for one row (a DataFrame for sklearn, a plain array for
+the compiled forest) and for a batch of --rows rows, and checks that predict_proba
+is bit-identical on the batch. activity_recommender is loaded from its artifact
+(training it first if needed), so the compiled arrays come from the memory-mapped .npy files.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+
+
+def activity_recommender_rows():
+    import activity_recommender as module
+    module.load_model()
+    df = pd.read_csv(module.DATA_FILE)
+    for col, encoder in module.label_encoders.items():
+        df[col] = encoder.encode_column(df[col])
+    df['Outdoor_Friendly'] = ((df['AQI'] < 50) & (df['Time_of_Day'].between(8, 18))).astype(int)
+    return module, df[module.FEATURES]
+
+
+def activityrecommendationv2_rows():
+    import activityrecommendationv2 as module
+    module.load_model()
+    df = pd.read_csv(module.DATA_FILE, keep_default_na=False)
+    df.columns = df.columns.str.strip()
+    records = df.rename(columns={col: name for name, col in module.INPUT_COLUMNS.items()}).to_dict('records')
+    return module, module.encode_batch(records)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(float(np.median(samples)) * 1000.0, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="activity_recommender",
+                        choices=["activity_recommender", "activityrecommendationv2"])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    module, frame = globals()[f"{args.model}_rows"]()
+    sklearn_model, compiled = module.load_estimator(), module.compiled_model
+
+    batch = frame.sample(args.rows, replace=True, random_state=0).reset_index(drop=True)
+    batch_array = batch.to_numpy(dtype=float)
+    single, single_array = batch.iloc[:1], batch_array[:1]
+
+    identical = bool(np.array_equal(sklearn_model.predict_proba(batch), compiled.predict_proba(batch_array)))
+    print(json.dumps({
+        "model": args.model,
+        "trees": int(compiled.n_trees),
+        "nodes": int(compiled.feature.size),
+        "depth": compiled.depth,
+        "bit_identical": identical,
+        "unit": "ms (median)",
+        "single_row": {
+            "sklearn": timed(lambda: sklearn_model.predict(single), args.repeat),
+            "compiled": timed(lambda: compiled.predict(single_array), args.repeat),
+        },
+        f"batch_{args.rows}": {
+            "sklearn": timed(lambda: sklearn_model.predict(batch), max(1, args.repeat // 4)),
+            "compiled": timed(lambda: compiled.predict(batch_array), max(1, args.repeat // 4)),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# backend/benchmarks/bench_inference_server.py
+"""
+Compare per-request `spawn('python3', script)` against the resident inference server.
+
+Usage:
+    python benchmarks/bench_inference_server.py [--method predict_pm25] [--requests 200] [--concurrency 4]
+
+Reports p50/p99 latency (ms) and requests/sec for both models as JSON.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+
+# method -> (script, CLI args, server params)
+CASES = {
+    "predict_pm25": (
+        "aqi_prediction.py", ["70", "50", "5", "0"],
+        {"temperature": "70", "humidity": "50", "wind_speed": "5", "precipitation": "0"}
+    ),
+    "recommend_activity": (
+        "activity_recommender.py", ["30", "14", "45", "70", "0"],
+        {"age": "30", "time_of_day": "14", "aqi": "45", "temperature": "70", "precipitation": "0"}
+    ),
+    "forecast_no2": (
+        "capstone_airquality.py", ["2024-12-01", "2024-12-31"],
+        {"forecast_start": "2024-12-01", "forecast_end": "2024-12-31"}
+    ),
+}
+
+
+def summarize(latencies, wall):
+    latencies = np.asarray(latencies) * 1000.0
+    return {
+        "requests": int(latencies.size),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "requests_per_sec": round(latencies.size / wall, 2),
+    }
+
+
+def bench_spawn(script, args, requests, concurrency):
+    def one(_):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script), *args],
+                       cwd=SCRIPTS_DIR, capture_output=True, check=True)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+class ServerClient:
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.join(SCRIPTS_DIR, "inference_server.py")],
+            cwd=SCRIPTS_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, bufsize=1
+        )
+        self.ids = itertools.count(1)
+        self.waiting = {}
+        self.lock = threading.Lock()
+        self.proc.stdout.readline()  # ready event
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            message = json.loads(line)
+            event = self.waiting.pop(message["id"], None)
+            if event is not None:
+                event.set()
+
+    def call(self, method, params):
+        event = threading.Event()
+        request_id = next(self.ids)
+        self.waiting[request_id] = event
+        with self.lock:
+            self.proc.stdin.write(json.dumps({"id": request_id, "method": method, "params": params}) + "\n")
+            self.proc.stdin.flush()
+        event.wait()
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+def bench_server(method, params, requests, concurrency):
+    client = ServerClient()
+    try:
+        # The first call loads the model; it is reported separately from steady state.
+        started = time.perf_counter()
+        client.call(method, params)
+        first_call = time.perf_counter() - started
+
+        def one(_):
+            t0 = time.perf_counter()
+            client.call(method, params)
+            return time.perf_counter() - t0
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, range(requests)))
+        result = summarize(latencies, time.perf_counter() - started)
+        result["first_call_ms"] = round(first_call * 1000.0, 2)
+        return result
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--method", choices=sorted(CASES), default="predict_pm25")
+    parser.add_argument("--requests", type=int, default=200, help="requests sent to the server")
+    parser.add_argument("--spawn-requests", type=int, default=10, help="requests sent through spawn")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    script, cli_args, params = CASES[args.method]
+    results = {
+        "method": args.method,
+        "concurrency": args.concurrency,
+        "spawn": bench_spawn(script, cli_args, args.spawn_requests, args.concurrency),
+        "server": bench_server(args.method, params, args.requests, args.concurrency),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
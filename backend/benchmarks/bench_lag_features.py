@@ -0,0 +1,110 @@
+# backend/benchmarks/bench_lag_features.py
+"""
+Micro-benchmark: capstone_airquality's original dict/Timedelta add_lags against LagFeatureEngine.
+
+Usage:
+    python benchmarks/bench_lag_features.py [--sizes 1000,10000,100000] [--repeat 5]
+
+For each series length it reports (median ms):
+  legacy      - the original to_dict() + six (index - Timedelta).map() passes
+  engine      - LagFeatureEngine.from_series + features_for_dates over the same index
+  append_day  - appending one day and computing that day's features incrementally
+It also checks the engine against the legacy output and against pandas rolling windows.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+
+from lag_features import LagFeatureEngine  # noqa: E402
+
+TARGET = 'Daily Max 1-hour NO2 Concentration'
+LAG_DAYS = {'lag1': 7, 'lag2': 14, 'lag3': 31, 'lag4': 92, 'lag5': 364, 'lag6': 728}
+
+
+def legacy_add_lags(df):
+    df = df.copy()
+    target_map = df[TARGET].to_dict()
+    for name, days in LAG_DAYS.items():
+        df[name] = (df.index - pd.Timedelta(f'{days} days')).map(target_map)
+    return df
+
+
+def engine_add_lags(df):
+    df = df.copy()
+    engine = LagFeatureEngine.from_series(df.index, df[TARGET].to_numpy(), lags=LAG_DAYS)
+    for name, values in engine.features_for_dates(df.index).items():
+        df[name] = values
+    return df
+
+
+def synthetic_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2000-01-01', periods=int(n * 1.1))
+    # drop ~10% of days so the series has gaps like the merged AQE/AQW frame
+    keep = np.sort(rng.choice(dates.size, n, replace=False))
+    return pd.DataFrame({TARGET: rng.gamma(4.0, 8.0, n)}, index=dates[keep])
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(float(np.median(samples)) * 1000.0, 3)
+
+
+def check(df):
+    expected = legacy_add_lags(df)
+    actual = engine_add_lags(df)
+    for name in LAG_DAYS:
+        np.testing.assert_array_equal(expected[name].to_numpy(), actual[name].to_numpy())
+
+    daily = df[TARGET].asfreq('D')
+    engine = LagFeatureEngine.from_series(df.index, df[TARGET].to_numpy(),
+                                          rolling_mean=[(7, 1), (30, 7)], rolling_max=[(7, 1), (30, 7)])
+    feats = engine.features(0, len(engine))
+    for window, offset in [(7, 1), (30, 7)]:
+        shifted = daily.shift(offset).rolling(window, min_periods=1)
+        np.testing.assert_allclose(feats[f"roll_mean{window}_{offset}"], shifted.mean().to_numpy())
+        np.testing.assert_array_equal(feats[f"roll_max{window}_{offset}"], shifted.max().to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(size) for size in args.sizes.split(",")]:
+        df = synthetic_frame(n)
+        check(df)
+
+        engine = LagFeatureEngine.from_series(df.index, df[TARGET].to_numpy(), lags=LAG_DAYS,
+                                              rolling_mean=[(28, 7)], rolling_max=[(28, 7)])
+
+        def append_day():
+            engine.append(30.0)
+            end = len(engine)
+            engine.features(end - 1, end)
+
+        results.append({
+            "rows": n,
+            "legacy_ms": timed(lambda: legacy_add_lags(df), args.repeat),
+            "engine_ms": timed(lambda: engine_add_lags(df), args.repeat),
+            "append_day_ms": timed(append_day, args.repeat),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
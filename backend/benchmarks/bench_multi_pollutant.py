@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_multi_pollutant.py
+"""
+One multi-output forest for every pollutant vs one tuned forest per pollutant.
+
+Usage:
+    python benchmarks/bench_multi_pollutant.py [--repeat 1] [--pollutants pm25,pm10,o3,no2,so2,co]
+
+multi:    load/merge once and tune one RandomForestRegressor on all targets
+separate: a full load/merge/tune run per pollutant (what predicting each one
+          with the single-target path costs)
+Each run is a fresh interpreter with an empty tuning cache, so no fold score
+is reused. Reported: median wall time for training (separate: the sum over
+pollutants), test R2 per pollutant, and the time to predict every pollutant
+for one input row.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+
+SAMPLE = """
+import sys, time, json
+import aqi_prediction as m
+targets = sys.argv[1].split(",")
+started = time.perf_counter()
+model, metadata = m.fit_regressor(targets)
+trained = time.perf_counter() - started
+row = m.weather_frame(70, 50, 5, 0)
+model.predict(row)
+timings = []
+for _ in range(50):
+    began = time.perf_counter()
+    model.predict(row)
+    timings.append(time.perf_counter() - began)
+timings.sort()
+print(json.dumps({"train": trained, "predict": timings[len(timings) // 2], "r2": metadata["test_r2_by_target"]}))
+"""
+
+
+def sample(targets):
+    scratch = tempfile.mkdtemp(prefix="multi-pollutant-bench-")
+    env = dict(os.environ, PYTHONPATH=SCRIPTS_DIR, ARTIFACTS_DIR=scratch,
+               TUNING_CACHE=os.path.join(scratch, "tuning_cache.sqlite"))
+    try:
+        out = subprocess.run([sys.executable, "-c", SAMPLE, ",".join(targets)], cwd=SCRIPTS_DIR, env=env,
+                             capture_output=True, text=True, check=True).stdout
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--pollutants", default="pm25,pm10,o3,no2,so2,co")
+    args = parser.parse_args()
+    pollutants = args.pollutants.split(",")
+
+    multi = [sample(pollutants) for _ in range(args.repeat)]
+    separate = [[sample([p]) for p in pollutants] for _ in range(args.repeat)]
+
+    multi_train = float(np.median([s["train"] for s in multi]))
+    separate_train = float(np.median([sum(s["train"] for s in run) for run in separate]))
+    report = {
+        "pollutants": pollutants,
+        "multi": {
+            "train_s": round(multi_train, 2),
+            "predict_ms": round(float(np.median([s["predict"] for s in multi])) * 1000.0, 3),
+            "test_r2": {p: round(r2, 4) for p, r2 in multi[0]["r2"].items()},
+        },
+        "separate": {
+            "train_s": round(separate_train, 2),
+            "predict_ms": round(float(np.median([sum(s["predict"] for s in run) for run in separate])) * 1000.0, 3),
+            "test_r2": {p: round(s["r2"][p], 4) for p, s in zip(pollutants, separate[0])},
+        },
+        "train_speedup": round(separate_train / multi_train, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
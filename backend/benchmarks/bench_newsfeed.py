@@ -0,0 +1,89 @@
+# backend/benchmarks/bench_newsfeed.py
+"""
+Cold vs warm latency for the newsfeed processor, reading the local fixture feed.
+
+Usage:
+    python benchmarks/bench_newsfeed.py [--repeat 3] [--feed data/fixtures/air_quality_news.xml] [--stand-in]
+
+cold: empty article cache, so the pipelines are loaded and every article is processed in one batch.
+warm: every article is already cached, so no model is loaded at all.
+Each sample runs in a fresh interpreter so model load and import costs match a request.
+--stand-in swaps the Hugging Face pipelines for trivial callables (no transformers/torch
+needed), which isolates the feed, cache and batching overhead.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+DEFAULT_FEED = os.path.join(BASE_DIR, '..', 'data', 'fixtures', 'air_quality_news.xml')
+
+SAMPLE = """
+import sys, time, json
+t0 = time.perf_counter()
+import newsfeed
+pipelines = None
+if sys.argv[1] == "stand-in":
+    pipelines = {
+        "summarizer": lambda texts, **kw: [{"summary_text": t[:120]} for t in texts],
+        "sentiment_analyzer": lambda texts, **kw: [{"label": "NEUTRAL", "score": 0.5} for t in texts],
+        "headline_generator": lambda texts, **kw: [[{"generated_text": t + "!"}] for t in texts],
+    }
+t1 = time.perf_counter()
+articles = newsfeed.get_air_quality_news()
+t2 = time.perf_counter()
+processed = newsfeed.process_articles(articles, pipelines=pipelines)
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "fetch": t2 - t1, "process": t3 - t2, "total": t3 - t0,
+                  "articles": len(processed), "models_loaded": len(newsfeed._pipelines)}))
+"""
+
+
+def sample(env, mode):
+    out = subprocess.run([sys.executable, "-c", SAMPLE, mode], cwd=SCRIPTS_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    timings = {key: round(float(np.median([s[key] for s in samples])) * 1000.0, 2)
+               for key in ("import", "fetch", "process", "total")}
+    timings["articles"] = samples[-1]["articles"]
+    timings["models_loaded"] = samples[-1]["models_loaded"]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--feed", default=DEFAULT_FEED)
+    parser.add_argument("--stand-in", action="store_true")
+    args = parser.parse_args()
+
+    mode = "stand-in" if args.stand_in else "models"
+    artifacts = tempfile.mkdtemp(prefix="newsfeed-bench-")
+    env = dict(os.environ, ARTIFACTS_DIR=artifacts, NEWSFEED_SOURCE=os.path.abspath(args.feed),
+               PYTHONPATH=SCRIPTS_DIR)
+    try:
+        cold = []
+        for _ in range(args.repeat):
+            shutil.rmtree(artifacts)
+            os.makedirs(artifacts)
+            cold.append(sample(env, mode))
+        warm = [sample(env, mode) for _ in range(args.repeat)]
+    finally:
+        shutil.rmtree(artifacts, ignore_errors=True)
+
+    print(json.dumps({"unit": "ms (median)", "pipelines": mode, "cold": summarize(cold),
+                      "warm": summarize(warm)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_newsfeed_tiers.py
+"""
+Quality/latency/memory comparison of the newsfeed model tiers on the local fixture feed.
+
+Usage:
+    python benchmarks/bench_newsfeed_tiers.py [--tiers full,int8,distilled,onnx] [--repeat 3]
+                                              [--feed data/fixtures/air_quality_news.xml]
+
+Each tier runs in a fresh interpreter with NEWSFEED_MODEL_TIER set and sampling off
+(NEWSFEED_DO_SAMPLE=0), and reports:
+  load_ms             - building the three pipelines
+  process_ms          - median time to process every fixture article (no cache)
+  articles_per_sec    - throughput derived from process_ms
+  peak_rss_mb         - peak resident set size of the interpreter
+  summary_rouge1      - mean unigram F1 of each summary against the reference tier's
+  sentiment_agreement - share of sentiment labels matching the reference tier
+The first tier listed is the reference. A tier whose dependencies are missing is
+reported with an "error" instead of numbers.
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from collections import Counter
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+DEFAULT_FEED = os.path.join(BASE_DIR, '..', 'data', 'fixtures', 'air_quality_news.xml')
+
+SAMPLE = """
+import sys, time, json, resource
+import newsfeed
+from transformers import set_seed
+set_seed(0)
+articles = newsfeed.get_air_quality_news(limit=100)
+t0 = time.perf_counter()
+for name in newsfeed.PIPELINES:
+    newsfeed.get_pipeline(name)
+load = time.perf_counter() - t0
+samples = []
+for _ in range(int(sys.argv[1])):
+    started = time.perf_counter()
+    processed = newsfeed.process_articles(articles, cache_dir=None)
+    samples.append(time.perf_counter() - started)
+print(json.dumps({
+    "load": load, "samples": samples, "articles": len(articles),
+    "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "summaries": [p["summary"] for p in processed],
+    "sentiments": [p["sentiment"].split(" ")[0] for p in processed],
+}))
+"""
+
+
+def run_tier(tier, feed, repeat):
+    env = dict(os.environ, NEWSFEED_MODEL_TIER=tier, NEWSFEED_DO_SAMPLE="0",
+               NEWSFEED_SOURCE=os.path.abspath(feed), PYTHONPATH=SCRIPTS_DIR)
+    proc = subprocess.run([sys.executable, "-c", SAMPLE, str(repeat)], cwd=SCRIPTS_DIR, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def rouge1(candidate, reference):
+    cand = Counter(re.findall(r"\w+", candidate.lower()))
+    ref = Counter(re.findall(r"\w+", reference.lower()))
+    overlap = sum((cand & ref).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(cand.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tiers", default="full,int8,distilled,onnx")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--feed", default=DEFAULT_FEED)
+    args = parser.parse_args()
+
+    tiers = args.tiers.split(",")
+    raw = {tier: run_tier(tier, args.feed, args.repeat) for tier in tiers}
+    reference = raw[tiers[0]]
+
+    report = {}
+    for tier in tiers:
+        result = raw[tier]
+        if "error" in result:
+            report[tier] = result
+            continue
+        process = float(np.median(result["samples"]))
+        entry = {
+            "load_ms": round(result["load"] * 1000.0, 1),
+            "process_ms": round(process * 1000.0, 1),
+            "articles_per_sec": round(result["articles"] / process, 2),
+            "peak_rss_mb": round(result["peak_rss_kb"] / 1024.0, 1),
+        }
+        if "error" not in reference:
+            entry["summary_rouge1"] = round(float(np.mean(
+                [rouge1(c, r) for c, r in zip(result["summaries"], reference["summaries"])])), 3)
+            entry["sentiment_agreement"] = round(float(np.mean(
+                [c == r for c, r in zip(result["sentiments"], reference["sentiments"])])), 3)
+        report[tier] = entry
+
+    print(json.dumps({"reference": tiers[0], "tiers": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
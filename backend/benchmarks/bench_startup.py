@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_startup.py
+"""
+Cold start time of every backend script, as paid by a process spawned per request.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--scripts activity_recommender,...]
+
+For each script, in fresh interpreters:
+  import_ms      - median time to import the module
+  first_call_ms  - median time to import it and answer one representative request
+                   (artifacts are built once beforehand, so this is the warm-disk path)
+  modules        - number of modules loaded after the import
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+
+# script -> representative request (a call on the imported module `m`)
+CALLS = {
+    "activity_recommender": "m.run(30, '14', 40, 70, 0)",
+    "activityrecommendationv2": "m.run(30, 'Female', 'None', 'Active', 'Outdoor', 20, 50, 5, 40, 10, 20, 'None', 'None')",
+    "aqi_prediction": "m.run(70, 50, 5, 0)",
+    "capstone_airquality": "m.run('2025-01-01', '2025-01-31')",
+    "airquality_regression": "m.run()",
+    "newsfeed": "m.run()",
+    "inference_server": None,
+}
+
+SAMPLE = """
+import sys, time, json
+started = time.perf_counter()
+import {script} as m
+imported = time.perf_counter()
+modules = len(sys.modules)
+{call}
+done = time.perf_counter()
+print(json.dumps({{"import": imported - started, "total": done - started, "modules": modules}}))
+"""
+
+
+def sample(script, call):
+    code = SAMPLE.format(script=script, call=call or "pass")
+    env = dict(os.environ, PYTHONPATH=SCRIPTS_DIR)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit code {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scripts", default=",".join(CALLS))
+    args = parser.parse_args()
+
+    report = {}
+    for script in args.scripts.split(","):
+        call = CALLS[script]
+        try:
+            # the first run may train or render; it is not measured
+            sample(script, call)
+            imports = [sample(script, None) for _ in range(args.repeat)]
+            calls = [sample(script, call) for _ in range(args.repeat)] if call else []
+        except RuntimeError as e:
+            report[script] = {"error": str(e)}
+            continue
+        report[script] = {
+            "import_ms": round(float(np.median([s["import"] for s in imports])) * 1000.0, 1),
+            "first_call_ms": round(float(np.median([s["total"] for s in calls])) * 1000.0, 1) if calls else None,
+            "modules": imports[0]["modules"],
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_tract_index.py
+"""
+Tract/year queries through the sorted index vs a pandas scan of the same data.
+
+Usage:
+    python benchmarks/bench_tract_index.py [--queries 2000] [--top 10]
+
+point  - one tract in one year
+multi  - 10 tracts, every year
+range  - one tract over a year range
+worst  - the --top worst tracts of one year
+Times are median microseconds per query. The pandas baseline filters the frame
+loaded from the columnar store (already in memory), so only the query itself is
+compared. The index is built into a temporary ARTIFACTS_DIR first.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ["ARTIFACTS_DIR"] = tempfile.mkdtemp(prefix="tract-index-bench-")
+atexit.register(shutil.rmtree, os.environ["ARTIFACTS_DIR"], True)
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+
+import data_store  # noqa: E402
+import tract_index  # noqa: E402
+
+
+def per_query_us(fn, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(*query)
+        timings.append(time.perf_counter() - started)
+    return round(float(np.median(timings)) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    metadata = tract_index.build()
+    build_ms = (time.perf_counter() - started) * 1000.0
+    tract_index.load_index()
+
+    df = data_store.load(tract_index.DATA_FILE)
+    df["geoid"] = df["geoid"].astype(str)
+    rng = np.random.default_rng(0)
+    geoids = df["geoid"].unique()
+    years = sorted(df["year"].unique())
+
+    def picks(n):
+        return [str(g) for g in rng.choice(geoids, n)]
+
+    cases = {
+        "point": (
+            [(g, int(rng.choice(years))) for g in picks(args.queries)],
+            lambda g, y: tract_index.lookup(g, year=y),
+            lambda g, y: df[(df["geoid"] == g) & (df["year"] == y)],
+        ),
+        "multi": (
+            [(picks(10),) for _ in range(args.queries // 10)],
+            lambda gs: tract_index.lookup(gs),
+            lambda gs: df[df["geoid"].isin(gs)].sort_values(["geoid", "year"]),
+        ),
+        "range": (
+            [(g, years[0], years[-1] - 1) for g in picks(args.queries)],
+            lambda g, a, b: tract_index.lookup(g, start_year=a, end_year=b),
+            lambda g, a, b: df[(df["geoid"] == g) & df["year"].between(a, b)],
+        ),
+        "worst": (
+            [(int(rng.choice(years)),) for _ in range(args.queries // 10)],
+            lambda y: tract_index.worst(y, args.top),
+            lambda y: df[df["year"] == y].nlargest(args.top, "pm25_concentration"),
+        ),
+    }
+    report = {"rows": metadata["rows"], "tracts": metadata["tracts"], "build_ms": round(build_ms, 1)}
+    for name, (queries, indexed, scan) in cases.items():
+        index_us, scan_us = per_query_us(indexed, queries), per_query_us(scan, queries)
+        report[name] = {"index_us": index_us, "pandas_us": scan_us, "speedup": round(scan_us / index_us, 1)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
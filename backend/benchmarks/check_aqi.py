@@ -0,0 +1,108 @@
+# backend/benchmarks/check_aqi.py
+"""
+Correctness checks for the vectorized EPA AQI module (aqi.py).
+
+Usage:
+    python benchmarks/check_aqi.py
+
+Asserts hand-checked sub-indices at and around every breakpoint edge, agreement
+with a scalar Decimal-based reference for random concentrations of every
+pollutant, the category bounds, and calculate()'s overall AQI / dominant
+pollutant handling of NaN. Exits nonzero on the first failure.
+"""
+import os
+import sys
+import json
+from decimal import Decimal, ROUND_DOWN
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+
+import aqi  # noqa: E402
+
+# (pollutant, concentration, expected sub-index), from the EPA tables and formula
+KNOWN = [
+    ("pm25", 0.0, 0), ("pm25", 12.0, 50), ("pm25", 12.1, 51), ("pm25", 20.0, 68),
+    ("pm25", 35.4, 100), ("pm25", 35.49, 100), ("pm25", 35.5, 101), ("pm25", 55.4, 150),
+    ("pm25", 55.5, 151), ("pm25", 150.4, 200), ("pm25", 250.4, 300), ("pm25", 500.4, 500),
+    ("pm25", 900.0, 500), ("pm25", -3.0, 0),
+    ("pm10", 54, 50), ("pm10", 55, 51), ("pm10", 154, 100), ("pm10", 154.9, 100), ("pm10", 155, 101),
+    ("o3", 0.054, 50), ("o3", 0.055, 51), ("o3", 0.07, 100), ("o3", 0.0705, 100), ("o3", 0.071, 101),
+    ("o3", 0.2, 300),
+    ("no2", 53, 50), ("no2", 100, 100), ("no2", 101, 101), ("no2", 649, 200),
+    ("so2", 35, 50), ("so2", 75, 100), ("so2", 76, 101),
+    ("co", 4.4, 50), ("co", 4.5, 51), ("co", 9.4, 100), ("co", 9.5, 101), ("co", 50.4, 500),
+]
+
+# (AQI, expected category) on both sides of every bound
+CATEGORY_EDGES = [
+    (0, "Good"), (50, "Good"), (51, "Moderate"), (100, "Moderate"),
+    (101, "Unhealthy for Sensitive Groups"), (150, "Unhealthy for Sensitive Groups"),
+    (151, "Unhealthy"), (200, "Unhealthy"), (201, "Very Unhealthy"), (300, "Very Unhealthy"),
+    (301, "Hazardous"), (500, "Hazardous"),
+]
+
+
+def reference_sub_index(pollutant, concentration):
+    """One value at a time with exact decimal truncation, the way the EPA describes it."""
+    table = aqi.BREAKPOINTS[pollutant]
+    step = Decimal(1).scaleb(-aqi.TRUNCATE_DECIMALS[pollutant])
+    value = float(Decimal(repr(max(float(concentration), 0.0))).quantize(step, rounding=ROUND_DOWN))
+    for c_low, c_high, i_low, i_high in table:
+        if value <= c_high:
+            break
+    value = min(max(value, c_low), c_high)
+    return float(round((i_high - i_low) / (c_high - c_low) * (value - c_low) + i_low))
+
+
+def check_known():
+    for pollutant, concentration, expected in KNOWN:
+        got = aqi.sub_index(pollutant, concentration)
+        assert got == expected, f"{pollutant} {concentration}: {got} != {expected}"
+    assert np.isnan(aqi.sub_index("pm25", np.nan))
+    assert isinstance(aqi.sub_index("pm25", 20.0), float)
+
+
+def check_reference(samples=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    for pollutant, table in aqi.BREAKPOINTS.items():
+        decimals = aqi.TRUNCATE_DECIMALS[pollutant]
+        # one decimal more than the tables use, so truncation is exercised but no value sits on a float edge
+        values = np.round(rng.uniform(0.0, table[-1, 1] * 1.1, samples), decimals + 1)
+        expected = np.array([reference_sub_index(pollutant, v) for v in values])
+        np.testing.assert_array_equal(aqi.sub_index(pollutant, values), expected, err_msg=pollutant)
+
+
+def check_categories():
+    values, expected = zip(*CATEGORY_EDGES)
+    assert list(aqi.categorize(np.array(values))) == list(expected)
+    for value, name in CATEGORY_EDGES:
+        assert aqi.categorize(value) == name
+    assert aqi.categorize(np.nan) is None
+    assert list(aqi.categorize([np.nan, 42.0])) == [None, "Good"]
+
+
+def check_calculate():
+    result = aqi.calculate({
+        "pm25": np.array([20.0, np.nan, np.nan, 100.0]),
+        "o3": np.array([0.03, 0.077, np.nan, np.nan]),
+        "co": np.array([1.0, 1.0, np.nan, 1.0]),
+    })
+    np.testing.assert_array_equal(result["sub_indices"]["pm25"], [68, np.nan, np.nan, 174])
+    np.testing.assert_array_equal(result["aqi"], [68, 122, np.nan, 174])
+    assert list(result["dominant_pollutant"]) == ["pm25", "o3", None, "pm25"]
+    assert list(result["category"]) == ["Moderate", "Unhealthy for Sensitive Groups", None, "Unhealthy"]
+
+
+def main():
+    report = {}
+    for check in (check_known, check_reference, check_categories, check_calculate):
+        check()
+        report[check.__name__] = "ok"
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
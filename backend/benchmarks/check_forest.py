@@ -0,0 +1,92 @@
+# backend/benchmarks/check_forest.py
+"""
+Correctness checks for forest.CompiledForest against the sklearn forest it was compiled from.
+
+Usage:
+    python benchmarks/check_forest.py
+
+Fits small RandomForestClassifiers on synthetic data (numeric and string
+labels, two and several classes, NaN inputs) and asserts that predict_proba is
+bit-identical to sklearn's on the NumPy path and on the numba kernel (when
+installed), that predict matches, and that a to_arrays()/from_arrays() round
+trip changes nothing. Exits nonzero on the first failure.
+"""
+import os
+import sys
+import json
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+
+import forest  # noqa: E402
+from forest import CompiledForest  # noqa: E402
+
+
+def synthetic(n_rows, n_features, labels, seed=0, missing=0.0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    score = X[:, 0] + 0.5 * X[:, 1] - 0.25 * X[:, -1] + rng.normal(scale=0.5, size=n_rows)
+    y = np.asarray(labels)[np.digitize(score, np.quantile(score, np.linspace(0, 1, len(labels) + 1)[1:-1]))]
+    if missing:
+        X[rng.random(X.shape) < missing] = np.nan
+    return X, y
+
+
+def assert_parity(model, X):
+    compiled = CompiledForest.from_sklearn(model)
+    expected = model.predict_proba(X)
+    np.testing.assert_array_equal(compiled.predict_proba(X), expected)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    # one row at a time goes through the same path as a single request
+    np.testing.assert_array_equal(compiled.predict_proba(X[:1]), expected[:1])
+
+    restored = CompiledForest.from_arrays(compiled.to_arrays())
+    assert restored.depth == compiled.depth
+    np.testing.assert_array_equal(restored.predict_proba(X), expected)
+
+
+def check_numpy_and_kernel(model, X):
+    """Both traversal paths: the NumPy walk for small batches, numba (if available) above NUMBA_MIN_ROWS."""
+    threshold = forest.NUMBA_MIN_ROWS
+    try:
+        forest.NUMBA_MIN_ROWS = sys.maxsize
+        assert_parity(model, X)
+    finally:
+        forest.NUMBA_MIN_ROWS = threshold
+    assert_parity(model, X)
+
+
+def main():
+    cases = {
+        "binary_int": dict(labels=[0, 1], params=dict(n_estimators=25, random_state=0)),
+        "multiclass_str": dict(labels=["Walk", "Run", "Stay In", "Cycle"],
+                               params=dict(n_estimators=40, max_depth=6, random_state=1)),
+        "deep_unbounded": dict(labels=[3, 7, 11], params=dict(n_estimators=10, min_samples_leaf=1, random_state=2)),
+        "nan_inputs": dict(labels=["a", "b", "c"], missing=0.1, params=dict(n_estimators=20, random_state=3)),
+    }
+    report = {}
+    for name, case in cases.items():
+        X, y = synthetic(3000, 6, case["labels"], missing=case.get("missing", 0.0))
+        model = RandomForestClassifier(**case["params"]).fit(X[:2000], y[:2000])
+        check_numpy_and_kernel(model, X[2000:])
+        report[name] = "ok"
+
+    # a compiled forest has no use for a multi-output model; it must refuse one
+    X, y = synthetic(200, 4, [0, 1])
+    multi = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, np.column_stack([y, y]))
+    try:
+        CompiledForest.from_sklearn(multi)
+    except ValueError:
+        report["rejects_multi_output"] = "ok"
+    else:
+        raise AssertionError("from_sklearn accepted a multi-output forest")
+
+    report["numba"] = bool(forest._numba_kernel())
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
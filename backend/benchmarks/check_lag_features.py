@@ -0,0 +1,141 @@
+# backend/benchmarks/check_lag_features.py
+"""
+Correctness checks for lag_features.LagFeatureEngine against pandas shift/rolling.
+
+Usage:
+    python benchmarks/check_lag_features.py
+
+On gappy synthetic daily series (missing days and NaN values) it asserts that
+lags equal Series.shift on the daily-resampled series, that rolling means and
+maxima equal shift(offset).rolling(window, min_periods=1), and that
+features_for_dates, append, set and copy agree with a full recomputation.
+Exits nonzero on the first failure.
+"""
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+
+from lag_features import LagFeatureEngine  # noqa: E402
+
+LAGS = {"lag1": 1, "lag7": 7, "lag31": 31, "lag364": 364}
+WINDOWS = [(1, 1), (3, 0), (7, 1), (30, 7), (45, 2)]
+
+
+def gappy_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2001-03-01", periods=int(n * 1.2))
+    keep = np.sort(rng.choice(dates.size, n, replace=False))
+    values = rng.gamma(4.0, 8.0, n)
+    values[rng.random(n) < 0.05] = np.nan
+    return pd.Series(values, index=dates[keep])
+
+
+def engine_for(series):
+    return LagFeatureEngine.from_series(series.index, series.to_numpy(), lags=LAGS,
+                                        rolling_mean=WINDOWS, rolling_max=WINDOWS)
+
+
+def pandas_features(series):
+    daily = series.asfreq("D")
+    out = {name: daily.shift(days) for name, days in LAGS.items()}
+    for window, offset in WINDOWS:
+        rolled = daily.shift(offset).rolling(window, min_periods=1)
+        out[f"roll_mean{window}_{offset}"] = rolled.mean()
+        out[f"roll_max{window}_{offset}"] = rolled.max()
+    return pd.DataFrame(out)
+
+
+def assert_features_equal(actual, expected):
+    assert list(actual) == list(expected), (list(actual), list(expected))
+    for name in expected:
+        if name.startswith("roll_mean"):
+            # means come from differences of running sums, so they carry the sums' rounding error
+            np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, err_msg=name)
+        else:
+            np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+
+def check_against_pandas(series):
+    engine = engine_for(series)
+    expected = pandas_features(series)
+    actual = engine.features(0, len(engine))
+    assert_features_equal(actual, {name: expected[name].to_numpy() for name in engine.feature_names})
+    return engine, expected
+
+
+def check_features_for_dates(engine, expected, seed=1):
+    """Unsorted, repeated dates and days past the end of the series (a forecast horizon)."""
+    rng = np.random.default_rng(seed)
+    dates = expected.index[rng.integers(0, len(expected), 500)]
+    got = engine.features_for_dates(dates)
+    assert_features_equal(got, {name: expected.loc[dates, name].to_numpy() for name in engine.feature_names})
+
+    horizon = pd.date_range(expected.index[-1] + pd.Timedelta(days=1), periods=10)
+    future = engine.features_for_dates(horizon)
+    # lag1 of the first future day is the last stored day; further out it reads past the end (NaN)
+    assert future["lag1"][0] == engine.values[-1] or np.isnan(engine.values[-1])
+    assert np.isnan(future["lag1"][1:]).all()
+    assert future["lag7"][0] == engine.values[-7] or np.isnan(engine.values[-7])
+
+    empty = engine.features_for_dates(pd.DatetimeIndex([]))
+    assert all(values.size == 0 for values in empty.values())
+
+
+def check_incremental(series):
+    """append() and features() for the new days equal a from-scratch build; set() and copy() are isolated."""
+    head = series.iloc[:-30]
+    engine = engine_for(head)
+    # the rest of the days (gaps as NaN), appended in a few chunks as a daily job would
+    tail = series.asfreq("D").loc[head.index[-1] + pd.Timedelta(days=1):]
+    for chunk in np.array_split(tail.to_numpy(), 5):
+        start = len(engine)
+        engine.append(chunk)
+        engine.features(start, len(engine))
+    full = engine_for(series)
+    np.testing.assert_array_equal(engine.values, full.values)
+    assert_features_equal(engine.features(0, len(engine)), full.features(0, len(full)))
+
+    snapshot = engine.copy()
+    engine.set([len(engine) - 1], [123.0])
+    assert engine.values[-1] == 123.0
+    np.testing.assert_array_equal(snapshot.values, full.values)
+    try:
+        engine.set([len(engine)], [1.0])
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("set() accepted an offset past the stored series")
+
+
+def main():
+    report = {}
+    for n in (50, 1000, 5000):
+        series = gappy_series(n, seed=n)
+        engine, expected = check_against_pandas(series)
+        check_features_for_dates(engine, expected)
+        check_incremental(series)
+        report[f"rows_{n}"] = "ok"
+
+    # duplicated dates: the last value wins, as from_series documents
+    dup = pd.Series([1.0, 2.0, 3.0], index=pd.to_datetime(["2020-01-02", "2020-01-01", "2020-01-02"]))
+    engine = LagFeatureEngine.from_series(dup.index, dup.to_numpy(), lags=[1])
+    np.testing.assert_array_equal(engine.values, [2.0, 3.0])
+    report["duplicate_dates"] = "ok"
+
+    try:
+        LagFeatureEngine.from_series([], [], lags=[1])
+    except ValueError:
+        report["rejects_empty"] = "ok"
+    else:
+        raise AssertionError("from_series accepted an empty series")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
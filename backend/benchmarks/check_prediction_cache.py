@@ -0,0 +1,151 @@
+# backend/benchmarks/check_prediction_cache.py
+"""
+Correctness checks for prediction_cache.PredictionCache.
+
+Usage:
+    python benchmarks/check_prediction_cache.py
+
+Asserts input quantization (and that the model sees the snapped inputs), that
+a hit returns exactly what the miss returned, LRU eviction order, TTL expiry,
+write-through persistence to the SQLite file, and that a new model version
+drops the older versions' entries without touching other caches in the file.
+Runs against a temporary file; exits nonzero on the first failure.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+
+from prediction_cache import PredictionCache, parse_quantization, quantize  # noqa: E402
+
+QUANTIZATION = {"temperature": 0.5, "humidity": 1.0}
+
+
+class Model:
+    """Stand-in model that records every input it is called with."""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs):
+        self.calls.append(inputs)
+        return {"value": inputs["temperature"] * 2 + inputs["humidity"], "pair": (1, 2)}
+
+
+def check_quantization():
+    assert parse_quantization("temperature=0.5, humidity=1,") == {"temperature": 0.5, "humidity": 1.0}
+    assert parse_quantization("") == {}
+    assert quantize(0.1 * 7, 0.1) == 0.7
+    assert quantize(70.26, 0.5) == 70.5 and quantize(70.24, 0.5) == 70.0
+    assert quantize(-3.3, 1.0) == -3.0
+    assert quantize("41.7", 0) == 41.7
+    for bad in (float("nan"), float("inf"), "-inf"):
+        try:
+            quantize(bad, 0.5)
+        except ValueError:
+            continue
+        raise AssertionError(f"quantize accepted {bad!r}")
+
+    cache = PredictionCache("check", QUANTIZATION, path=None)
+    snapped = cache.snap({"temperature": 70.2, "humidity": 49.6, "station": "A"})
+    assert snapped == {"temperature": 70.0, "humidity": 50.0, "station": "A"}
+    # key order does not matter
+    assert cache.key({"a": 1, "b": 2}) == cache.key({"b": 2, "a": 1})
+
+
+def check_hits(path):
+    model = Model()
+    cache = PredictionCache("check", QUANTIZATION, path=path)
+    first = cache.get_or_compute("v1", {"temperature": 70.1, "humidity": 50.2}, model)
+    # within the same grid cell: served from the cache
+    second = cache.get_or_compute("v1", {"temperature": 69.9, "humidity": 49.8}, model)
+    assert model.calls == [{"temperature": 70.0, "humidity": 50.0}]
+    # a miss returns the JSON round trip too, so it is identical to later hits (tuples become lists)
+    assert first == second == {"value": 190.0, "pair": [1, 2]}
+    cache.get_or_compute("v1", {"temperature": 70.3, "humidity": 50.0}, model)
+    assert len(model.calls) == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["lookups"]) == (1, 2, 3), stats
+    assert stats["stored_entries"] == 2 and stats["entries"] == 2, stats
+    cache.close()
+
+
+def check_persistence(path):
+    """A fresh cache (e.g. after a restart) finds the entries check_hits wrote to the file."""
+    model = Model()
+    cache = PredictionCache("check", QUANTIZATION, path=path)
+    value = cache.get_or_compute("v1", {"temperature": 70.0, "humidity": 50.0}, model)
+    assert value == {"value": 190.0, "pair": [1, 2]} and not model.calls
+    assert cache.stats()["disk_hits"] == 1
+
+    # another cache in the same file keeps its entries when this one changes version
+    other = PredictionCache("other", QUANTIZATION, path=path)
+    other.get_or_compute("w1", {"temperature": 1.0, "humidity": 1.0}, Model())
+
+    cache.get_or_compute("v2", {"temperature": 70.0, "humidity": 50.0}, model)
+    assert len(model.calls) == 1, "a new model version must not reuse the old version's entries"
+    restarted = PredictionCache("check", QUANTIZATION, path=path)
+    assert restarted.stats()["stored_entries"] == 1, "older versions' rows must be dropped from the file"
+    assert other.stats()["stored_entries"] == 1
+    for c in (cache, other, restarted):
+        c.close()
+
+
+def check_lru():
+    model = Model()
+    cache = PredictionCache("lru", {}, max_entries=2, path=None)
+
+    def get(t):
+        return cache.get_or_compute("v1", {"temperature": t, "humidity": 0}, model)
+
+    get(1), get(2), get(1)  # 1 is now the most recently used
+    get(3)  # evicts 2
+    assert cache.stats()["evictions"] == 1
+    calls = len(model.calls)
+    get(1), get(3)
+    assert len(model.calls) == calls, "recently used entries were evicted"
+    get(2)
+    assert len(model.calls) == calls + 1, "the least recently used entry was kept"
+
+
+def check_ttl():
+    model = Model()
+    cache = PredictionCache("ttl", {}, ttl=0.05, path=None)
+    inputs = {"temperature": 1.0, "humidity": 1.0}
+    cache.get_or_compute("v1", inputs, model)
+    cache.get_or_compute("v1", inputs, model)
+    assert len(model.calls) == 1
+    time.sleep(0.1)
+    cache.get_or_compute("v1", inputs, model)
+    assert len(model.calls) == 2 and cache.stats()["expired"] == 1
+
+    # ttl=0 never expires
+    forever = PredictionCache("ttl0", {}, ttl=0, path=None)
+    forever.get_or_compute("v1", inputs, model)
+    time.sleep(0.06)
+    forever.get_or_compute("v1", inputs, model)
+    assert len(model.calls) == 3
+
+
+def main():
+    scratch = tempfile.mkdtemp(prefix="prediction-cache-check-")
+    path = os.path.join(scratch, "cache.sqlite")
+    report = {}
+    try:
+        for name, check in [("quantization", check_quantization), ("hits", lambda: check_hits(path)),
+                            ("persistence", lambda: check_persistence(path)),
+                            ("lru", check_lru), ("ttl", check_ttl)]:
+            check()
+            report[name] = "ok"
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+# backend/benchmarks/suite.py
+"""
+Offline benchmark suite for the training and inference paths of every backend script.
+
+Usage:
+    python benchmarks/suite.py run [--scales 1,10,100] [--scripts activity_recommender,...]
+                                   [--repeat 3] [--rows 1000] [--label TEXT] [--history FILE]
+    python benchmarks/suite.py compare [--baseline -2] [--current -1] [--threshold 0.1]
+                                       [--min-delta 10.0] [--min-delta-mb 5.0] [--history FILE]
+
+run: for every script and scale, backend/scripts is copied into a temporary
+workspace whose data/ holds the script's CSVs (scale 1: the bundled files;
+scale N: N copies, see scale_csv) and whose columnar store, artifacts and
+plots start empty, so nothing is shared with the real tree or between cases.
+Each step runs in a fresh interpreter:
+  ingest_ms          - building the columnar copies of the CSVs (data_store.py ingest)
+  train_ms           - training from scratch, i.e. with an empty tuning cache
+                       (newsfeed: the first refresh, which runs the models over every article)
+  train_peak_rss_mb  - peak RSS of the training interpreter
+  import_ms          - importing the script (median over --repeat interpreters)
+  cold_start_ms      - import plus the first request, artifacts already built (median)
+  request_ms         - median warm request: one prediction (capstone: a 31-day forecast
+                       slice, airquality_regression: the cached report, newsfeed: the stored feed)
+  batch_ms           - median time for --rows rows through the model at once
+                       (capstone: a --rows day forecast past the precomputed table)
+  serve_peak_rss_mb  - peak RSS of the serving interpreter (largest over --repeat)
+newsfeed.py runs against the bundled fixture feed with small local stand-in models
+(STAND_INS) instead of the Hugging Face pipelines, so no network or transformers
+install is needed. The results are appended to the history file as one run.
+
+compare: reports every metric of the current run that is more than --threshold
+(a fraction) and more than --min-delta (ms metrics) / --min-delta-mb (MB metrics)
+worse than in the baseline run, and every case that ran in the baseline but
+errored in the current run ("broken"); exits with status 1 if there is any.
+The default floors sit above run-to-run noise on a small machine (e.g. import_ms
+moving 13 -> 19 ms between identical runs). Runs are picked by history index or label.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import importlib
+import subprocess
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'scripts')
+DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
+FEED_FIXTURE = os.path.join('fixtures', 'air_quality_news.xml')
+DEFAULT_HISTORY = os.path.join(BASE_DIR, 'history.json')
+
+# Environment overrides that would point a workspace back at the real tree
+ISOLATED_ENV = ("ARTIFACTS_DIR", "DATA_STORE_DIR", "DATA_FILE", "TUNING_CACHE", "INSTRUMENTATION_FILE",
+                "NEWSFEED_MODEL_DIR")
+# Columns made unique per synthetic copy: string ids get a suffix, integer ids an offset
+ID_COLUMNS = {"geoid": "suffix", "User ID": "suffix", "geoid20": "offset"}
+# Every metric is "lower is better"
+METRICS = ("ingest_ms", "train_ms", "train_peak_rss_mb", "import_ms", "cold_start_ms", "request_ms",
+           "batch_ms", "serve_peak_rss_mb")
+
+
+# -------------- Stand-in Models --------------
+# Small local callables with the Hugging Face pipelines' batch interface (see newsfeed.PIPELINES)
+_POSITIVE = {"improve", "improves", "improved", "clean", "cleaner", "lower", "drop", "drops", "good", "healthy"}
+_NEGATIVE = {"smoke", "unhealthy", "wildfire", "worse", "pollution", "hazardous", "alert", "high", "spike"}
+
+
+def _stand_in_summarizer(texts, max_length=50, **kwargs):
+    return [{"summary_text": " ".join(text.split()[:max_length])} for text in texts]
+
+
+def _stand_in_sentiment(texts, **kwargs):
+    results = []
+    for text in texts:
+        words = [w.strip(".,!?").lower() for w in text.split()]
+        score = sum(w in _POSITIVE for w in words) - sum(w in _NEGATIVE for w in words)
+        label = "POSITIVE" if score > 0 else "NEGATIVE"
+        results.append({"label": label, "score": min(0.99, 0.5 + 0.1 * abs(score))})
+    return results
+
+
+def _stand_in_headlines(titles, **kwargs):
+    return [[{"generated_text": f"{title}: what it means for you"}] for title in titles]
+
+
+STAND_INS = {
+    "summarizer": _stand_in_summarizer,
+    "sentiment_analyzer": _stand_in_sentiment,
+    "headline_generator": _stand_in_headlines,
+}
+
+
+# -------------- Cases --------------
+# Each case: the data files the script reads, and train/request/batch callables taking the
+# imported module (batch also the row count, returning (fn, rows) with the inputs prepared).
+def _activity_batch(m, rows):
+    import data_store
+    m.load_model()
+    df = data_store.load(m.DATA_FILE).sample(n=rows, replace=True, random_state=0)
+    X = np.column_stack([
+        df['Age'], m.label_encoders['Time_of_Day'].encode_column(df['Time_of_Day']), df['AQI'],
+        df['Temperature'], df['Precipitation'],
+        ((df['AQI'] < 100) & df['Time_of_Day'].between(6, 20)).astype(int),
+    ]).astype(np.float64)
+    return (lambda: m.compiled_model.predict(X)), rows
+
+
+def _activity_v2_batch(m, rows):
+    import data_store
+    m.load_model()
+    df = data_store.load(m.DATA_FILE).sample(n=rows, replace=True, random_state=0)
+    records = df.drop(columns=['User ID', 'Recommended Activity']).astype(object).to_dict('records')
+    return (lambda: m.run_batch(records)), rows
+
+
+def _aqi_batch(m, rows):
+    features, _ = m.load_training_data()
+    X = features.sample(n=rows, replace=True, random_state=0)
+    model = m.load_model()
+    return (lambda: model.predict(X)), rows
+
+
+def _capstone_batch(m, rows):
+    m.load_model()
+    # the first day past the precomputed table, so every day goes through the booster
+    start = m.history.start + np.timedelta64(len(m.forecast_table), 'D')
+    end = start + np.timedelta64(rows - 1, 'D')
+    return (lambda: m.forecast_columns(str(start), str(end))), rows
+
+
+def _regression_batch(m, rows):
+    X, y, _ = m.preprocess_data(m.load_data(m.DATA_FILE))
+    X_train, X_test, y_train, y_test = m.split_and_scale_data(X, y)
+    results, models, _ = m.train_and_evaluate_models(X_train, X_test, y_train, y_test)
+    best = models[max(models, key=lambda name: results[name]['R2'])]
+    X_batch = X_test[np.random.default_rng(0).integers(0, len(X_test), rows)]
+    return (lambda: best.predict(X_batch)), rows
+
+
+def _regression_train(m):
+    m.run()
+    import plot_renderer
+    plot_renderer.wait()
+
+
+def _newsfeed_batch(m, rows):
+    articles = m.get_air_quality_news(limit=None)
+    articles = (articles * (rows // max(len(articles), 1) + 1))[:rows]
+    return (lambda: m.process_articles(articles, pipelines=STAND_INS, cache_dir=None)), rows
+
+
+CASES = {
+    "activity_recommender": {
+        "files": ["10K_Activity_Dataset.csv"],
+        "train": lambda m: m.train(),
+        "request": lambda m: m.run(30, '14', 40, 70, 0),
+        "batch": _activity_batch,
+    },
+    "activityrecommendationv2": {
+        "files": ["activity_recommendation_dataset.csv"],
+        "train": lambda m: m.train(),
+        "request": lambda m: m.run(30, 'Female', 'None', 'Active', 'Outdoor', 20, 50, 5, 40, 10, 20, 'None', 'None'),
+        "batch": _activity_v2_batch,
+    },
+    "aqi_prediction": {
+        "files": ["BobHopeAirportStationWeatherData.csv", "los-angeles-north-main-street-air-quality.csv"],
+        "train": lambda m: m.train(),
+        "request": lambda m: m.run(70, 50, 5, 0),
+        "batch": _aqi_batch,
+    },
+    "capstone_airquality": {
+        "files": ["AQE.csv", "AQW.csv"],
+        "train": lambda m: m.precompute(),
+        "request": lambda m: m.run('2025-01-01', '2025-01-31'),
+        "batch": _capstone_batch,
+    },
+    "airquality_regression": {
+        "files": ["AllYearsAirQualityCalculations.csv"],
+        "train": _regression_train,
+        "request": lambda m: m.run(),
+        "batch": _regression_batch,
+    },
+    "newsfeed": {
+        "files": [FEED_FIXTURE],
+        "train": lambda m: m.refresh(limit=None, pipelines=STAND_INS),
+        "request": lambda m: m.run(),
+        "batch": _newsfeed_batch,
+    },
+}
+
+
+# -------------- Synthetic Data --------------
+def _date_columns(name):
+    import data_store
+    return {col: kind.split(":", 1)[1] for col, kind in data_store.SCHEMAS[name] if kind.startswith("date:")}
+
+
+def shift_days(names):
+    """Days between synthetic copies: the longest date span across the files (so merges stay aligned)."""
+    import pandas as pd
+    span = 0
+    for name in names:
+        for col, fmt in _date_columns(name).items():
+            dates = pd.to_datetime(pd.read_csv(os.path.join(DATA_DIR, name), usecols=[col])[col], format=fmt)
+            span = max(span, (dates.max() - dates.min()).days + 1)
+    return span
+
+
+def scale_csv(name, target, scale, shift):
+    """
+    Write `scale` copies of a bundled CSV to `target`. Copy 0 is the original; copy k
+    moves its dates by an alternating k-th multiple of `shift` days (-1, +1, -2, +2, ...
+    spans, keeping years four-digit), makes ID_COLUMNS unique and multiplies its other
+    float columns by 1 + N(0, 0.02). Integer and categorical columns are kept as-is.
+    """
+    import pandas as pd
+    import data_store
+    base = pd.read_csv(os.path.join(DATA_DIR, name), dtype=str, keep_default_na=False)
+    base.columns = base.columns.str.strip()
+    kinds = dict(data_store.SCHEMAS[name])
+    dates = _date_columns(name)
+    parsed = {col: pd.to_datetime(base[col], format=fmt) for col, fmt in dates.items()}
+    rng = np.random.default_rng(scale)
+    with open(target, 'w', newline='') as f:
+        for copy in range(scale):
+            frame = base.copy()
+            if copy:
+                offset = pd.Timedelta(days=shift * ((copy + 1) // 2) * (-1 if copy % 2 else 1))
+                for col, fmt in dates.items():
+                    frame[col] = (parsed[col] + offset).dt.strftime(fmt)
+                for col, kind in kinds.items():
+                    if ID_COLUMNS.get(col) == "suffix":
+                        frame[col] = frame[col] + f"-{copy}"
+                    elif ID_COLUMNS.get(col) == "offset":
+                        values = pd.to_numeric(frame[col])
+                        frame[col] = values + copy * (int(values.max()) + 1)
+                    elif kind == "float":
+                        values = pd.to_numeric(frame[col], errors='coerce')
+                        frame[col] = values * rng.normal(1.0, 0.02, len(frame))
+            frame.to_csv(f, header=copy == 0, index=False)
+
+
+def scale_feed(target, scale):
+    """The fixture feed with every <item> repeated `scale` times under distinct links/guids."""
+    import re
+    with open(os.path.join(DATA_DIR, FEED_FIXTURE), encoding='utf-8') as f:
+        text = f.read()
+    items = re.findall(r"\s*<item>.*?</item>", text, flags=re.S)
+    copies = [re.sub(r"(<(link|guid)>)([^<]+)(</\2>)", lambda mt: f"{mt[1]}{mt[3]}?copy={copy}{mt[4]}", item)
+              if copy else item for copy in range(scale) for item in items]
+    start, end = text.index(items[0]), text.index(items[-1]) + len(items[-1])
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write(text[:start] + "".join(copies) + text[end:])
+
+
+def make_workspace(script, scale):
+    """Temporary copy of backend/scripts plus the script's (scaled) data; returns its root."""
+    root = tempfile.mkdtemp(prefix=f"bench-{script}-x{scale}-")
+    shutil.copytree(SCRIPTS_DIR, os.path.join(root, 'scripts'), ignore=shutil.ignore_patterns('__pycache__', '*.pyc'))
+    os.makedirs(os.path.join(root, 'data'))
+    os.makedirs(os.path.join(root, 'plots'))
+    files = CASES[script]["files"]
+    csvs = [name for name in files if name.endswith('.csv')]
+    shift = shift_days(csvs) if scale > 1 else 0
+    for name in files:
+        target = os.path.join(root, 'data', name)
+        if scale == 1:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(os.path.join(DATA_DIR, name), target)
+        elif name == FEED_FIXTURE:
+            scale_feed(target, scale)
+        else:
+            scale_csv(name, target, scale, shift)
+    return root
+
+
+# -------------- Measurement --------------
+def _peak_rss_mb():
+    """Peak RSS of this interpreter. VmHWM is preferred: ru_maxrss starts at the parent's RSS at fork."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+
+
+def sample(script, mode, repeat, rows):
+    """Runs in the workspace interpreter: one "train" or "serve" measurement, printed as JSON."""
+    case = CASES[script]
+    started = time.perf_counter()
+    module = importlib.import_module(script)
+    out = {"import_ms": (time.perf_counter() - started) * 1000.0}
+    if mode == "train":
+        began = time.perf_counter()
+        case["train"](module)
+        out["train_ms"] = (time.perf_counter() - began) * 1000.0
+    else:
+        case["request"](module)
+        out["cold_start_ms"] = (time.perf_counter() - started) * 1000.0
+        timings = []
+        for _ in range(repeat):
+            began = time.perf_counter()
+            case["request"](module)
+            timings.append(time.perf_counter() - began)
+        out["request_ms"] = float(np.median(timings)) * 1000.0
+        fn, out["batch_rows"] = case["batch"](module, rows)
+        fn()  # warm-up (e.g. JIT compilation)
+        timings = []
+        for _ in range(repeat):
+            began = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - began)
+        out["batch_ms"] = float(np.median(timings)) * 1000.0
+    if "plot_renderer" in sys.modules:
+        sys.modules["plot_renderer"].wait()
+    out["peak_rss_mb"] = _peak_rss_mb()
+    print(json.dumps(out))
+
+
+def _child(root, args, env, timeout):
+    proc = subprocess.run([sys.executable] + args, cwd=os.path.join(root, 'scripts'), env=env,
+                          capture_output=True, text=True, timeout=timeout)
+    if proc.returncode != 0:
+        lines = (proc.stdout.strip() + "\n" + proc.stderr.strip()).strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit code {proc.returncode}")
+    return proc.stdout
+
+
+def run_case(script, scale, repeat, rows, timeout):
+    root = make_workspace(script, scale)
+    env = {k: v for k, v in os.environ.items() if k not in ISOLATED_ENV}
+    env.update(PYTHONPATH=os.path.join(root, 'scripts'), NEWSFEED_REFRESH_SECONDS="0",
+               NEWSFEED_SOURCE=os.path.join(root, 'data', FEED_FIXTURE))
+    measure = [os.path.abspath(__file__), "_sample", script]
+    result = {}
+    try:
+        csvs = [name for name in CASES[script]["files"] if name.endswith('.csv')]
+        if csvs:
+            began = time.perf_counter()
+            _child(root, ["data_store.py", "ingest"] + csvs, env, timeout)
+            result["ingest_ms"] = round((time.perf_counter() - began) * 1000.0, 1)
+        trained = json.loads(_child(root, measure + ["train", "1", str(rows)], env, timeout).splitlines()[-1])
+        result["train_ms"] = round(trained["train_ms"], 1)
+        result["train_peak_rss_mb"] = trained["peak_rss_mb"]
+        served = [json.loads(_child(root, measure + ["serve", str(repeat), str(rows)], env, timeout).splitlines()[-1])
+                  for _ in range(repeat)]
+        for key in ("import_ms", "cold_start_ms", "request_ms", "batch_ms"):
+            result[key] = round(float(np.median([s[key] for s in served])), 3)
+        result["batch_rows"] = served[0]["batch_rows"]
+        result["serve_peak_rss_mb"] = max(s["peak_rss_mb"] for s in served)
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        result["error"] = str(e)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return result
+
+
+# -------------- History --------------
+def load_history(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"runs": []}
+
+
+def save_history(path, history):
+    fd, staging = tempfile.mkstemp(prefix=".history-", dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(staging, path)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine():
+    return {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count(),
+            "numpy": np.__version__}
+
+
+def pick_run(runs, selector):
+    """A run by history index (e.g. -1 for the latest) or by label (the latest with that label)."""
+    try:
+        return runs[int(selector)]
+    except ValueError:
+        matches = [run for run in runs if run.get("label") == selector]
+        if not matches:
+            raise KeyError(f"No run labelled {selector!r}")
+        return matches[-1]
+
+
+def compare(baseline, current, threshold, min_delta, min_delta_mb):
+    regressions, improvements, broken, compared = [], [], [], 0
+    for script, scales in current["results"].items():
+        for scale, metrics in scales.items():
+            before = baseline["results"].get(script, {}).get(scale, {})
+            if "error" in metrics:
+                # an error leaves no metrics to compare; it is a failure of its own unless it already failed
+                if before and "error" not in before:
+                    broken.append({"script": script, "scale": scale, "error": metrics["error"]})
+                continue
+            for metric in METRICS:
+                if metrics.get(metric) is None or before.get(metric) is None:
+                    continue
+                compared += 1
+                old, new = before[metric], metrics[metric]
+                change = (new - old) / old if old else 0.0
+                entry = {"script": script, "scale": scale, "metric": metric, "baseline": old, "current": new,
+                         "change": round(change, 4)}
+                if abs(new - old) < (min_delta_mb if metric.endswith("_mb") else min_delta):
+                    continue
+                if change > threshold:
+                    regressions.append(entry)
+                elif change < -threshold:
+                    improvements.append(entry)
+    return {
+        "baseline": {key: baseline.get(key) for key in ("id", "label", "commit", "created_at")},
+        "current": {key: current.get(key) for key in ("id", "label", "commit", "created_at")},
+        "same_machine": baseline.get("machine") == current.get("machine"),
+        "threshold": threshold,
+        "min_delta": {"ms": min_delta, "mb": min_delta_mb},
+        "compared": compared,
+        "broken": broken,
+        "regressions": regressions,
+        "improvements": improvements,
+    }
+
+
+# -------------- Commands --------------
+def cmd_run(args):
+    scripts = args.scripts.split(",")
+    unknown = [s for s in scripts if s not in CASES]
+    if unknown:
+        print(json.dumps({"error": f"Unknown scripts: {', '.join(unknown)}"}))
+        sys.exit(1)
+    scales = [int(s) for s in args.scales.split(",")]
+    results = {}
+    for script in scripts:
+        results[script] = {}
+        for scale in scales:
+            results[script][f"x{scale}"] = run_case(script, scale, args.repeat, args.rows, args.timeout)
+            print(json.dumps({"script": script, "scale": scale, **results[script][f"x{scale}"]}), file=sys.stderr)
+
+    history = load_history(args.history)
+    run = {
+        "id": len(history["runs"]),
+        "label": args.label,
+        "commit": git_commit(),
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "machine": machine(),
+        "settings": {"repeat": args.repeat, "rows": args.rows, "scales": scales},
+        "results": results,
+    }
+    history["runs"].append(run)
+    save_history(args.history, history)
+    print(json.dumps(run, indent=2))
+
+
+def cmd_compare(args):
+    runs = load_history(args.history)["runs"]
+    try:
+        baseline, current = pick_run(runs, args.baseline), pick_run(runs, args.current)
+    except (IndexError, KeyError) as e:
+        print(json.dumps({"error": "Cannot pick runs to compare", "details": str(e), "runs": len(runs)}))
+        sys.exit(1)
+    report = compare(baseline, current, args.threshold, args.min_delta, args.min_delta_mb)
+    print(json.dumps(report, indent=2))
+    if report["regressions"] or report["broken"]:
+        sys.exit(1)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "_sample":
+        # internal: python suite.py _sample SCRIPT train|serve REPEAT ROWS (inside a workspace)
+        sample(sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5]))
+        return
+    # the parent only needs data_store.SCHEMAS; samples import from their workspace instead
+    sys.path.insert(0, SCRIPTS_DIR)
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="benchmark the scripts and append the results to the history")
+    run.add_argument("--scales", default="1,10,100")
+    run.add_argument("--scripts", default=",".join(CASES))
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--rows", type=int, default=1000)
+    run.add_argument("--timeout", type=float, default=3600.0, help="seconds per step before giving up")
+    run.add_argument("--label", default=None)
+    run.add_argument("--history", default=DEFAULT_HISTORY)
+    check = commands.add_parser("compare", help="flag regressions between two runs in the history")
+    check.add_argument("--baseline", default="-2")
+    check.add_argument("--current", default="-1")
+    check.add_argument("--threshold", type=float, default=0.10)
+    check.add_argument("--min-delta", type=float, default=10.0, help="smallest change (ms) flagged for ms metrics")
+    check.add_argument("--min-delta-mb", type=float, default=5.0, help="smallest change (MB) flagged for MB metrics")
+    check.add_argument("--history", default=DEFAULT_HISTORY)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        cmd_run(args)
+    else:
+        cmd_compare(args)
+
+
+if __name__ == "__main__":
+    main()
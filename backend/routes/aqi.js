@@ -1,12 +1,6 @@
 // backend\routes\aqi.js
 import express from 'express';
-import { spawn } from 'child_process';
-import path from 'path';
-import { fileURLToPath } from 'url';
-
-// Workaround for __dirname in ES modules:
-const __filename = fileURLToPath(import.meta.url);
-const __dirname = path.dirname(__filename);
+import inferenceServer, { setServerTiming } from '../utils/inferenceServer.js';
 
 const router = express.Router();
 
@@ -19,36 +13,46 @@ router.get('/predict', async (req, res) => {
     return res.status(400).json({ error: "Missing query parameters." });
   }
 
-  // Build absolute path to the python script
-  const scriptPath = path.join(__dirname, '..', 'scripts', 'aqi_prediction.py');
-
-  const pythonProcess = spawn('python', [
-    scriptPath,
-    temperature, humidity, wind_speed, precipitation
-  ]);
-
-  let result = '';
-
-  pythonProcess.stdout.on('data', (data) => {
-    result += data.toString();
-  });
-
-  pythonProcess.stderr.on('data', (data) => {
-    console.error(`Error: ${data}`);
-  });
-
-  pythonProcess.on('close', (code) => {
-    if (code === 0) {
-      try {
-        res.json(JSON.parse(result));
-      } catch (e) {
-        console.error('Error parsing JSON output:', e);
-        res.status(500).json({ error: "Failed to parse prediction output." });
-      }
-    } else {
-      res.status(500).json({ error: "Failed to process request." });
-    }
-  });
+  try {
+    const { result: output, timing } = await inferenceServer.callTimed('predict_pm25', {
+      temperature, humidity, wind_speed, precipitation
+    });
+    setServerTiming(res, timing);
+    res.json(output);
+  } catch (error) {
+    console.error('Error running PM2.5 prediction:', error);
+    res.status(500).json({ error: "Failed to process request." });
+  }
+});
+
+// Every pollutant's predicted concentration and sub-AQI from the multi-output model
+router.get('/predict-all', async (req, res) => {
+  const { temperature, humidity, wind_speed, precipitation } = req.query;
+
+  if (!temperature || !humidity || !wind_speed || !precipitation) {
+    return res.status(400).json({ error: "Missing query parameters." });
+  }
+
+  try {
+    const { result: output, timing } = await inferenceServer.callTimed('predict_pollutants', {
+      temperature, humidity, wind_speed, precipitation
+    });
+    setServerTiming(res, timing);
+    res.json(output);
+  } catch (error) {
+    console.error('Error running pollutant prediction:', error);
+    res.status(500).json({ error: "Failed to process request." });
+  }
+});
+
+// Hit rate and latency of the PM2.5 prediction cache
+router.get('/cache-stats', async (req, res) => {
+  try {
+    res.json(await inferenceServer.call('pm25_cache_stats'));
+  } catch (error) {
+    console.error('Error reading PM2.5 cache stats:', error);
+    res.status(500).json({ error: "Failed to process request." });
+  }
 });
 
 export default router;
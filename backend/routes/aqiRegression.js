@@ -1,59 +1,60 @@
 // backend\routes\aqiRegression.js
 import express from 'express';
-import { spawn } from 'child_process';
-import path from 'path';
-import { fileURLToPath } from 'url';
+import inferenceServer, { setServerTiming } from '../utils/inferenceServer.js';
 
-const __filename = fileURLToPath(import.meta.url);
-const __dirname = path.dirname(__filename);
 
 const router = express.Router();
 
 /**
- * Helper function to run a Python script and return its output as a Promise.
+ * GET /regression
+ * This route runs the air quality regression report and returns its JSON output.
  */
-function runPythonScript(scriptPath, args = []) {
-  return new Promise((resolve, reject) => {
-    let result = '';
-    const pythonProcess = spawn('python3', [scriptPath, ...args], {
-      cwd: path.dirname(scriptPath)
-    });
-
-    pythonProcess.stdout.on('data', (data) => {
-      result += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      console.error(`Python stderr: ${data.toString()}`);
-    });
-
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        resolve(result);
-      } else {
-        reject(new Error(`Python script exited with code ${code}`));
-      }
-    });
-  });
-}
+router.get('/regression', async (req, res) => {
+  try {
+    const { result: output, timing } = await inferenceServer.callTimed('regression_report');
+    setServerTiming(res, timing);
+    res.json(output);
+  } catch (error) {
+    console.error('Error running regression report:', error);
+    res.status(500).json({ error: 'Failed to process regression request.' });
+  }
+});
 
 /**
- * GET /regression
- * This route runs the air quality regression Python script and returns its JSON output.
+ * GET /tracts?tracts=GEOID[,GEOID...]&year=Y  (or &start_year=A&end_year=B)
+ * PM2.5 concentration and percentile rows for the given census tracts.
+ * GET /tracts/worst?year=Y&n=10
+ * The n tracts with the highest PM2.5 concentration in a year.
  */
-router.get('/regression', async (req, res) => {
-  const scriptPath = path.join(__dirname, '..', 'scripts', 'airquality_regression.py');
+router.get('/tracts', async (req, res) => {
+  const { tracts, year, start_year, end_year } = req.query;
+  if (!tracts) {
+    return res.status(400).json({ error: 'Missing query parameter: tracts.' });
+  }
+  try {
+    const { result: output, timing } = await inferenceServer.callTimed('tract_lookup', {
+      tracts, year, start_year, end_year
+    });
+    setServerTiming(res, timing);
+    res.json(output);
+  } catch (error) {
+    console.error('Error looking up tracts:', error);
+    res.status(500).json({ error: 'Failed to process tract lookup.' });
+  }
+});
 
+router.get('/tracts/worst', async (req, res) => {
+  const { year, n } = req.query;
+  if (!year) {
+    return res.status(400).json({ error: 'Missing query parameter: year.' });
+  }
   try {
-    const outputStr = await runPythonScript(scriptPath);
-    // Assume the last non-empty line is valid JSON.
-    const lines = outputStr.trim().split('\n');
-    const lastLine = lines[lines.length - 1];
-    const output = JSON.parse(lastLine);
+    const { result: output, timing } = await inferenceServer.callTimed('tract_lookup', { year, worst_n: n });
+    setServerTiming(res, timing);
     res.json(output);
   } catch (error) {
-    console.error('Error running Python script:', error);
-    res.status(500).json({ error: 'Failed to process regression request.' });
+    console.error('Error looking up worst tracts:', error);
+    res.status(500).json({ error: 'Failed to process tract lookup.' });
   }
 });
 
@@ -2,65 +2,164 @@
 import os
 import sys
 import json
-import pandas as pd
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
+import time
+import threading
+import numpy as np
+
+import instrumentation
+import model_store
+from encoders import FrozenEncoder, load_encoders, save_encoders
+from forest import CompiledForest
 
 # -------------- Setup File Paths --------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_FILE = os.path.join(BASE_DIR, '..', 'data', '10K_Activity_Dataset.csv')
 
-# -------------- Load Dataset --------------
-try:
-    df = pd.read_csv(DATA_FILE)
-except Exception as e:
-    print(json.dumps({"error": "Failed to load dataset", "details": str(e)}))
-    sys.exit(1)
+# Trained artifacts live under <ARTIFACTS_DIR>/activity_recommender/<data hash prefix>-v<format>/
+ARTIFACT_NAME = 'activity_recommender'
+# Bumped when the artifact layout changes
+# (2: encoders stored as encoders.json lookup tables, 3: compiled forest arrays added,
+#  4: tuned under TUNING_MAX_CANDIDATES / TUNING_MAX_ROWS)
+ARTIFACT_FORMAT = 4
+ENCODERS_FILE = 'encoders.json'
 
-# -------------- Encode Categorical Variables --------------
-# Encode Time_of_Day, AQI_Category, and Suggested_Activity
-label_encoders = {}
+# -------------- Model Definition --------------
 categorical_columns = ['Time_of_Day', 'AQI_Category', 'Suggested_Activity']
-for col in categorical_columns:
-    try:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        label_encoders[col] = le
-    except Exception as e:
-        print(json.dumps({"error": f"Failed to encode column {col}", "details": str(e)}))
-        sys.exit(1)
-
-# -------------- Feature Engineering --------------
-# For training, consider outdoor-friendly if AQI < 50 and Time_of_Day is between 8 and 18
-df['Outdoor_Friendly'] = ((df['AQI'] < 50) & (df['Time_of_Day'].between(8, 18))).astype(int)
-
-# -------------- Data Preparation --------------
 FEATURES = ['Age', 'Time_of_Day', 'AQI', 'Temperature', 'Precipitation', 'Outdoor_Friendly']
 TARGET = 'Suggested_Activity'
 
-X = df[FEATURES]
-y = df[TARGET]
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# -------------- Hyperparameter Tuning & Model Training --------------
 param_grid = {
     'n_estimators': [50, 100, 200],
     'max_depth': [None, 10, 20],
     'min_samples_split': [2, 5, 10]
 }
+# Training runs on the first request after the data changes, so its search is bounded: a fixed sample
+# of grid points, each scored on at most this many rows per fold (the refit uses every row)
+TUNING_MAX_CANDIDATES = 9
+TUNING_MAX_ROWS = 5000
+
+# Populated by load_model(); kept at module level so repeated calls reuse the loaded artifact.
+# Flattened forest used for predictions, memory-mapped from the artifact
+compiled_model = None
+# The fitted scikit-learn estimator; only unpickled by load_estimator() (not needed to predict)
+best_model = None
+label_encoders = None
+model_metadata = None
+_model_lock = threading.Lock()
+
+
+def artifact_version(data_hash):
+    return f"{data_hash[:16]}-v{ARTIFACT_FORMAT}"
+
+
+# -------------- Training --------------
+@instrumentation.timed("train")
+def train(data_file=DATA_FILE):
+    """
+    Fit the encoders and tune the forest once (see tuning.tune), then save the
+    best estimator, the encoders and their metadata as a versioned artifact.
+
+    Returns the artifact metadata.
+    """
+    # training-only dependencies, kept out of the serving path's startup
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    import data_store
+    import tuning
+
+    data_hash = model_store.file_hash(data_file)
+    started = time.time()
+
+    with instrumentation.stage("load_data"):
+        df = data_store.load(data_file)
+
+    # Encode Time_of_Day, AQI_Category, and Suggested_Activity
+    encoders = {}
+    with instrumentation.stage("encode"):
+        for col in categorical_columns:
+            le = LabelEncoder()
+            df[col] = le.fit_transform(df[col])
+            encoders[col] = FrozenEncoder.from_label_encoder(le)
+
+    # For training, consider outdoor-friendly if AQI < 50 and Time_of_Day is between 8 and 18
+    with instrumentation.stage("create_features"):
+        df['Outdoor_Friendly'] = ((df['AQI'] < 50) & (df['Time_of_Day'].between(8, 18))).astype(int)
+
+    X = df[FEATURES]
+    y = df[TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    model, tuning_report = tuning.tune(RandomForestClassifier(random_state=42), param_grid, X_train, y_train, cv=3,
+                                       max_candidates=TUNING_MAX_CANDIDATES, max_resources=TUNING_MAX_ROWS)
 
-grid_search = GridSearchCV(RandomForestClassifier(random_state=42), param_grid, cv=3)
-grid_search.fit(X_train, y_train)
-best_model = grid_search.best_estimator_
+    with instrumentation.stage("predict"):
+        y_pred = model.predict(X_test)
+    accuracy = accuracy_score(y_test, y_pred)
 
-y_pred = best_model.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
+    # Print model accuracy to stderr for debugging purposes
+    print(f"Model Accuracy: {accuracy:.2f}", file=sys.stderr)
+
+    metadata = {
+        "data_file": os.path.basename(data_file),
+        "data_hash": data_hash,
+        "version": artifact_version(data_hash),
+        "best_params": tuning_report["best_params"],
+        "accuracy": accuracy,
+        "features": FEATURES,
+        "tuning": tuning_report,
+        "trained_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "training_seconds": round(time.time() - started, 3)
+    }
+    model_store.save_artifact(
+        ARTIFACT_NAME, metadata["version"],
+        {"model": model},
+        metadata,
+        arrays=CompiledForest.from_sklearn(model).to_arrays(),
+        files={ENCODERS_FILE: lambda path: save_encoders(path, encoders)}
+    )
+    return metadata
+
+
+@instrumentation.timed("load_model")
+def load_model(data_file=DATA_FILE):
+    """
+    Load the artifact matching the current dataset, training it first if the
+    dataset hash has changed since the last run.
+    """
+    global best_model, compiled_model, label_encoders, model_metadata
+    version = artifact_version(model_store.file_hash(data_file))
+    with _model_lock:
+        if model_metadata is not None and model_metadata["version"] == version:
+            return compiled_model
+
+        metadata = model_store.load_metadata(ARTIFACT_NAME, version)
+        if metadata is None:
+            train(data_file)
+            metadata = model_store.load_metadata(ARTIFACT_NAME, version)
+
+        label_encoders = load_encoders(os.path.join(model_store.artifact_path(ARTIFACT_NAME, version), ENCODERS_FILE))
+        compiled_model = CompiledForest.from_arrays(
+            model_store.load_arrays(ARTIFACT_NAME, version, CompiledForest.array_keys())
+        )
+        best_model = None
+        model_metadata = metadata
+        return compiled_model
+
+
+def load_estimator(data_file=DATA_FILE):
+    """
+    The fitted RandomForestClassifier behind compiled_model (unpickling it imports scikit-learn).
+    """
+    global best_model
+    load_model(data_file)
+    with _model_lock:
+        if best_model is None:
+            objects, _ = model_store.load_artifact(ARTIFACT_NAME, model_metadata["version"], ["model"])
+            best_model = objects["model"]
+        return best_model
 
-# Print model accuracy to stderr for debugging purposes
-print(f"Model Accuracy: {accuracy:.2f}", file=sys.stderr)
 
 # -------------- Activity Recommendation Function --------------
 def recommend_activity(age, time_of_day, aqi, temperature, precipitation):
@@ -77,9 +176,11 @@ def recommend_activity(age, time_of_day, aqi, temperature, precipitation):
     Returns:
       str: The recommended activity (decoded from the label encoder).
     """
+    load_model()
     try:
         # Encode the input time_of_day using the Time_of_Day label encoder
-        time_of_day_encoded = label_encoders['Time_of_Day'].transform([time_of_day])[0]
+        with instrumentation.stage("encode"):
+            time_of_day_encoded = label_encoders['Time_of_Day'].encode(time_of_day)
     except Exception as e:
         return json.dumps({"error": "Invalid time_of_day value", "details": str(e)})
     
@@ -90,23 +191,50 @@ def recommend_activity(age, time_of_day, aqi, temperature, precipitation):
     except Exception as e:
         return json.dumps({"error": "Error calculating outdoor_friendly", "details": str(e)})
     
-    input_data = pd.DataFrame({
-        'Age': [age],
-        'Time_of_Day': [time_of_day_encoded],
-        'AQI': [aqi],
-        'Temperature': [temperature],
-        'Precipitation': [precipitation],
-        'Outdoor_Friendly': [outdoor_friendly]
-    })
+    # Same column order as FEATURES
+    input_row = np.array([[age, time_of_day_encoded, aqi, temperature, precipitation, outdoor_friendly]], dtype=np.float64)
     
-    predicted_activity_encoded = best_model.predict(input_data)[0]
-    predicted_activity = label_encoders['Suggested_Activity'].inverse_transform([predicted_activity_encoded])[0]
+    with instrumentation.stage("predict"):
+        predicted_activity_encoded = compiled_model.predict(input_row)[0]
+        predicted_activity = label_encoders['Suggested_Activity'].decode(predicted_activity_encoded)
     return predicted_activity
 
+def run(age, time_of_day, aqi, temperature, precipitation):
+    """
+    Build the JSON response for one recommendation request (shared by the CLI
+    and the inference server).
+    """
+    age, aqi = float(age), float(aqi)
+    temperature, precipitation = float(temperature), float(precipitation)
+    time_of_day = str(time_of_day)
+    result = recommend_activity(age, time_of_day, aqi, temperature, precipitation)
+    return {
+        "user_input": {
+            "age": age,
+            "time_of_day": time_of_day,
+            "aqi": aqi,
+            "temperature": temperature,
+            "precipitation": precipitation
+        },
+        "recommended_activity": result
+    }
+
 # -------------- Main Execution Block --------------
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+    instrumentation.collect_process(os.path.basename(__file__))
+    # "train" fits the model once and writes the versioned artifact used by recommend_activity.
+    if len(sys.argv) == 2 and sys.argv[1] == "train":
+        try:
+            metadata = train()
+        except Exception as e:
+            print(json.dumps({"error": "Failed to train model", "details": str(e)}))
+            sys.exit(1)
+        print(json.dumps(metadata))
     # If command-line parameters are provided, use them as user input.
-    if len(sys.argv) == 6:
+    elif len(sys.argv) == 6:
         try:
             age = float(sys.argv[1])
             time_of_day = sys.argv[2]
@@ -116,17 +244,12 @@ if __name__ == "__main__":
         except Exception as e:
             print(json.dumps({"error": "Invalid input parameters", "details": str(e)}))
             sys.exit(1)
-        result = recommend_activity(age, time_of_day, aqi, temperature, precipitation)
-        print(json.dumps({
-            "user_input": {
-                "age": age,
-                "time_of_day": time_of_day,
-                "aqi": aqi,
-                "temperature": temperature,
-                "precipitation": precipitation
-            },
-            "recommended_activity": result
-        }))
+        try:
+            load_model()
+        except Exception as e:
+            print(json.dumps({"error": "Failed to load model", "details": str(e)}))
+            sys.exit(1)
+        print(json.dumps(run(age, time_of_day, aqi, temperature, precipitation)))
     else:
         # If no command-line parameters are provided, print a usage message.
-        print(json.dumps({"message": "Please provide 5 parameters: age, time_of_day, aqi, temperature, precipitation"}))
+        print(json.dumps({"message": "Please provide 5 parameters: age, time_of_day, aqi, temperature, precipitation, or 'train' to build the model artifact"}))
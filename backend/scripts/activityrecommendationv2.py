@@ -1,29 +1,22 @@
 # backend\scripts\activityrecommendationv2.py
 import os
 import sys
+import csv
 import json
-import pandas as pd
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
+import time
+import threading
+
+import instrumentation
+import model_store
+import serialization
+from encoders import FrozenEncoder, load_encoders, save_encoders
+from forest import CompiledForest
 
 # -------------- Setup File Paths --------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_FILE = os.path.join(BASE_DIR, '..', 'data', 'activity_recommendation_dataset.csv')
 
-# -------------- Load Dataset --------------
-try:
-    df = pd.read_csv(DATA_FILE)
-except Exception as e:
-    print(json.dumps({"error": "Failed to load dataset", "details": str(e)}))
-    sys.exit(1)
-
-# -------------- Clean Column Names --------------
-df.columns = df.columns.str.strip()
-
-# -------------- Prepare for Encoding: Compute Default Values --------------
-# Compute the mode for each categorical column (without lowercasing)
+# -------------- Model Definition --------------
 categorical_columns = [
     "Gender", 
     "Health Condition", 
@@ -33,54 +26,184 @@ categorical_columns = [
     "Health Advisory", 
     "Recommended Activity"
 ]
-default_values = {}
-for col in categorical_columns:
-    # Only strip whitespace—do not force lowercase so that options like "None" remain unchanged.
-    df[col] = df[col].astype(str).str.strip()
-    default_values[col] = df[col].mode()[0]
-
-# -------------- Encode Categorical Variables --------------
-label_encoders = {}
-for col in categorical_columns:
-    le = LabelEncoder()
-    df[col] = le.fit_transform(df[col])
-    label_encoders[col] = le
-
-# -------------- Define Features and Target --------------
-FEATURES = [col for col in df.columns if col not in ["Recommended Activity", "User ID"]]
 TARGET = "Recommended Activity"
 
-X = df[FEATURES]
-y = df[TARGET]
+# recommend_activity() argument name -> dataset column name
+INPUT_COLUMNS = {
+    "age": "Age",
+    "gender": "Gender",
+    "health_condition": "Health Condition",
+    "activity_level": "Activity Level",
+    "preference": "Preference",
+    "temperature": "Temperature (°C)",
+    "humidity": "Humidity (%)",
+    "wind_speed": "Wind Speed (km/h)",
+    "air_quality_index": "Air Quality Index",
+    "crime_rate": "Crime Rate",
+    "traffic_congestion_index": "Traffic Congestion Index",
+    "community_event": "Community Event",
+    "health_advisory": "Health Advisory"
+}
 
-# -------------- Data Splitting --------------
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# Number of users encoded and scored per predict() call in batch mode
+BATCH_SIZE = 10000
 
-# -------------- Hyperparameter Tuning & Model Training --------------
 param_grid = {
     'n_estimators': [50, 100, 200],
     'max_depth': [None, 10, 20],
     'min_samples_split': [2, 5, 10]
 }
-grid_search = GridSearchCV(RandomForestClassifier(random_state=42), param_grid, cv=3)
-grid_search.fit(X_train, y_train)
-best_model = grid_search.best_estimator_
 
-y_pred = best_model.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
-print(f"Model Accuracy: {accuracy:.2f}", file=sys.stderr)
+# Trained artifacts live under <ARTIFACTS_DIR>/activityrecommendationv2/<data hash prefix>-v<format>/
+ARTIFACT_NAME = 'activityrecommendationv2'
+ARTIFACT_FORMAT = 1
+ENCODERS_FILE = 'encoders.json'
+
+# Populated by load_model() on first use so that importing this module stays cheap.
+# Flattened forest used for predictions, memory-mapped from the artifact
+compiled_model = None
+# The fitted scikit-learn estimator; only unpickled by load_estimator() (not needed to predict)
+best_model = None
+# column -> FrozenEncoder whose default code is the column mode
+label_encoders = None
+default_values = None
+model_metadata = None
+FEATURES = None
+_model_lock = threading.Lock()
+
+
+def artifact_version(data_hash):
+    return f"{data_hash[:16]}-v{ARTIFACT_FORMAT}"
+
+
+# -------------- Training --------------
+@instrumentation.timed("train")
+def train(data_file=DATA_FILE):
+    """
+    Fit the encoders and tune the forest (see tuning.tune), then save the best
+    estimator, its compiled arrays and the encoders as a versioned artifact.
+
+    Returns the artifact metadata.
+    """
+    # training-only dependencies, kept out of the serving path's startup
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    import data_store
+    import tuning
+
+    data_hash = model_store.file_hash(data_file)
+    started = time.time()
+
+    with instrumentation.stage("load_data"):
+        df = data_store.load(data_file)
+
+    # -------------- Clean Column Names --------------
+    df.columns = df.columns.str.strip()
+
+    # -------------- Prepare for Encoding: Compute Default Values --------------
+    # Compute the mode for each categorical column (without lowercasing)
+    defaults = {}
+    for col in categorical_columns:
+        # Only strip whitespace—do not force lowercase so that options like "None" remain unchanged.
+        df[col] = df[col].astype(str).str.strip()
+        defaults[col] = df[col].mode()[0]
+
+    # -------------- Encode Categorical Variables --------------
+    encoders = {}
+    with instrumentation.stage("encode"):
+        for col in categorical_columns:
+            le = LabelEncoder()
+            df[col] = le.fit_transform(df[col])
+            encoders[col] = FrozenEncoder.from_label_encoder(le, default=defaults[col])
+
+    # -------------- Define Features and Target --------------
+    features = [col for col in df.columns if col not in ["Recommended Activity", "User ID"]]
+
+    X = df[features]
+    y = df[TARGET]
+
+    # -------------- Data Splitting --------------
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # -------------- Hyperparameter Tuning & Model Training --------------
+    model, tuning_report = tuning.tune(RandomForestClassifier(random_state=42), param_grid, X_train, y_train, cv=3)
+
+    with instrumentation.stage("predict"):
+        y_pred = model.predict(X_test)
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"Model Accuracy: {accuracy:.2f}", file=sys.stderr)
+
+    metadata = {
+        "data_file": os.path.basename(data_file),
+        "data_hash": data_hash,
+        "version": artifact_version(data_hash),
+        "best_params": tuning_report["best_params"],
+        "accuracy": accuracy,
+        "features": features,
+        "tuning": tuning_report,
+        "trained_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "training_seconds": round(time.time() - started, 3)
+    }
+    model_store.save_artifact(
+        ARTIFACT_NAME, metadata["version"],
+        {"model": model},
+        metadata,
+        arrays=CompiledForest.from_sklearn(model).to_arrays(),
+        files={ENCODERS_FILE: lambda path: save_encoders(path, encoders)}
+    )
+    return metadata
+
+
+@instrumentation.timed("load_model")
+def load_model(data_file=DATA_FILE):
+    """
+    Load the artifact matching the current dataset (training it first if the
+    dataset changed), once per process.
+    """
+    global best_model, compiled_model, label_encoders, default_values, model_metadata, FEATURES
+    version = artifact_version(model_store.file_hash(data_file))
+    with _model_lock:
+        if model_metadata is not None and model_metadata["version"] == version:
+            return compiled_model
+
+        metadata = model_store.load_metadata(ARTIFACT_NAME, version)
+        if metadata is None:
+            train(data_file)
+            metadata = model_store.load_metadata(ARTIFACT_NAME, version)
+
+        label_encoders = load_encoders(os.path.join(model_store.artifact_path(ARTIFACT_NAME, version), ENCODERS_FILE))
+        default_values = {col: encoder.classes[encoder.default_code] for col, encoder in label_encoders.items()}
+        compiled_model = CompiledForest.from_arrays(
+            model_store.load_arrays(ARTIFACT_NAME, version, CompiledForest.array_keys())
+        )
+        FEATURES = metadata["features"]
+        best_model = None
+        model_metadata = metadata
+        return compiled_model
+
+
+def load_estimator(data_file=DATA_FILE):
+    """
+    The fitted RandomForestClassifier behind compiled_model (unpickling it imports scikit-learn).
+    """
+    global best_model
+    load_model(data_file)
+    with _model_lock:
+        if best_model is None:
+            objects, _ = model_store.load_artifact(ARTIFACT_NAME, model_metadata["version"], ["model"])
+            best_model = objects["model"]
+        return best_model
 
 # -------------- Helper Function for Safe Transformation --------------
-def safe_transform(encoder, value, field_name, default_value):
+def safe_transform(encoder, value):
     """
-    Safely transform a categorical value using the given label encoder.
-    If the value (after stripping whitespace) is not found in encoder.classes_,
-    the provided default_value is used.
+    Safely transform a categorical value using the given frozen encoder.
+    If the value (after stripping whitespace) is not a known class, the
+    encoder's default (the column mode) is used.
     """
-    value_processed = value.strip()  # do not force lowercasing
-    if value_processed not in encoder.classes_:
-        value_processed = default_value
-    return encoder.transform([value_processed])[0]
+    return encoder.encode(value.strip())  # do not force lowercasing
 
 # -------------- Activity Recommendation Function --------------
 def recommend_activity(age, gender, health_condition, activity_level, preference, 
@@ -89,44 +212,174 @@ def recommend_activity(age, gender, health_condition, activity_level, preference
     """
     Recommend an activity based on user input features.
     """
+    load_model()
     try:
-        gender_encoded = safe_transform(label_encoders["Gender"], gender, "Gender", default_values["Gender"])
-        health_condition_encoded = safe_transform(label_encoders["Health Condition"], health_condition, "Health Condition", default_values["Health Condition"])
-        activity_level_encoded = safe_transform(label_encoders["Activity Level"], activity_level, "Activity Level", default_values["Activity Level"])
-        preference_encoded = safe_transform(label_encoders["Preference"], preference, "Preference", default_values["Preference"])
-        community_event_encoded = safe_transform(label_encoders["Community Event"], community_event, "Community Event", default_values["Community Event"])
-        health_advisory_encoded = safe_transform(label_encoders["Health Advisory"], health_advisory, "Health Advisory", default_values["Health Advisory"])
+        with instrumentation.stage("encode"):
+            gender_encoded = safe_transform(label_encoders["Gender"], gender)
+            health_condition_encoded = safe_transform(label_encoders["Health Condition"], health_condition)
+            activity_level_encoded = safe_transform(label_encoders["Activity Level"], activity_level)
+            preference_encoded = safe_transform(label_encoders["Preference"], preference)
+            community_event_encoded = safe_transform(label_encoders["Community Event"], community_event)
+            health_advisory_encoded = safe_transform(label_encoders["Health Advisory"], health_advisory)
     except Exception as e:
         return json.dumps({"error": "Invalid categorical input", "details": str(e)})
     
     # Construct input data ensuring the column order matches training data.
-    input_data = pd.DataFrame({
-        "Age": [float(age)],
-        "Gender": [gender_encoded],
-        "Health Condition": [health_condition_encoded],
-        "Activity Level": [activity_level_encoded],
-        "Preference": [preference_encoded],
-        "Temperature (°C)": [float(temperature)],
-        "Humidity (%)": [float(humidity)],
-        "Wind Speed (km/h)": [float(wind_speed)],
-        "Air Quality Index": [float(air_quality_index)],
-        "Crime Rate": [float(crime_rate)],
-        "Traffic Congestion Index": [float(traffic_congestion_index)],
-        "Community Event": [community_event_encoded],
-        "Health Advisory": [health_advisory_encoded]
-    })
-    input_data = input_data[FEATURES]
+    input_data = {
+        "Age": float(age),
+        "Gender": gender_encoded,
+        "Health Condition": health_condition_encoded,
+        "Activity Level": activity_level_encoded,
+        "Preference": preference_encoded,
+        "Temperature (°C)": float(temperature),
+        "Humidity (%)": float(humidity),
+        "Wind Speed (km/h)": float(wind_speed),
+        "Air Quality Index": float(air_quality_index),
+        "Crime Rate": float(crime_rate),
+        "Traffic Congestion Index": float(traffic_congestion_index),
+        "Community Event": community_event_encoded,
+        "Health Advisory": health_advisory_encoded
+    }
+    input_row = [[input_data[col] for col in FEATURES]]
     
-    predicted_encoded = best_model.predict(input_data)[0]
-    recommended_activity = label_encoders["Recommended Activity"].inverse_transform([predicted_encoded])[0]
+    with instrumentation.stage("predict"):
+        predicted_encoded = compiled_model.predict(input_row)[0]
+        recommended_activity = label_encoders["Recommended Activity"].decode(predicted_encoded)
     return recommended_activity
 
+
+# -------------- Batch Recommendation --------------
+def read_records(path):
+    """
+    Stream user records from a JSON-lines (.jsonl/.ndjson), JSON list (.json) or CSV file.
+    CSV headers may use either the argument names or the dataset column names.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8') as f:
+        if ext in ('.jsonl', '.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif ext == '.json':
+            yield from json.load(f)
+        else:
+            yield from csv.DictReader(f)
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@instrumentation.timed("encode")
+def encode_batch(records):
+    """
+    Build the model input frame for a list of records, encoding every categorical
+    column in one vectorized lookup. Unknown values fall back to the column mode,
+    like safe_transform().
+    """
+    import pandas as pd  # deferred: single recommendations do not need it
+    frame = pd.DataFrame.from_records(records)
+    frame.columns = frame.columns.str.strip()
+    frame = frame.rename(columns={col: name for name, col in INPUT_COLUMNS.items()})
+
+    encoded = {}
+    for name, col in INPUT_COLUMNS.items():
+        values = frame[name]
+        if col in label_encoders:
+            encoded[col] = label_encoders[col].encode_column(values.astype(str).str.strip())
+        else:
+            encoded[col] = pd.to_numeric(values).astype(float)
+    return pd.DataFrame(encoded)[FEATURES]
+
+
+def recommend_activities(records, batch_size=BATCH_SIZE):
+    """
+    Recommend activities for many users at once.
+
+    records: iterable of dicts keyed like recommend_activity()'s arguments
+    (or by dataset column name). Results are yielded in input order as
+    {"user_input": record, "recommended_activity": activity}, one batch at a time.
+    """
+    load_model()
+    activity_encoder = label_encoders["Recommended Activity"]
+    for chunk in _chunks(records, batch_size):
+        X = encode_batch(chunk).to_numpy(dtype=float)
+        with instrumentation.stage("predict"):
+            predicted = compiled_model.predict(X)
+        instrumentation.count("rows_predicted", len(chunk))
+        for record, activity in zip(chunk, activity_encoder.decode_column(predicted)):
+            yield {"user_input": record, "recommended_activity": str(activity)}
+
+
+def run_batch(records):
+    """
+    Batch counterpart of run() for the inference server.
+    """
+    return {"results": list(recommend_activities(records))}
+
+
+def run(age, gender, health_condition, activity_level, preference,
+        temperature, humidity, wind_speed, air_quality_index,
+        crime_rate, traffic_congestion_index, community_event, health_advisory):
+    """
+    Build the JSON response for one recommendation request (shared by the CLI
+    and the inference server).
+    """
+    user_input = {
+        "age": float(age),
+        "gender": gender,
+        "health_condition": health_condition,
+        "activity_level": activity_level,
+        "preference": preference,
+        "temperature": float(temperature),
+        "humidity": float(humidity),
+        "wind_speed": float(wind_speed),
+        "air_quality_index": float(air_quality_index),
+        "crime_rate": float(crime_rate),
+        "traffic_congestion_index": float(traffic_congestion_index),
+        "community_event": community_event,
+        "health_advisory": health_advisory
+    }
+    result = recommend_activity(**user_input)
+    return {
+        "user_input": user_input,
+        "recommended_activity": result
+    }
+
 # -------------- Main Execution Block --------------
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+    instrumentation.collect_process(os.path.basename(__file__))
     # Expect 13 parameters: age, gender, health_condition, activity_level, preference,
     # temperature, humidity, wind_speed, air_quality_index, crime_rate,
     # traffic_congestion_index, community_event, health_advisory.
-    if len(sys.argv) == 14:
+    # --batch FILE scores a whole cohort and streams one JSON line per user.
+    # "train" tunes the model once and writes the versioned artifact.
+    if len(sys.argv) == 2 and sys.argv[1] == "train":
+        try:
+            metadata = train()
+        except Exception as e:
+            print(json.dumps({"error": "Failed to train model", "details": str(e)}))
+            sys.exit(1)
+        print(json.dumps(metadata))
+    elif len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        try:
+            load_model()
+            for result in recommend_activities(read_records(sys.argv[2])):
+                sys.stdout.write(serialization.dumps(result) + "\n")
+        except Exception as e:
+            print(json.dumps({"error": "Failed to process batch", "details": str(e)}))
+            sys.exit(1)
+    elif len(sys.argv) == 14:
         try:
             age = float(sys.argv[1])
             gender = sys.argv[2]
@@ -144,30 +397,17 @@ if __name__ == "__main__":
         except Exception as e:
             print(json.dumps({"error": "Invalid input parameters", "details": str(e)}))
             sys.exit(1)
-        result = recommend_activity(
+        try:
+            load_model()
+        except Exception as e:
+            print(json.dumps({"error": "Failed to load dataset", "details": str(e)}))
+            sys.exit(1)
+        print(json.dumps(run(
             age, gender, health_condition, activity_level, preference,
             temperature, humidity, wind_speed, air_quality_index,
             crime_rate, traffic_congestion_index, community_event, health_advisory
-        )
-        print(json.dumps({
-            "user_input": {
-                "age": age,
-                "gender": gender,
-                "health_condition": health_condition,
-                "activity_level": activity_level,
-                "preference": preference,
-                "temperature": temperature,
-                "humidity": humidity,
-                "wind_speed": wind_speed,
-                "air_quality_index": air_quality_index,
-                "crime_rate": crime_rate,
-                "traffic_congestion_index": traffic_congestion_index,
-                "community_event": community_event,
-                "health_advisory": health_advisory
-            },
-            "recommended_activity": result
-        }))
+        )))
     else:
         print(json.dumps({
-            "message": "Please provide 13 parameters: age, gender, health_condition, activity_level, preference, temperature, humidity, wind_speed, air_quality_index, crime_rate, traffic_congestion_index, community_event, health_advisory"
+            "message": "Please provide 13 parameters: age, gender, health_condition, activity_level, preference, temperature, humidity, wind_speed, air_quality_index, crime_rate, traffic_congestion_index, community_event, health_advisory, --batch FILE (.jsonl, .json or .csv), or 'train' to build the model artifact"
         }))
@@ -4,50 +4,76 @@ import sys
 import json
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter
 import logging
+import threading
+import time
+import hashlib
+import importlib
+import multiprocessing
+from multiprocessing.connection import wait
 
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.neighbors import KNeighborsRegressor
-from xgboost import XGBRegressor
-from sklearn.svm import SVR
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+import aqi
+import data_store
+import instrumentation
+import model_store
+import plot_renderer
+import serialization
 
 # Configure logging for deployment
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 # Use environment variables for flexibility during deployment
 DATA_FILE = os.environ.get("DATA_FILE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'AllYearsAirQualityCalculations.csv')
-# PLOTS_DIR will hold our generated plots; this directory must be served statically by our Node server.
-PLOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'plots')
-os.makedirs(PLOTS_DIR, exist_ok=True)
 
-# Helper function to return URL-friendly relative paths for plots.
-def get_relative_plot_path(filename):
-    return f"/plots/{filename}"
+# -------------- Model Tournament Settings --------------
+# Candidate name -> (estimator class path, constructor params). Params are part of the result cache key.
+# Classes are imported on first use (see estimator_class), so importing this module stays cheap.
+MODEL_CONFIGS = {
+    "Random Forest": ("sklearn.ensemble.RandomForestRegressor", {"n_estimators": 100, "random_state": 42}),
+    "XGBoost": ("xgboost.XGBRegressor", {"n_estimators": 100, "random_state": 42}),
+    "KNN Regressor": ("sklearn.neighbors.KNeighborsRegressor", {"n_neighbors": 5}),
+    "SVR": ("sklearn.svm.SVR", {"kernel": 'rbf'}),
+    "Linear Regression": ("sklearn.linear_model.LinearRegression", {})
+}
+# Number of candidates fitted at once (defaults to the CPU count)
+TOURNAMENT_WORKERS = int(os.environ.get("TOURNAMENT_WORKERS", "0")) or os.cpu_count() or 1
+# Wall-clock budget per candidate in seconds; a candidate that runs longer is stopped and reported as such
+MODEL_BUDGET_SECONDS = float(os.environ.get("MODEL_BUDGET_SECONDS", "300"))
+# Fitted candidates are cached under <ARTIFACTS_DIR>/regression_tournament/<key>/
+TOURNAMENT_CACHE = 'regression_tournament'
+
+# -------------- Chunked Ingestion Settings --------------
+# "auto" streams files of at least CHUNKED_MIN_BYTES through chunked_regression; "memory" / "chunked" force a mode
+INGEST_MODE = os.environ.get("AIRQUALITY_INGEST", "auto")
+CHUNKED_MIN_BYTES = int(float(os.environ.get("AIRQUALITY_CHUNKED_MIN_MB", "256")) * 1024 * 1024)
+# Streamed tournaments are cached under <ARTIFACTS_DIR>/regression_stream/<key>/
+STREAM_CACHE = 'regression_stream'
+# Bumped whenever the cached tournament's contents change (2: categories from the report's own cut-points)
+STREAM_FORMAT = 2
 
 def get_aqi_category(pm25_value):
-    if pm25_value <= 50:
-        return "Good"
-    elif pm25_value <= 100:
-        return "Moderate"
-    elif pm25_value <= 150:
-        return "Unhealthy for Sensitive Groups"
-    elif pm25_value <= 200:
-        return "Unhealthy"
-    elif pm25_value <= 300:
-        return "Very Unhealthy"
-    else:
-        return "Hazardous"
+    return str(get_aqi_categories([pm25_value])[0])
+
+def get_aqi_categories(pm25_values):
+    """
+    AQI category for each predicted PM2.5 value, read against the category
+    bounds (50, 100, 150, ...) directly as this report always has: the values
+    are not converted through the EPA PM2.5 breakpoints first.
+    """
+    return aqi.categorize(pm25_values)
 
+def category_distribution(categories):
+    """
+    Count categories in order of first appearance (like collections.Counter).
+    """
+    names, first_seen, counts = np.unique(categories, return_index=True, return_counts=True)
+    order = np.argsort(first_seen)
+    return {str(names[i]): int(counts[i]) for i in order}
+
+@instrumentation.timed("load_data")
 def load_data(file_path):
     try:
-        df = pd.read_csv(file_path)
+        df = data_store.load(file_path)
         logging.info("Data loaded successfully.")
         return df
     except Exception as e:
@@ -55,114 +81,286 @@ def load_data(file_path):
         print(error_msg)
         sys.exit(1)
 
+@instrumentation.timed("create_features")
 def preprocess_data(df):
     df = df.dropna()
     y = df['pm25_concentration']
     X = df.drop(columns=['pm25_concentration', 'geoid', 'geoid20'])
     return X, y, df
 
+@instrumentation.timed("scale")
 def split_and_scale_data(X, y):
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
     return X_train_scaled, X_test_scaled, y_train, y_test
 
-def train_and_evaluate_models(X_train, X_test, y_train, y_test):
-    models = {
-        "Random Forest": RandomForestRegressor(n_estimators=100, random_state=42),
-        "XGBoost": XGBRegressor(n_estimators=100, random_state=42),
-        "KNN Regressor": KNeighborsRegressor(n_neighbors=5),
-        "SVR": SVR(kernel='rbf'),
-        "Linear Regression": LinearRegression()
-    }
-    
-    results = {}
-    trained_models = {}
-    for name, model in models.items():
+def data_fingerprint(*arrays):
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype, array.shape)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def estimator_class(name):
+    path, _ = MODEL_CONFIGS[name]
+    module, _, attr = path.rpartition('.')
+    return getattr(importlib.import_module(module), attr)
+
+def candidate_key(data_hash, name):
+    estimator, params = estimator_class(name), MODEL_CONFIGS[name][1]
+    config = json.dumps([data_hash, name, estimator.__module__, estimator.__name__, params], sort_keys=True)
+    return hashlib.sha256(config.encode()).hexdigest()[:24]
+
+def build_model(name, n_jobs=1):
+    model = estimator_class(name)(**MODEL_CONFIGS[name][1])
+    # Share the machine with the other candidates running in parallel
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    return model
+
+def _fit_candidate(conn, name, n_jobs, X_train, X_test, y_train, y_test):
+    """
+    Runs in a worker process: fit and score one candidate, send back (result, model).
+    """
+    try:
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        model = build_model(name, n_jobs)
+        started = time.perf_counter()
         model.fit(X_train, y_train)
+        fitted = time.perf_counter()
         y_pred = model.predict(X_test)
-        mae = mean_absolute_error(y_test, y_pred)
-        mse = mean_squared_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
-        results[name] = {"MAE": mae, "MSE": mse, "R2": r2}
-        trained_models[name] = model
-        logging.info(f"{name} trained with R2: {r2:.3f}")
-    return results, trained_models
+        predicted = time.perf_counter()
+        result = {
+            "MAE": mean_absolute_error(y_test, y_pred),
+            "MSE": mean_squared_error(y_test, y_pred),
+            "R2": r2_score(y_test, y_pred),
+            "fit_seconds": round(fitted - started, 4),
+            "predict_seconds": round(predicted - fitted, 4)
+        }
+        conn.send((result, model))
+    except Exception as e:
+        conn.send(({"error": f"{type(e).__name__}: {e}"}, None))
+    finally:
+        conn.close()
 
+@instrumentation.timed("tournament")
+def train_and_evaluate_models(X_train, X_test, y_train, y_test, workers=None, budget=None, use_cache=True):
+    """
+    Fit every candidate in MODEL_CONFIGS in parallel worker processes.
+
+    workers: candidates running at once; each gets cpu_count // workers threads (n_jobs).
+    budget: wall-clock seconds per candidate, or {name: seconds}; over-budget
+        candidates are terminated and reported in `failures`.
+    use_cache: reuse results/models already computed for the same data and config.
+
+    Returns (results, trained_models, failures): results holds only the scored
+    candidates (with fit/predict timings), failures maps the others to their error.
+    """
+    workers = workers or TOURNAMENT_WORKERS
+    budget = MODEL_BUDGET_SECONDS if budget is None else budget
+    data_hash = data_fingerprint(X_train, X_test, y_train, y_test)
+
+    results = {}
+    trained_models = {}
+    failures = {}
+    pending = []
+    for name in MODEL_CONFIGS:
+        key = candidate_key(data_hash, name)
+        cached = model_store.load_artifact(TOURNAMENT_CACHE, key, ["model"]) if use_cache else None
+        if cached is not None:
+            trained_models[name] = cached[0]["model"]
+            results[name] = dict(cached[1]["result"], cached=True)
+            instrumentation.count("candidate_cache_hit")
+            logging.info(f"{name} loaded from cache with R2: {results[name]['R2']:.3f}")
+        else:
+            pending.append(name)
+
+    pool_size = max(1, min(workers, len(pending) or 1))
+    n_jobs = max(1, (os.cpu_count() or 1) // pool_size)
+    # spawned, not forked, for the same reason as plot_renderer._get_executor
+    context = multiprocessing.get_context("spawn")
+    running = {}  # connection -> (name, process, deadline)
+    queue = list(pending)
+
+    while queue or running:
+        while queue and len(running) < pool_size:
+            name = queue.pop(0)
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_fit_candidate,
+                args=(child_conn, name, n_jobs, X_train, X_test, y_train, y_test),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            limit = budget.get(name, MODEL_BUDGET_SECONDS) if isinstance(budget, dict) else budget
+            running[parent_conn] = (name, process, time.monotonic() + limit, limit)
+
+        timeout = max(0.0, min(deadline for _, _, deadline, _ in running.values()) - time.monotonic())
+        for conn in wait(list(running), timeout=timeout):
+            name, process, _, _ = running.pop(conn)
+            try:
+                result, model = conn.recv()
+            except EOFError:
+                result, model = {"error": f"worker exited with code {process.exitcode}"}, None
+            conn.close()
+            process.join()
+            if model is None:
+                failures[name] = result["error"]
+                logging.warning(f"{name} failed: {result['error']}")
+                continue
+            results[name] = result
+            trained_models[name] = model
+            # fitted in the worker process; its own timings are added here
+            instrumentation.count("candidate_cache_miss")
+            instrumentation.add("fit", result["fit_seconds"])
+            instrumentation.add("predict", result["predict_seconds"])
+            model_store.save_artifact(
+                TOURNAMENT_CACHE, candidate_key(data_hash, name), {"model": model},
+                {"name": name, "params": MODEL_CONFIGS[name][1], "data_hash": data_hash, "result": result}
+            )
+            logging.info(f"{name} trained with R2: {result['R2']:.3f} in {result['fit_seconds']:.2f}s")
+
+        now = time.monotonic()
+        for conn, (name, process, deadline, limit) in list(running.items()):
+            if now >= deadline:
+                process.terminate()
+                process.join()
+                conn.close()
+                del running[conn]
+                failures[name] = f"exceeded budget of {limit:g}s"
+                logging.warning(f"{name} stopped after exceeding its {limit:g}s budget")
+
+    # Keep the candidates in their configured order
+    results = {name: results[name] for name in MODEL_CONFIGS if name in results}
+    failures = {name: failures[name] for name in MODEL_CONFIGS if name in failures}
+    return results, trained_models, failures
+
+# -------------- Plots --------------
+# Each returns the plot's URL right away; plot_renderer draws it in a worker process
+# (or reuses the file already rendered for identical data).
 def plot_model_performance(results):
-    results_df = pd.DataFrame(results).T
-    plt.figure(figsize=(12, 6))
-    results_df[['MAE', 'MSE', 'R2']].plot(kind='bar', colormap='viridis')
-    plt.title("Model Performance Comparison")
-    plt.ylabel("Score")
-    plt.xticks(rotation=45)
-    filename = 'model_performance.png'
-    full_path = os.path.join(PLOTS_DIR, filename)
-    plt.tight_layout()
-    plt.savefig(full_path)
-    plt.close()
-    return get_relative_plot_path(filename)
+    metrics = {name: {k: r[k] for k in ('MAE', 'MSE', 'R2')} for name, r in results.items()}
+    return plot_renderer.submit('model_performance', {"results": metrics})
 
 def plot_actual_vs_predicted(y_test, y_pred):
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(x=y_test, y=y_pred)
-    plt.xlabel("Actual PM2.5 Concentration")
-    plt.ylabel("Predicted PM2.5 Concentration")
-    plt.title("Actual vs Predicted PM2.5 Concentration")
-    filename = 'actual_vs_predicted.png'
-    full_path = os.path.join(PLOTS_DIR, filename)
-    plt.tight_layout()
-    plt.savefig(full_path)
-    plt.close()
-    return get_relative_plot_path(filename)
+    return plot_renderer.submit('actual_vs_predicted', {
+        "actual": np.asarray(y_test), "predicted": np.asarray(y_pred)
+    })
 
 def plot_feature_importance(model, feature_names, model_name):
     if not hasattr(model, "feature_importances_"):
         return None
-
-    importance = model.feature_importances_
-    importance_df = pd.DataFrame({'Feature': feature_names, 'Importance': importance})
-    importance_df = importance_df.sort_values(by='Importance', ascending=False)
-
-    plt.figure(figsize=(12, 6))
-    # Note: A FutureWarning may occur here; it's safe to ignore or adjust if needed.
-    sns.barplot(x=importance_df['Importance'], y=importance_df['Feature'], palette='viridis')
-    plt.title(f"Feature Importance ({model_name})")
-    plt.xlabel("Importance")
-    plt.ylabel("Feature")
-    filename = 'feature_importance.png'
-    full_path = os.path.join(PLOTS_DIR, filename)
-    plt.tight_layout()
-    plt.savefig(full_path)
-    plt.close()
-    return get_relative_plot_path(filename)
+    return plot_renderer.submit('feature_importance', {
+        "features": [str(f) for f in feature_names],
+        "importance": np.asarray(model.feature_importances_),
+        "model_name": model_name
+    })
 
 def plot_pm25_distribution(df):
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['pm25_concentration'], bins=30, kde=True, color='blue')
-    plt.title("Distribution of PM2.5 Concentration")
-    plt.xlabel("PM2.5 Concentration")
-    plt.ylabel("Frequency")
-    filename = 'pm25_distribution.png'
-    full_path = os.path.join(PLOTS_DIR, filename)
-    plt.tight_layout()
-    plt.savefig(full_path)
-    plt.close()
-    return get_relative_plot_path(filename)
+    return plot_renderer.submit('pm25_distribution', {"values": df['pm25_concentration'].to_numpy()})
 
-def main():
+# Concurrent reports (e.g. in the inference server) share the tournament cache, so they are serialized.
+_report_lock = threading.Lock()
+
+def run():
+    """
+    Train the model tournament and return the report as a dict as soon as the
+    metrics exist. Plot URLs listed in "plots_pending" resolve once rendered.
+    """
+    with _report_lock:
+        report = build_report()
+    report["plots_pending"] = plot_renderer.pending(report["plots"].values())
+    return report
+
+def use_chunked(path):
+    if INGEST_MODE in ("memory", "chunked"):
+        return INGEST_MODE == "chunked"
+    return os.path.getsize(path) >= CHUNKED_MIN_BYTES
+
+def stream_key(path):
+    import chunked_regression
+    config = json.dumps([
+        STREAM_FORMAT, model_store.file_hash(path), chunked_regression.MODEL_CONFIGS, chunked_regression.CHUNK_ROWS,
+        chunked_regression.SAMPLE_ROWS, chunked_regression.SGD_EPOCHS, chunked_regression.TEST_SIZE
+    ], sort_keys=True)
+    return hashlib.sha256(config.encode()).hexdigest()[:24]
+
+def load_stream_tournament(path):
+    """
+    Streamed tournament for a large file (see chunked_regression), cached per file content and settings.
+    """
+    import chunked_regression
+    key = stream_key(path)
+    cached = model_store.load_artifact(STREAM_CACHE, key, ["tournament"])
+    if cached is not None:
+        tournament = cached[0]["tournament"]
+        tournament["results"] = {name: dict(r, cached=True) for name, r in tournament["results"].items()}
+        return tournament
+    try:
+        tournament = chunked_regression.run_tournament(path)
+    except Exception as e:
+        print(json.dumps({"error": "Failed to stream dataset", "details": str(e)}))
+        sys.exit(1)
+    model_store.save_artifact(STREAM_CACHE, key, {"tournament": tournament},
+                              {"data_file": os.path.basename(path), "results": tournament["results"]})
+    return tournament
+
+def build_chunked_report():
+    import chunked_regression
+    tournament = load_stream_tournament(DATA_FILE)
+    results = tournament["results"]
+    best_model_name = tournament["best_model"]
+    best_model = tournament["models"][best_model_name]
+
+    performance_plot = plot_model_performance(results)
+    # plots are drawn from bounded row samples
+    scatter_plot = plot_actual_vs_predicted(*tournament["test_sample"])
+    feat_imp_plot = None
+    if best_model_name == "XGBoost":
+        feat_imp_plot = plot_feature_importance(best_model, tournament["features"], best_model_name)
+    distribution_plot = plot_pm25_distribution(pd.DataFrame({'pm25_concentration': tournament["target_sample"]}))
+
+    return {
+        "model_performance": results,
+        "failed_models": {},
+        "best_model": best_model_name,
+        "aqi_category_distribution": tournament["aqi_category_distribution"],
+        "plots": {
+            "model_performance": performance_plot,
+            "actual_vs_predicted": scatter_plot,
+            "feature_importance": feat_imp_plot,
+            "pm25_distribution": distribution_plot
+        },
+        "ingestion": {
+            "mode": "chunked",
+            "chunk_rows": chunked_regression.CHUNK_ROWS,
+            "rows": tournament["rows"]
+        }
+    }
+
+def build_report():
+    if use_chunked(DATA_FILE):
+        return build_chunked_report()
     df = load_data(DATA_FILE)
     X, y, full_df = preprocess_data(df)
     X_train, X_test, y_train, y_test = split_and_scale_data(X, y)
-    results, trained_models = train_and_evaluate_models(X_train, X_test, y_train, y_test)
+    results, trained_models, failures = train_and_evaluate_models(X_train, X_test, y_train, y_test)
     
-    best_model_name = max(results, key=lambda k: results[k]['R2'])
+    if not trained_models:
+        details = "; ".join(f"{name}: {error}" for name, error in failures.items())
+        raise RuntimeError(f"No candidate model finished training ({details})")
+    best_model_name = max(trained_models, key=lambda k: results[k]['R2'])
     best_model = trained_models[best_model_name]
-    y_pred_best = best_model.predict(X_test)
+    with instrumentation.stage("predict"):
+        y_pred_best = best_model.predict(X_test)
     
-    aqi_categories = [get_aqi_category(val) for val in y_pred_best]
-    category_distribution = dict(Counter(aqi_categories))
+    aqi_categories = get_aqi_categories(y_pred_best)
     
     performance_plot = plot_model_performance(results)
     scatter_plot = plot_actual_vs_predicted(y_test, y_pred_best)
@@ -173,8 +371,10 @@ def main():
     
     output = {
         "model_performance": results,
+        # candidates that crashed or ran over budget: name -> error
+        "failed_models": failures,
         "best_model": best_model_name,
-        "aqi_category_distribution": category_distribution,
+        "aqi_category_distribution": category_distribution(aqi_categories),
         "plots": {
             "model_performance": performance_plot,
             "actual_vs_predicted": scatter_plot,
@@ -182,7 +382,33 @@ def main():
             "pm25_distribution": distribution_plot
         }
     }
-    print(json.dumps(output))
+    return output
+
+def main():
+    try:
+        report = run()
+    except RuntimeError as e:
+        print(json.dumps({"error": "Failed to train regression models", "details": str(e)}))
+        sys.exit(1)
+    with instrumentation.stage("serialize"):
+        text = serialization.dumps(report)
+    print(text, flush=True)
+    # the JSON is out; finish the plots before the process exits
+    plot_renderer.wait()
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+    instrumentation.collect_process(os.path.basename(__file__))
+    # query ... -> tract/year lookups over the same CSV (see tract_index.py), no training
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        import tract_index
+        try:
+            output = tract_index.main(sys.argv[2:])
+        except Exception as e:
+            print(json.dumps({"error": "Tract query failed", "details": str(e)}))
+            sys.exit(1)
+        print(json.dumps(output))
+        sys.exit(0)
     main()
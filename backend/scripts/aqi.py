@@ -0,0 +1,150 @@
+# backend/scripts/aqi.py
+"""
+U.S. EPA Air Quality Index calculations, vectorized over NumPy arrays.
+
+Usage (bulk CLI):
+    python aqi.py FILE.csv   ->  one JSON line per row with sub-indices, AQI and category
+
+Columns named pm25, pm10, o3, no2, so2 and co are treated as concentrations in
+the units of the tables below.
+"""
+import os
+import sys
+import json
+
+import numpy as np
+
+# Breakpoint tables: (C_low, C_high, I_low, I_high) per row, concentrations in
+#   pm25: µg/m³ (24-hour)   pm10: µg/m³ (24-hour)   o3: ppm (8-hour; 1-hour rows above 0.200)
+#   no2: ppb (1-hour)       so2: ppb (1-hour)       co: ppm (8-hour)
+BREAKPOINTS = {
+    "pm25": np.array([
+        (0.0, 12.0, 0, 50), (12.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
+        (55.5, 150.4, 151, 200), (150.5, 250.4, 201, 300), (250.5, 350.4, 301, 400),
+        (350.5, 500.4, 401, 500)
+    ]),
+    "pm10": np.array([
+        (0, 54, 0, 50), (55, 154, 51, 100), (155, 254, 101, 150), (255, 354, 151, 200),
+        (355, 424, 201, 300), (425, 504, 301, 400), (505, 604, 401, 500)
+    ]),
+    "o3": np.array([
+        (0.000, 0.054, 0, 50), (0.055, 0.070, 51, 100), (0.071, 0.085, 101, 150),
+        (0.086, 0.105, 151, 200), (0.106, 0.200, 201, 300), (0.405, 0.504, 301, 400),
+        (0.505, 0.604, 401, 500)
+    ]),
+    "no2": np.array([
+        (0, 53, 0, 50), (54, 100, 51, 100), (101, 360, 101, 150), (361, 649, 151, 200),
+        (650, 1249, 201, 300), (1250, 1649, 301, 400), (1650, 2049, 401, 500)
+    ]),
+    "so2": np.array([
+        (0, 35, 0, 50), (36, 75, 51, 100), (76, 185, 101, 150), (186, 304, 151, 200),
+        (305, 604, 201, 300), (605, 804, 301, 400), (805, 1004, 401, 500)
+    ]),
+    "co": np.array([
+        (0.0, 4.4, 0, 50), (4.5, 9.4, 51, 100), (9.5, 12.4, 101, 150), (12.5, 15.4, 151, 200),
+        (15.5, 30.4, 201, 300), (30.5, 40.4, 301, 400), (40.5, 50.4, 401, 500)
+    ]),
+}
+
+# Concentrations are truncated to this many decimals before the table lookup
+TRUNCATE_DECIMALS = {"pm25": 1, "pm10": 0, "o3": 3, "no2": 0, "so2": 0, "co": 1}
+
+POLLUTANTS = list(BREAKPOINTS)
+
+# Upper bound (inclusive) of each category; values above the last bound are "Hazardous"
+CATEGORY_BOUNDS = np.array([50, 100, 150, 200, 300])
+CATEGORIES = np.array([
+    "Good",
+    "Moderate",
+    "Unhealthy for Sensitive Groups",
+    "Unhealthy",
+    "Very Unhealthy",
+    "Hazardous"
+])
+
+
+def sub_index(pollutant, concentrations):
+    """
+    AQI sub-index for a pollutant, for a scalar or an array of concentrations.
+
+    One searchsorted over the table's upper bounds picks each value's row, then
+    the EPA linear interpolation is applied to the whole array. Values above
+    the table are reported as 500, negative values as 0, and NaN stays NaN.
+    Returns a float array (or a float for scalar input), rounded to integers.
+    """
+    table = BREAKPOINTS[pollutant]
+    values = np.asarray(concentrations, dtype=np.float64)
+    scale = 10.0 ** TRUNCATE_DECIMALS[pollutant]
+    # the epsilon keeps values like 0.07 (0.06999... in binary) from truncating down a step
+    truncated = np.floor(np.clip(values, 0.0, None) * scale + 1e-9) / scale
+
+    rows = np.minimum(np.searchsorted(table[:, 1], truncated, side='left'), len(table) - 1)
+    c_low, c_high, i_low, i_high = table[rows].T
+    clipped = np.clip(truncated, c_low, c_high)
+    result = np.round((i_high - i_low) / (c_high - c_low) * (clipped - c_low) + i_low)
+    result = np.where(np.isnan(values), np.nan, result)
+    return float(result) if result.ndim == 0 else result
+
+
+def categorize(aqi_values):
+    """
+    Category name for each AQI value (None where the AQI is NaN).
+    """
+    values = np.asarray(aqi_values, dtype=np.float64)
+    names = CATEGORIES[np.searchsorted(CATEGORY_BOUNDS, np.nan_to_num(values, nan=0.0), side='left')]
+    if values.ndim == 0:
+        return None if np.isnan(values) else str(names)
+    return np.where(np.isnan(values), None, names.astype(object))
+
+
+def calculate(concentrations):
+    """
+    Sub-indices, overall AQI, dominant pollutant and category for a dict of
+    pollutant -> concentration arrays (any subset of POLLUTANTS).
+
+    The overall AQI is the highest sub-index, ignoring pollutants that are NaN.
+    """
+    pollutants = [p for p in POLLUTANTS if p in concentrations]
+    indices = {p: np.atleast_1d(sub_index(p, concentrations[p])) for p in pollutants}
+    stacked = np.vstack([indices[p] for p in pollutants])
+    filled = np.where(np.isnan(stacked), -np.inf, stacked)
+    dominant_row = np.argmax(filled, axis=0)
+    overall = filled[dominant_row, np.arange(stacked.shape[1])]
+    missing = np.isneginf(overall)
+    overall = np.where(missing, np.nan, overall)
+    dominant = np.where(missing, None, np.array(pollutants, dtype=object)[dominant_row])
+    return {
+        "sub_indices": indices,
+        "aqi": overall,
+        "dominant_pollutant": dominant,
+        "category": categorize(overall)
+    }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    import serialization
+
+    if len(sys.argv) != 2:
+        print(json.dumps({"message": "Please provide a CSV file with pollutant columns (pm25, pm10, o3, no2, so2, co)"}))
+        sys.exit(1)
+    try:
+        df = pd.read_csv(sys.argv[1], skipinitialspace=True)
+    except Exception as e:
+        print(json.dumps({"error": "Failed to load CSV file", "details": str(e)}))
+        sys.exit(1)
+    df.columns = df.columns.str.strip()
+    present = {p: pd.to_numeric(df[p], errors='coerce').to_numpy() for p in POLLUTANTS if p in df.columns}
+    if not present:
+        print(json.dumps({"error": "No pollutant columns found", "details": os.path.basename(sys.argv[1])}))
+        sys.exit(1)
+    result = calculate(present)
+    columns = {}
+    if "date" in df.columns:
+        columns["date"] = df["date"].astype(str).to_numpy()
+    for p, values in result["sub_indices"].items():
+        columns[f"aqi_{p}"] = values
+    columns["aqi"] = result["aqi"]
+    columns["dominant_pollutant"] = result["dominant_pollutant"]
+    columns["category"] = result["category"]
+    serialization.write_jsonl(columns, sys.stdout)
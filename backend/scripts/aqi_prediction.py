@@ -3,8 +3,14 @@ import os
 import pandas as pd
 import sys
 import json
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.ensemble import RandomForestRegressor
+import math
+import time
+import threading
+
+import aqi
+import instrumentation
+import model_store
+import prediction_cache
 
 # Determine the directory of this script and the data folder relative to it
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,45 +20,11 @@ data_dir = os.path.join(base_dir, '..', 'data')
 weather_csv = os.path.join(data_dir, 'BobHopeAirportStationWeatherData.csv')
 air_csv = os.path.join(data_dir, 'los-angeles-north-main-street-air-quality.csv')
 
-# Read input parameters passed from Node.js
-try:
-    temperature = float(sys.argv[1])
-    humidity = float(sys.argv[2])
-    wind_speed = float(sys.argv[3])
-    precipitation = float(sys.argv[4])
-except Exception as e:
-    print(json.dumps({"error": "Invalid input parameters", "details": str(e)}))
-    sys.exit(1)
-
-# Load datasets with error handling
-try:
-    weather_data = pd.read_csv(weather_csv, parse_dates=['date'])
-    air_data = pd.read_csv(air_csv, parse_dates=['date'])
-except Exception as e:
-    print(json.dumps({"error": "Failed to load CSV files", "details": str(e)}))
-    sys.exit(1)
-
-# Merge datasets on 'date'
-merged_df = pd.merge(weather_data, air_data, on='date', how='inner')
-
-# Drop unwanted columns
-merged_df.drop(columns=[
-    'date',
-    'Temperature (°F) MAX', 'Temperature (°F) MIN',
-    'Dew Point (°F) MAX', 'Dew Point (°F) MIN',
-    'Humidity (%) MAX', 'Humidity (%) MIN',
-    'Wind Speed (mph) MAX', 'Wind Speed (mph) MIN',
-    'Pressure (in) MAX', 'Pressure (in) MIN'
-], inplace=True)
-
-# Process data for small aerosols (predicting PM2.5)
-small_aerosols = merged_df.drop(columns=['pm10', 'o3', 'no2', 'so2', 'co'])
-small_aerosols['pm25'] = small_aerosols['pm25'].fillna(small_aerosols['pm25'].mean())
-features = small_aerosols.drop(['pm25'], axis=1)
-label = small_aerosols['pm25']
-
-# Split data for training
-X_train, X_test, y_train, y_test = train_test_split(features, label, test_size=0.25, random_state=424)
+# Weather columns used as features, in training order
+WEATHER_FEATURES = [
+    'Temperature (°F) AVG', 'Dew Point (°F) AVG', 'Humidity (%) AVG',
+    'Wind Speed (mph) AVG', 'Pressure (in) AVG', 'Precipitation'
+]
 
 # Define a parameter grid for RandomForestRegressor
 parameters = {
@@ -62,54 +34,332 @@ parameters = {
     'min_samples_leaf': [1, 2]
 }
 
-grid_search = GridSearchCV(estimator=RandomForestRegressor(), param_grid=parameters, cv=5)
-grid_search.fit(X_train, y_train)
-
-# Build a DataFrame for prediction with placeholder values for some features
-data_for_prediction = pd.DataFrame({
-    "Temperature (°F) AVG": [temperature],
-    "Dew Point (°F) AVG": [0],           # Placeholder
-    "Humidity (%) AVG": [humidity],
-    "Wind Speed (mph) AVG": [wind_speed],
-    "Pressure (in) AVG": [0],           # Placeholder
-    "Precipitation": [precipitation]
-})
-
-prediction_pm25 = grid_search.predict(data_for_prediction)[0]
-
-# Function to calculate AQI using U.S. EPA breakpoints for PM2.5
-def calculate_aqi(concentration, breakpoints):
-    for i in range(len(breakpoints) - 1):
-        C_low, C_high = breakpoints[i][0], breakpoints[i + 1][0]
-        I_low, I_high = breakpoints[i][1], breakpoints[i + 1][1]
-        if C_low <= concentration <= C_high:
-            return round(((I_high - I_low) / (C_high - C_low)) * (concentration - C_low) + I_low)
-    return None
-
-AQI_BREAKPOINTS_PM25 = [
-    (0.0, 0), (12.0, 50), (35.4, 100), (55.4, 150),
-    (150.4, 200), (250.4, 300), (350.4, 400), (500.4, 500)
-]
-aqi_pm25 = calculate_aqi(prediction_pm25, AQI_BREAKPOINTS_PM25)
-
-# Determine the AQI category based on the calculated value
-if aqi_pm25 <= 50:
-    category = "Good"
-elif aqi_pm25 <= 100:
-    category = "Moderate"
-elif aqi_pm25 <= 150:
-    category = "Unhealthy for Sensitive Groups"
-elif aqi_pm25 <= 200:
-    category = "Unhealthy"
-elif aqi_pm25 <= 300:
-    category = "Very Unhealthy"
-else:
-    category = "Hazardous"
-
-# Output the results as JSON for Node.js to read
-output = {
-    "predicted_pm25": prediction_pm25,
-    "aqi_pm25": aqi_pm25,
-    "category": category
-}
-print(json.dumps(output))
+# Trained artifacts live under <ARTIFACTS_DIR>/aqi_prediction/<data hash prefix>-v<format>/
+ARTIFACT_NAME = 'aqi_prediction'
+# Bumped when the artifact changes (2: tuned with a full grid instead of successive halving)
+ARTIFACT_FORMAT = 2
+# One multi-output forest predicting every pollutant column of the air quality CSV at once
+POLLUTANTS = ['pm25', 'pm10', 'o3', 'no2', 'so2', 'co']
+MULTI_ARTIFACT_NAME = 'aqi_prediction_multi'
+# Factors from the CSV's units to aqi.py's breakpoint units (O3 is reported in ppb, the table is in ppm)
+AQI_UNIT_FACTORS = {'o3': 0.001}
+
+# Predictions are memoized per model version (see prediction_cache.py). Inputs are snapped to these
+# steps (°F, %, mph, in) before the lookup and the prediction; PM25_CACHE_SIZE=0 disables the cache.
+CACHE_QUANTIZATION = prediction_cache.parse_quantization(
+    os.environ.get("PM25_CACHE_QUANTIZATION", "temperature=0.5,humidity=1,wind_speed=0.5,precipitation=0.01"))
+CACHE_SIZE = int(os.environ.get("PM25_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.environ.get("PM25_CACHE_TTL", "86400"))  # seconds; 0 keeps entries until evicted
+CACHE_FILE = os.environ.get("PM25_CACHE_FILE") or prediction_cache.CACHE_PATH
+# Bumped whenever a response's content changes, so cached predictions are not reused
+RESPONSE_FORMAT = 1
+
+# Loaded on first use by load_model() and reused for every later prediction in the process.
+best_model = None
+model_metadata = None
+multi_model = None
+multi_metadata = None
+_model_lock = threading.Lock()
+_caches = {}
+
+
+def artifact_version(data_hash):
+    return f"{data_hash[:16]}-v{ARTIFACT_FORMAT}"
+
+
+def current_version():
+    """Artifact version of both models for the current CSVs (file hashes are memoized, so this is cheap)."""
+    return artifact_version(model_store.file_hash(weather_csv, air_csv))
+
+
+@instrumentation.timed("load_data")
+def load_training_data(targets=None):
+    """
+    Load and merge the weather and air quality CSVs into the training frame.
+
+    targets: pollutant columns to predict. None gives the PM2.5 label as a
+    Series; a list gives a DataFrame with one column per pollutant.
+    """
+    import data_store
+    columns = targets or ['pm25']
+    # Only the daily averages, precipitation and the target pollutants are read from the columnar store
+    weather_data = data_store.load(weather_csv, columns=['date'] + WEATHER_FEATURES)
+    air_data = data_store.load(air_csv, columns=['date'] + columns)
+
+    # Merge datasets on 'date'
+    with instrumentation.stage("merge"):
+        merged_df = pd.merge(weather_data, air_data, on='date', how='inner')
+
+    # Missing readings are filled with the pollutant's mean (most days have no SO2 reading)
+    small_aerosols = merged_df.drop(columns=['date'])
+    for col in columns:
+        small_aerosols[col] = small_aerosols[col].fillna(small_aerosols[col].mean())
+    features = small_aerosols.drop(columns, axis=1)
+    label = small_aerosols[columns] if targets else small_aerosols['pm25']
+    return features, label
+
+
+def fit_regressor(targets=None):
+    """
+    Load the training frame for `targets` (see load_training_data), tune a
+    RandomForestRegressor on it (see tuning.tune; a forest fits several
+    targets natively) and return the fitted model with its metadata.
+    """
+    # training-only dependencies, kept out of the serving path's startup
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import r2_score
+    import tuning
+
+    data_hash = model_store.file_hash(weather_csv, air_csv)
+    started = time.time()
+    features, label = load_training_data(targets)
+
+    # Split data for training
+    X_train, X_test, y_train, y_test = train_test_split(features, label, test_size=0.25, random_state=424)
+
+    # Seeded so that cached fold scores describe the same model on every run. A full grid: with ~1k rows
+    # and fits of a few ms, halving's small early rounds mostly rank noise and save no time.
+    model, tuning_report = tuning.tune(RandomForestRegressor(random_state=424), parameters, X_train, y_train, cv=5,
+                                       strategy="grid")
+
+    metadata = {
+        "data_files": [os.path.basename(weather_csv), os.path.basename(air_csv)],
+        "data_hash": data_hash,
+        "version": artifact_version(data_hash),
+        "best_params": tuning_report["best_params"],
+        "test_r2": model.score(X_test, y_test),
+        "features": list(features.columns),
+        "tuning": tuning_report,
+        "trained_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "training_seconds": round(time.time() - started, 3)
+    }
+    if targets:
+        scores = r2_score(y_test, model.predict(X_test), multioutput='raw_values')
+        metadata["targets"] = list(targets)
+        metadata["test_r2_by_target"] = {target: float(score) for target, score in zip(targets, scores)}
+    return model, metadata
+
+
+@instrumentation.timed("train")
+def train():
+    """
+    Tune the PM2.5 regressor and save the winner as a versioned artifact.
+    Returns the artifact metadata.
+    """
+    model, metadata = fit_regressor()
+    model_store.save_artifact(ARTIFACT_NAME, metadata["version"], {"model": model}, metadata)
+    return metadata
+
+
+@instrumentation.timed("train")
+def train_multi():
+    """
+    Tune one multi-output forest for every pollutant in a single pass over the
+    merged frame and save it as a versioned artifact. Returns its metadata.
+    """
+    model, metadata = fit_regressor(POLLUTANTS)
+    model_store.save_artifact(MULTI_ARTIFACT_NAME, metadata["version"], {"model": model}, metadata)
+    return metadata
+
+
+@instrumentation.timed("load_model")
+def load_model():
+    """
+    Load the PM2.5 regressor for the current CSVs once per process, training
+    it first if the data changed since the last artifact was written.
+    """
+    global best_model, model_metadata
+    version = current_version()
+    with _model_lock:
+        if model_metadata is not None and model_metadata["version"] == version:
+            return best_model
+
+        artifact = model_store.load_artifact(ARTIFACT_NAME, version, ["model"])
+        if artifact is None:
+            train()
+            artifact = model_store.load_artifact(ARTIFACT_NAME, version, ["model"])
+
+        objects, model_metadata = artifact
+        best_model = objects["model"]
+        return best_model
+
+
+@instrumentation.timed("load_model")
+def load_multi_model():
+    """
+    Load the multi-pollutant forest for the current CSVs once per process,
+    training it first if needed.
+    """
+    global multi_model, multi_metadata
+    version = current_version()
+    with _model_lock:
+        if multi_metadata is not None and multi_metadata["version"] == version:
+            return multi_model
+
+        artifact = model_store.load_artifact(MULTI_ARTIFACT_NAME, version, ["model"])
+        if artifact is None:
+            train_multi()
+            artifact = model_store.load_artifact(MULTI_ARTIFACT_NAME, version, ["model"])
+
+        objects, multi_metadata = artifact
+        multi_model = objects["model"]
+        return multi_model
+
+
+# Function to calculate AQI using U.S. EPA breakpoints (PM2.5 by default).
+# Accepts a scalar or a whole series/array, e.g. a column of the air quality CSV.
+def calculate_aqi(concentration, pollutant='pm25'):
+    values = aqi.sub_index(pollutant, concentration)
+    if isinstance(values, float):
+        return None if values != values else int(values)
+    return values
+
+
+def get_cache(name=ARTIFACT_NAME):
+    with _model_lock:
+        if name not in _caches:
+            _caches[name] = prediction_cache.PredictionCache(name, CACHE_QUANTIZATION, CACHE_SIZE, CACHE_TTL, CACHE_FILE)
+        return _caches[name]
+
+
+def cache_stats(cache=ARTIFACT_NAME):
+    """Hit rate and latency of a prediction cache (PM2.5 or MULTI_ARTIFACT_NAME) in this process."""
+    if CACHE_SIZE <= 0:
+        return {"cache": cache, "enabled": False}
+    return dict(get_cache(cache).stats(), enabled=True)
+
+
+def weather_frame(temperature, humidity, wind_speed, precipitation):
+    """One-row model input with placeholder values for the features the UI does not send."""
+    return pd.DataFrame({
+        "Temperature (°F) AVG": [float(temperature)],
+        "Dew Point (°F) AVG": [0],           # Placeholder
+        "Humidity (%) AVG": [float(humidity)],
+        "Wind Speed (mph) AVG": [float(wind_speed)],
+        "Pressure (in) AVG": [0],           # Placeholder
+        "Precipitation": [float(precipitation)]
+    })
+
+
+def predict(temperature, humidity, wind_speed, precipitation):
+    """
+    Predict PM2.5 for one set of weather inputs (uncached).
+    """
+    model = load_model()
+    data_for_prediction = weather_frame(temperature, humidity, wind_speed, precipitation)
+
+    with instrumentation.stage("predict"):
+        prediction_pm25 = model.predict(data_for_prediction)[0]
+    aqi_pm25 = calculate_aqi(prediction_pm25)
+
+    # Determine the AQI category based on the calculated value
+    category = aqi.categorize(aqi_pm25)
+
+    return {
+        "predicted_pm25": prediction_pm25,
+        "aqi_pm25": aqi_pm25,
+        "category": category
+    }
+
+
+def weather_inputs(temperature, humidity, wind_speed, precipitation):
+    """
+    The four weather inputs as floats; raises ValueError for a value that is
+    not a finite number, before anything is cached or predicted.
+    """
+    inputs = {"temperature": temperature, "humidity": humidity,
+              "wind_speed": wind_speed, "precipitation": precipitation}
+    for name, value in inputs.items():
+        try:
+            inputs[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number, got {value!r}")
+        if not math.isfinite(inputs[name]):
+            raise ValueError(f"{name} must be a finite number, got {value!r}")
+    return inputs
+
+
+def run(temperature, humidity, wind_speed, precipitation):
+    """
+    Predict PM2.5 for one set of weather inputs and return the JSON response,
+    from the prediction cache when the (quantized) inputs were seen before.
+    """
+    inputs = weather_inputs(temperature, humidity, wind_speed, precipitation)
+    if CACHE_SIZE <= 0:
+        return predict(**inputs)
+    # keyed by the artifact version alone: the model is only loaded (or trained) on a miss
+    return get_cache().get_or_compute(f"{current_version()}-r{RESPONSE_FORMAT}", inputs,
+                                      lambda snapped: predict(**snapped))
+
+
+def predict_multi(temperature, humidity, wind_speed, precipitation):
+    """
+    Predict every pollutant from one forward pass of the multi-output forest (uncached).
+    """
+    model = load_multi_model()
+    with instrumentation.stage("predict"):
+        predicted = model.predict(weather_frame(temperature, humidity, wind_speed, precipitation))[0]
+    targets = multi_metadata["targets"]
+    result = aqi.calculate({pollutant: predicted[i:i + 1] * AQI_UNIT_FACTORS.get(pollutant, 1.0)
+                            for i, pollutant in enumerate(targets)})
+    aqi_value = result["aqi"][0]
+    return {
+        "pollutants": {
+            pollutant: {"concentration": float(predicted[i]), "aqi": int(result["sub_indices"][pollutant][0])}
+            for i, pollutant in enumerate(targets)
+        },
+        "aqi": None if aqi_value != aqi_value else int(aqi_value),
+        "dominant_pollutant": result["dominant_pollutant"][0],
+        "category": result["category"][0]
+    }
+
+
+def run_multi(temperature, humidity, wind_speed, precipitation):
+    """
+    Predicted concentration and sub-AQI of every pollutant, plus the overall
+    AQI, dominant pollutant and category, in one response (cached like run()).
+    """
+    inputs = weather_inputs(temperature, humidity, wind_speed, precipitation)
+    if CACHE_SIZE <= 0:
+        return predict_multi(**inputs)
+    return get_cache(MULTI_ARTIFACT_NAME).get_or_compute(f"{current_version()}-r{RESPONSE_FORMAT}", inputs,
+                                                         lambda snapped: predict_multi(**snapped))
+
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+    instrumentation.collect_process(os.path.basename(__file__))
+    # "train" tunes the regressor once and writes the versioned artifact ("train-multi": the multi-pollutant one).
+    if len(sys.argv) == 2 and sys.argv[1] in ("train", "train-multi"):
+        try:
+            metadata = train() if sys.argv[1] == "train" else train_multi()
+        except Exception as e:
+            print(json.dumps({"error": "Failed to train model", "details": str(e)}))
+            sys.exit(1)
+        print(json.dumps(metadata))
+        sys.exit(0)
+
+    # --all: every pollutant from the multi-output model instead of PM2.5 alone
+    multi = "--all" in sys.argv
+    if multi:
+        sys.argv.remove("--all")
+
+    # Read input parameters passed from Node.js
+    try:
+        inputs = weather_inputs(*sys.argv[1:5])
+    except Exception as e:
+        print(json.dumps({"error": "Invalid input parameters", "details": str(e)}))
+        sys.exit(1)
+
+    # The model (and, if needed, the CSVs) are only loaded when the prediction cache misses
+    try:
+        output = (run_multi if multi else run)(**inputs)
+    except Exception as e:
+        print(json.dumps({"error": "Failed to load CSV files", "details": str(e)}))
+        sys.exit(1)
+
+    # Output the results as JSON for Node.js to read
+    print(json.dumps(output))
@@ -2,10 +2,15 @@
 import os
 import sys
 import json
+import time
+import threading
 import pandas as pd
 import numpy as np
-import xgboost as xgb
-from sklearn.metrics import mean_squared_error
+
+import instrumentation
+import model_store
+import serialization
+from lag_features import LagFeatureEngine
 
 # Determine the directory of this script and the data folder relative to it
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,33 +20,9 @@ data_dir = os.path.join(base_dir, '..', 'data')
 aqe_csv = os.path.join(data_dir, 'AQE.csv')
 aqw_csv = os.path.join(data_dir, 'AQW.csv')
 
-# Read input parameters for forecast dates (expected format: YYYY-MM-DD)
-try:
-    forecast_start = sys.argv[1]  # e.g., '2024-11-30'
-    forecast_end = sys.argv[2]    # e.g., '2025-11-01'
-except Exception as e:
-    # Use default forecast range if parameters are not provided
-    forecast_start = '2024-11-30'
-    forecast_end = '2025-11-01'
-
-# Load datasets with error handling
-try:
-    df_aqe = pd.read_csv(aqe_csv)
-    df_aqw = pd.read_csv(aqw_csv)
-except Exception as e:
-    print(json.dumps({"error": "Failed to load CSV files", "details": str(e)}))
-    sys.exit(1)
-
-# Convert date columns to datetime format
-try:
-    df_aqe['Date'] = pd.to_datetime(df_aqe['Date'], format='%m/%d/%Y')
-    df_aqw['Time'] = pd.to_datetime(df_aqw['Time'], format='%Y/%m/%d')
-except Exception as e:
-    print(json.dumps({"error": "Failed to convert date columns", "details": str(e)}))
-    sys.exit(1)
-
-# Merge the dataframes on the standardized date columns
-df_merged = pd.merge(df_aqe, df_aqw, left_on='Date', right_on='Time', how='inner')
+# Default forecast range used when no parameters are provided
+DEFAULT_FORECAST_START = '2024-11-30'
+DEFAULT_FORECAST_END = '2025-11-01'
 
 # Drop unwanted columns
 cols_to_drop = [
@@ -51,15 +32,51 @@ cols_to_drop = [
     'County', 'Site Latitude', 'Site Longitude', 'Units', 'Local Site Name',
     'POC', 'Daily AQI Value'
 ]
-df_merged.drop(columns=cols_to_drop, inplace=True, errors='ignore')
 
-# Set index to Date and ensure datetime format
-data = df_merged.copy()
-data.set_index('Date', inplace=True)
-data.index = pd.to_datetime(data.index)
+# Define target and feature columns
+TARGET = 'Daily Max 1-hour NO2 Concentration'
+
+# Lag feature name -> days back from the target date
+LAG_DAYS = {
+    'lag1': 7,
+    'lag2': 14,
+    'lag3': 31,
+    'lag4': 92,
+    'lag5': 364,
+    'lag6': 728
+}
+FEATURES = [
+    'dayofyear', 'dayofweek', 'quarter', 'month', 'year',
+    'lag1', 'lag2', 'lag3', 'lag4', 'lag5', 'lag6',
+    'Temperature (°F) MAX', 'Temperature (°F) AVG', 'Temperature (°F) MIN',
+    'Dew Point (°F) MAX', 'Dew Point (°F) AVG', 'Dew Point (°F) MIN',
+    'Humidity (%) MAX', 'Humidity (%) AVG', 'Humidity (%) MIN',
+    'Wind Speed (mph) MAX', 'Wind Speed (mph) AVG', 'Wind Speed (mph) MIN',
+    'Pressure (in) AVG', 'Pressure (in) MIN', 'Precipitation'
+]
+
+# The merged, lagged training frame and the fitted booster are cached under
+# <ARTIFACTS_DIR>/capstone_airquality/<source hash>/ by precompute().
+CACHE_NAME = 'capstone_airquality'
+CACHE_COLUMNS = FEATURES + [TARGET]
+MODEL_FILE = 'model.json'
+# Bumped whenever the cached arrays change shape or meaning
+CACHE_FORMAT = 3
+# Days past the last observation covered by the precomputed forecast table
+FORECAST_HORIZON_DAYS = int(os.environ.get("NO2_FORECAST_HORIZON_DAYS", "730"))
+
+# Training frame, observed NO2 series and forecast table, loaded on first use by load_model();
+# the booster itself is only loaded by get_model() for ranges outside the table
+data = None
+history = None
+forecast_table = None
+model = None
+model_version = None
+_model_lock = threading.Lock()
 
 # ---------------- Feature Engineering Functions ----------------
 
+@instrumentation.timed("create_features")
 def create_features(df):
     df = df.copy()
     df['dayofweek'] = df.index.dayofweek
@@ -75,94 +92,339 @@ def create_features(df):
         df['weekofyear'] = df.index.week
     return df
 
+@instrumentation.timed("add_lags")
 def add_lags(df):
     df = df.copy()
-    target_map = df['Daily Max 1-hour NO2 Concentration'].to_dict()
-    df['lag1'] = (df.index - pd.Timedelta('7 days')).map(target_map)
-    df['lag2'] = (df.index - pd.Timedelta('14 days')).map(target_map)
-    df['lag3'] = (df.index - pd.Timedelta('31 days')).map(target_map)
-    df['lag4'] = (df.index - pd.Timedelta('92 days')).map(target_map)
-    df['lag5'] = (df.index - pd.Timedelta('364 days')).map(target_map)
-    df['lag6'] = (df.index - pd.Timedelta('728 days')).map(target_map)
+    engine = LagFeatureEngine.from_series(df.index, df[TARGET].to_numpy(), lags=LAG_DAYS)
+    for name, values in engine.features_for_dates(df.index).items():
+        df[name] = values
     return df
 
 # ---------------- Data Preparation ----------------
 
-# Apply feature engineering
-data = create_features(data)
-data = add_lags(data)
+@instrumentation.timed("load_data")
+def load_merged():
+    """
+    Load AQE/AQW, merge them on date and add calendar and lag features
+    (rows with incomplete lags are kept).
+    """
+    import data_store
+    # Typed, memory-mapped columns (dates already parsed); AQE's unwanted columns are never read
+    aqe_columns = [col for col, _ in data_store.SCHEMAS['AQE.csv'] if col not in cols_to_drop]
+    df_aqe = data_store.load(aqe_csv, columns=aqe_columns)
+    df_aqw = data_store.load(aqw_csv)
 
-# Define target and feature columns
-TARGET = 'Daily Max 1-hour NO2 Concentration'
-FEATURES = [
-    'dayofyear', 'dayofweek', 'quarter', 'month', 'year',
-    'lag1', 'lag2', 'lag3', 'lag4', 'lag5', 'lag6',
-    'Temperature (°F) MAX', 'Temperature (°F) AVG', 'Temperature (°F) MIN',
-    'Dew Point (°F) MAX', 'Dew Point (°F) AVG', 'Dew Point (°F) MIN',
-    'Humidity (%) MAX', 'Humidity (%) AVG', 'Humidity (%) MIN',
-    'Wind Speed (mph) MAX', 'Wind Speed (mph) AVG', 'Wind Speed (mph) MIN',
-    'Pressure (in) AVG', 'Pressure (in) MIN', 'Precipitation'
-]
+    # Merge the dataframes on the standardized date columns
+    with instrumentation.stage("merge"):
+        df_merged = pd.merge(df_aqe, df_aqw, left_on='Date', right_on='Time', how='inner')
+        df_merged.drop(columns=cols_to_drop, inplace=True, errors='ignore')
 
-# Drop rows with missing values in any of the required columns
-data = data.dropna(subset=FEATURES + [TARGET])
+    # Set index to Date and ensure datetime format
+    frame = df_merged.copy()
+    frame.set_index('Date', inplace=True)
+    frame.index = pd.to_datetime(frame.index)
+
+    # Apply feature engineering
+    frame = create_features(frame)
+    return add_lags(frame)
+
+
+def load_data():
+    """
+    Return the feature-engineered training frame.
+    """
+    # Drop rows with missing values in any of the required columns
+    return load_merged().dropna(subset=FEATURES + [TARGET])
 
 # ---------------- Model Training ----------------
 
-# Train final model on all available data
-X_all = data[FEATURES]
-y_all = data[TARGET]
+@instrumentation.timed("fit")
+def train_model(frame):
+    import xgboost as xgb
+    # Train final model on all available data
+    X_all = frame[FEATURES]
+    y_all = frame[TARGET]
+
+    regressor = xgb.XGBRegressor(
+        base_score=0.5,
+        booster='gbtree',
+        n_estimators=500,
+        early_stopping_rounds=50,
+        objective='reg:linear',
+        max_depth=3,
+        learning_rate=0.01
+    )
+
+    # Use the entire dataset for training (using eval_set for logging; verbosity turned off)
+    regressor.fit(X_all, y_all, eval_set=[(X_all, y_all)], verbose=False)
+    return regressor
+
+
+# ---------------- Precomputed Cache ----------------
+
+def cache_version():
+    # file_hash memoizes on mtime/size, so unchanged sources are not re-read
+    return f"{model_store.file_hash(aqe_csv, aqw_csv)[:16]}-v{CACHE_FORMAT}"
+
 
-model = xgb.XGBRegressor(
-    base_score=0.5,
-    booster='gbtree',
-    n_estimators=500,
-    early_stopping_rounds=50,
-    objective='reg:linear',
-    max_depth=3,
-    learning_rate=0.01
-)
+@instrumentation.timed("train")
+def precompute():
+    """
+    Build the merged, lagged training frame, fit the booster and precompute the
+    daily forecast table, then write them to the cache for the current AQE/AQW
+    contents. Returns the cache metadata.
+    """
+    version = cache_version()
+    started = time.perf_counter()
+    merged = load_merged()
+    series = merged[TARGET].dropna()
+    frame = merged.dropna(subset=FEATURES + [TARGET])
+    prepared = time.perf_counter()
+    regressor = train_model(frame)
+    trained = time.perf_counter()
 
-# Use the entire dataset for training (using eval_set for logging; verbosity turned off)
-model.fit(X_all, y_all, eval_set=[(X_all, y_all)], verbose=False)
+    # Daily forecast from the first observation through FORECAST_HORIZON_DAYS past
+    # the last; forecast() serves any range inside it by slicing.
+    engine = LagFeatureEngine.from_series(series.index, series.to_numpy(), lags=LAG_DAYS)
+    table = predict_days(engine, regressor, 0, len(engine) - 1 + FORECAST_HORIZON_DAYS)
+    tabulated = time.perf_counter()
+
+    metadata = {
+        "version": version,
+        "sources": {
+            os.path.basename(path): {
+                "sha256": model_store.file_hash(path),
+                "mtime": os.path.getmtime(path)
+            }
+            for path in (aqe_csv, aqw_csv)
+        },
+        "columns": CACHE_COLUMNS,
+        "rows": len(frame),
+        "prepare_seconds": round(prepared - started, 3),
+        "train_seconds": round(trained - prepared, 3),
+        "forecast_table": {
+            "start": str(engine.start),
+            "end": str(engine.start + np.timedelta64(len(table) - 1, 'D')),
+            "days": len(table),
+            "seconds": round(tabulated - trained, 3)
+        }
+    }
+    model_store.save_artifact(
+        CACHE_NAME, version, {}, metadata,
+        arrays={
+            "dates": frame.index.values.astype('datetime64[D]'),
+            "frame": frame[CACHE_COLUMNS].to_numpy(dtype=np.float64),
+            # every observed NO2 day (including those without full lags) feeds forecast lags
+            "series_dates": series.index.values.astype('datetime64[D]'),
+            "series_values": series.to_numpy(dtype=np.float64),
+            "forecast_table": table
+        },
+        files={MODEL_FILE: regressor.save_model}
+    )
+    return metadata
+
+
+def load_cached(version):
+    """
+    Memory-map the cached training frame and forecast table and build a lag
+    engine over the observed NO2 series.
+    """
+    arrays = model_store.load_arrays(
+        CACHE_NAME, version, ["dates", "frame", "series_dates", "series_values", "forecast_table"]
+    )
+    frame = pd.DataFrame(
+        arrays["frame"],
+        index=pd.DatetimeIndex(arrays["dates"].astype('datetime64[ns]')),
+        columns=CACHE_COLUMNS,
+        copy=False
+    )
+    engine = LagFeatureEngine.from_series(arrays["series_dates"], arrays["series_values"], lags=LAG_DAYS)
+    return frame, engine, arrays["forecast_table"]
+
+
+def load_regressor(version):
+    """The persisted booster (importing xgboost, which is not needed to slice the forecast table)."""
+    import xgboost as xgb
+    regressor = xgb.XGBRegressor()
+    regressor.load_model(os.path.join(model_store.artifact_path(CACHE_NAME, version), MODEL_FILE))
+    return regressor
+
+
+@instrumentation.timed("load_model")
+def load_model():
+    """
+    Load the cached frame and forecast table for the current data, precomputing
+    them first if AQE/AQW changed. Returns the forecast table.
+    """
+    global data, history, forecast_table, model, model_version
+    version = cache_version()
+    with _model_lock:
+        if model_version == version:
+            return forecast_table
+        if model_store.load_metadata(CACHE_NAME, version) is None:
+            precompute()
+        data, history, forecast_table = load_cached(version)
+        model = None
+        model_version = version
+        return forecast_table
+
+
+def get_model():
+    """
+    The booster for the loaded cache, loaded on first use.
+    """
+    global model
+    load_model()
+    with _model_lock:
+        if model is None:
+            model = load_regressor(model_version)
+        return model
 
 # ---------------- Future Prediction ----------------
 
-# Create future dataframe based on forecast_start and forecast_end
-try:
+def feature_matrix(dates):
+    """
+    FEATURES matrix for the given dates with calendar columns filled in; weather
+    columns are unknown for future days and left NaN (XGBoost treats them as missing).
+    """
+    calendar = create_features(pd.DataFrame(index=dates))
+    X = np.full((len(dates), len(FEATURES)), np.nan)
+    for i, col in enumerate(FEATURES):
+        if col in calendar.columns:
+            X[:, i] = calendar[col].to_numpy(dtype=np.float64)
+    return X
+
+
+@instrumentation.timed("predict")
+def predict_days(engine, regressor, first, last):
+    """
+    Predict NO2 for every day offset in [first, last] of the engine's series.
+
+    Days up to the last observation use observed lags. Later days are predicted
+    recursively: the series is extended with each block of predictions so the
+    next block's lags read them. A block is as long as the shortest lag (7 days),
+    so every lag a block needs is already known when it is predicted.
+    """
+    engine = engine.copy()
+    lag_columns = [FEATURES.index(name) for name in LAG_DAYS]
+    step = min(LAG_DAYS.values())
+
+    # Recursion always starts right after the observations, so any gap between
+    # them and `first` is predicted too and then dropped.
+    start = min(first, len(engine))
+    dates = pd.date_range(start=engine.start + np.timedelta64(start, 'D'), periods=last - start + 1)
+    X = feature_matrix(dates)
+    predicted = np.empty(len(dates), dtype=np.float32)
+
+    # Observed days: one batch, lags straight from the observations
+    observed = max(min(len(engine), last + 1) - start, 0)
+    if observed:
+        lags = engine.features(start, start + observed)
+        for name, col in zip(LAG_DAYS, lag_columns):
+            X[:observed, col] = lags[name]
+        predicted[:observed] = regressor.predict(X[:observed])
+
+    # Future days: fill lags from the rolling buffer, predict, feed predictions back
+    for lo in range(start + observed, last + 1, step):
+        hi = min(lo + step, last + 1)
+        rows = slice(lo - start, hi - start)
+        lags = engine.features(lo, hi)
+        for name, col in zip(LAG_DAYS, lag_columns):
+            X[rows, col] = lags[name]
+        predicted[rows] = regressor.predict(X[rows])
+        engine.append(predicted[rows])
+
+    return predicted[first - start:]
+
+
+def forecast_columns(forecast_start=DEFAULT_FORECAST_START, forecast_end=DEFAULT_FORECAST_END):
+    """
+    Forecast daily NO2 between forecast_start and forecast_end (inclusive) as
+    columns: ISO date strings and predicted values.
+
+    Ranges inside the precomputed forecast table are sliced from it; anything
+    outside (e.g. beyond the horizon) is predicted on demand.
+    """
+    load_model()
     future_dates = pd.date_range(start=forecast_start, end=forecast_end)
-except Exception as e:
-    print(json.dumps({"error": "Invalid forecast date range", "details": str(e)}))
-    sys.exit(1)
-
-future_data = pd.DataFrame(index=future_dates)
-future_data['isFuture'] = True
-data['isFuture'] = False
-
-# Concatenate historical data and future dates to apply feature engineering uniformly
-data_and_future = pd.concat([data, future_data])
-data_and_future = create_features(data_and_future)
-data_and_future = add_lags(data_and_future)
-
-# Select only future rows
-future_w_features = data_and_future[data_and_future['isFuture'] == True].copy()
-
-# Fill missing values in future data (using forward fill as a simple strategy)
-future_w_features = future_w_features.fillna(method='ffill')
-
-# Predict future NO2 concentrations
-future_w_features['predicted_NO2'] = model.predict(future_w_features[FEATURES])
-
-# Prepare forecast output as a list of dictionaries with date and prediction
-forecast_results = []
-for date, row in future_w_features.iterrows():
-    forecast_results.append({
-        "date": date.strftime('%Y-%m-%d'),
-        "predicted_NO2": row['predicted_NO2']
-    })
-
-# Output the results as JSON for Node.js to read
-output = {
-    "forecast": forecast_results
-}
-print(json.dumps(output))
+    if len(future_dates) == 0:
+        return {"date": np.array([], dtype=str), "predicted_NO2": np.array([], dtype=np.float32)}
+
+    first = int(history.offsets(future_dates[:1])[0])
+    last = int(history.offsets(future_dates[-1:])[0])
+    if 0 <= first and last < len(forecast_table):
+        predicted = forecast_table[first:last + 1]
+        instrumentation.count("forecast_table_hit")
+    else:
+        instrumentation.count("forecast_table_miss")
+        predicted = predict_days(history, get_model(), first, last)
+
+    return {
+        "date": np.datetime_as_string(future_dates.values.astype('datetime64[D]')),
+        "predicted_NO2": predicted
+    }
+
+
+def forecast(forecast_start=DEFAULT_FORECAST_START, forecast_end=DEFAULT_FORECAST_END):
+    """
+    Forecast as a list of {"date", "predicted_NO2"} dictionaries.
+    """
+    columns = forecast_columns(forecast_start, forecast_end)
+    return [
+        {"date": date, "predicted_NO2": value}
+        for date, value in zip(columns["date"].tolist(), columns["predicted_NO2"].tolist())
+    ]
+
+
+def run(forecast_start=DEFAULT_FORECAST_START, forecast_end=DEFAULT_FORECAST_END):
+    columns = forecast_columns(forecast_start, forecast_end)
+    # The records array is encoded straight from the columns, without a dict per row
+    with instrumentation.stage("serialize"):
+        return {"forecast": serialization.records_json(columns)}
+
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+    instrumentation.collect_process(os.path.basename(__file__))
+    # "precompute" refreshes the cached training frame and booster ahead of forecast requests.
+    if len(sys.argv) == 2 and sys.argv[1] == "precompute":
+        try:
+            print(serialization.dumps(precompute()))
+        except Exception as e:
+            print(json.dumps({"error": "Failed to precompute NO2 model", "details": str(e)}))
+            sys.exit(1)
+        sys.exit(0)
+
+    # --jsonl streams one {"date", "predicted_NO2"} record per line instead of one JSON document
+    jsonl = "--jsonl" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--jsonl"]
+
+    # Read input parameters for forecast dates (expected format: YYYY-MM-DD)
+    try:
+        forecast_start = args[0]  # e.g., '2024-11-30'
+        forecast_end = args[1]    # e.g., '2025-11-01'
+    except Exception as e:
+        # Use default forecast range if parameters are not provided
+        forecast_start = DEFAULT_FORECAST_START
+        forecast_end = DEFAULT_FORECAST_END
+
+    # Load datasets with error handling
+    try:
+        load_model()
+    except Exception as e:
+        print(json.dumps({"error": "Failed to load CSV files", "details": str(e)}))
+        sys.exit(1)
+
+    try:
+        pd.date_range(start=forecast_start, end=forecast_end)
+    except Exception as e:
+        print(json.dumps({"error": "Invalid forecast date range", "details": str(e)}))
+        sys.exit(1)
+
+    # Output the results as JSON for Node.js to read
+    if jsonl:
+        serialization.write_jsonl(forecast_columns(forecast_start, forecast_end), sys.stdout)
+    else:
+        print(serialization.dumps(run(forecast_start, forecast_end)))
@@ -0,0 +1,280 @@
+# backend/scripts/chunked_regression.py
+"""
+Out-of-core variant of the airquality_regression tournament for tract exports
+too large to load at once.
+
+The CSV is streamed in CHUNK_ROWS blocks with float32 columns, and rows with
+missing values are dropped per block. Each row goes to the test set by a hash
+of its key columns (tract id and year), so the split does not depend on chunk
+boundaries or file order. The passes over the file are:
+
+  1. StandardScaler.partial_fit on the training rows, plus the test-target mean
+     and a bounded sample of targets for the distribution plot.
+  2. Training of the candidates that can learn incrementally: SGDRegressor via
+     partial_fit (SGD_EPOCHS passes) and XGBoost from an external-memory
+     DMatrix fed by a DataIter.
+  3. Streaming MAE/MSE/R2, AQI category counts and a bounded sample of
+     (actual, predicted) pairs.
+
+Memory is bounded by CHUNK_ROWS and SAMPLE_ROWS, not by the file size, with
+one exception: XGBoost's external memory mode pages the feature matrix from
+disk but still keeps per-row gradients and row indices in RAM (about 40 bytes
+per training row).
+Candidates that need all rows in memory (random forest, KNN, SVR) are not run
+in this mode.
+"""
+import os
+import time
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+import aqi
+import instrumentation
+
+TARGET = 'pm25_concentration'
+# Columns that never become features
+ID_COLUMNS = ['geoid', 'geoid20']
+# Columns hashed for the train/test split (those present in the file are used)
+KEY_COLUMNS = ['geoid20', 'geoid', 'year']
+TEST_SIZE = 0.2
+
+CHUNK_ROWS = int(os.environ.get("AIRQUALITY_CHUNK_ROWS", "100000"))
+# Rows kept for the plots (distribution and actual vs predicted)
+SAMPLE_ROWS = int(os.environ.get("AIRQUALITY_SAMPLE_ROWS", "50000"))
+SGD_EPOCHS = int(os.environ.get("AIRQUALITY_SGD_EPOCHS", "5"))
+
+MODEL_CONFIGS = {
+    "SGD Regressor": {"random_state": 42},
+    "XGBoost": {"objective": "reg:squarederror", "tree_method": "hist", "seed": 42, "num_boost_round": 100},
+}
+
+
+# -------------- Streaming --------------
+def read_layout(path):
+    """(feature columns, key columns) from the CSV header."""
+    header = list(pd.read_csv(path, nrows=0).columns)
+    if TARGET not in header:
+        raise ValueError(f"{os.path.basename(path)} has no {TARGET} column")
+    features = [c for c in header if c != TARGET and c not in ID_COLUMNS]
+    keys = [c for c in KEY_COLUMNS if c in header] or features
+    return features, keys
+
+
+def iter_chunks(path, features, keys, chunk_rows=None):
+    """
+    Yield (X float32, y float32, row hash uint64, is_test bool) per block of the CSV.
+    """
+    extra = [c for c in keys if c not in features]
+    dtype = {c: np.float32 for c in features + [TARGET]}
+    # ids are only hashed; read them as strings so long tract ids are not rounded
+    dtype.update({c: str for c in extra})
+    threshold = np.uint64(round(TEST_SIZE * 10_000))
+    for chunk in pd.read_csv(path, usecols=features + [TARGET] + extra, dtype=dtype,
+                             chunksize=chunk_rows or CHUNK_ROWS):
+        chunk = chunk.dropna()
+        if chunk.empty:
+            continue
+        hashes = pd.util.hash_pandas_object(chunk[keys], index=False).to_numpy()
+        yield (chunk[features].to_numpy(np.float32), chunk[TARGET].to_numpy(np.float32),
+               hashes, hashes % np.uint64(10_000) < threshold)
+
+
+class Sample:
+    """
+    Bounded, deterministic sample: keeps the `size` rows with the smallest
+    hashes seen so far (the same rows whatever the chunking).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.columns = None
+
+    def add(self, keys, *columns):
+        if self.columns is None:
+            self.columns = [np.empty(0, dtype=np.asarray(c).dtype) for c in columns]
+        self.keys = np.concatenate([self.keys, keys])
+        self.columns = [np.concatenate([old, new]) for old, new in zip(self.columns, columns)]
+        if self.keys.size > self.size:
+            keep = np.argpartition(self.keys, self.size - 1)[:self.size]
+            self.keys = self.keys[keep]
+            self.columns = [c[keep] for c in self.columns]
+
+    def values(self):
+        order = np.argsort(self.keys, kind="stable")
+        return [c[order] for c in (self.columns or [])]
+
+
+class _TrainIter(xgb.DataIter):
+    """Feeds the scaled training rows of each block to XGBoost's external-memory DMatrix."""
+
+    def __init__(self, path, features, keys, scaler, chunk_rows, cache_prefix):
+        self._blocks = lambda: iter_chunks(path, features, keys, chunk_rows)
+        self._scaler = scaler
+        self._it = self._blocks()
+        try:
+            # keep the cached pages on disk rather than in host memory (xgboost >= 3.0)
+            super().__init__(cache_prefix=cache_prefix, on_host=False)
+        except TypeError:
+            super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        for X, y, _, test in self._it:
+            train = ~test
+            if train.any():
+                input_data(data=self._scaler.transform(X[train]), label=y[train])
+                return True
+        return False
+
+    def reset(self):
+        self._it = self._blocks()
+
+
+class BoosterRegressor:
+    """predict()/feature_importances_ for a Booster trained with xgb.train, like XGBRegressor."""
+
+    def __init__(self, booster, feature_names):
+        self.booster = booster
+        self.feature_names = list(feature_names)
+
+    def predict(self, X):
+        return self.booster.inplace_predict(np.asarray(X, dtype=np.float32))
+
+    @property
+    def feature_importances_(self):
+        # XGBRegressor's default importance type for tree boosters
+        scores = self.booster.get_score(importance_type="gain")
+        values = np.array([scores.get(f"f{i}", 0.0) for i in range(len(self.feature_names))], dtype=np.float32)
+        total = values.sum()
+        return values / total if total > 0 else values
+
+
+# -------------- Training --------------
+@instrumentation.timed("fit")
+def fit_sgd(path, features, keys, scaler, chunk_rows):
+    model = SGDRegressor(**MODEL_CONFIGS["SGD Regressor"])
+    rng = np.random.default_rng(42)
+    for _ in range(SGD_EPOCHS):
+        for X, y, _, test in iter_chunks(path, features, keys, chunk_rows):
+            train = np.flatnonzero(~test)
+            if train.size:
+                # tract files are sorted by id; shuffle within the block
+                train = rng.permutation(train)
+                model.partial_fit(scaler.transform(X[train]), y[train])
+    return model
+
+
+@instrumentation.timed("fit")
+def fit_xgboost(path, features, keys, scaler, chunk_rows):
+    params = dict(MODEL_CONFIGS["XGBoost"])
+    rounds = params.pop("num_boost_round")
+    params["nthread"] = os.cpu_count() or 1
+    cache_dir = tempfile.mkdtemp(prefix="xgb-extmem-")
+    try:
+        data = _TrainIter(path, features, keys, scaler, chunk_rows, os.path.join(cache_dir, "cache"))
+        if hasattr(xgb, "ExtMemQuantileDMatrix"):
+            dtrain = xgb.ExtMemQuantileDMatrix(data)
+        else:  # xgboost < 3.0
+            dtrain = xgb.DMatrix(data)
+        booster = xgb.train(params, dtrain, num_boost_round=rounds)
+        del dtrain
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return BoosterRegressor(booster, features)
+
+
+FITTERS = {"SGD Regressor": fit_sgd, "XGBoost": fit_xgboost}
+
+
+# -------------- Tournament --------------
+def run_tournament(path, chunk_rows=None):
+    """
+    Stream `path` and fit/evaluate the incremental candidates.
+
+    Returns a dict with per-model results (MAE/MSE/R2, timings), the fitted
+    models, the best model's name and AQI category counts, the feature names,
+    row counts and the bounded plot samples.
+    """
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    features, keys = read_layout(path)
+
+    # Pass 1: scaler statistics, test-target mean, target sample
+    scaler = StandardScaler()
+    n_train = n_test = 0
+    test_sum = 0.0
+    targets = Sample(SAMPLE_ROWS)
+    for X, y, hashes, test in iter_chunks(path, features, keys, chunk_rows):
+        if not test.all():
+            scaler.partial_fit(X[~test])
+        n_train += int((~test).sum())
+        n_test += int(test.sum())
+        test_sum += float(y[test].sum(dtype=np.float64))
+        targets.add(hashes, y)
+    if n_train == 0 or n_test == 0:
+        raise ValueError("Not enough rows to split into training and test sets")
+    test_mean = test_sum / n_test
+
+    # Pass 2: incremental training
+    results, models = {}, {}
+    for name, fit in FITTERS.items():
+        started = time.perf_counter()
+        models[name] = fit(path, features, keys, scaler, chunk_rows)
+        results[name] = {"fit_seconds": round(time.perf_counter() - started, 4), "rows": n_train}
+
+    # Pass 3: streaming evaluation on the test rows
+    totals = {name: {"abs": 0.0, "sq": 0.0, "seconds": 0.0, "categories": {}} for name in models}
+    sst = 0.0
+    pairs = Sample(SAMPLE_ROWS)
+    for X, y, hashes, test in iter_chunks(path, features, keys, chunk_rows):
+        if not test.any():
+            continue
+        X_test = scaler.transform(X[test])
+        y_test = y[test].astype(np.float64)
+        sst += float(((y_test - test_mean) ** 2).sum())
+        predictions = []
+        for name, model in models.items():
+            started = time.perf_counter()
+            y_pred = np.asarray(model.predict(X_test), dtype=np.float64)
+            total = totals[name]
+            total["seconds"] += time.perf_counter() - started
+            total["abs"] += float(np.abs(y_test - y_pred).sum())
+            total["sq"] += float(((y_test - y_pred) ** 2).sum())
+            # first-appearance order across blocks, like category_distribution on the full column
+            names, first_seen, counts = np.unique(aqi.categorize(y_pred), return_index=True, return_counts=True)
+            for i in np.argsort(first_seen):
+                total["categories"][str(names[i])] = total["categories"].get(str(names[i]), 0) + int(counts[i])
+            predictions.append(y_pred)
+        pairs.add(hashes[test], y_test, *predictions)
+
+    for name, total in totals.items():
+        instrumentation.add("predict", total["seconds"])
+        results[name].update({
+            "MAE": total["abs"] / n_test,
+            "MSE": total["sq"] / n_test,
+            "R2": 1.0 - total["sq"] / sst if sst > 0 else 0.0,
+            "predict_seconds": round(total["seconds"], 4),
+        })
+        # same key order as the in-memory tournament
+        results[name] = {key: results[name][key] for key in
+                         ("MAE", "MSE", "R2", "fit_seconds", "predict_seconds", "rows")}
+
+    if not models:
+        raise RuntimeError("No candidate model finished training")
+    best = max(models, key=lambda name: results[name]["R2"])
+    actual, *predicted = pairs.values()
+    return {
+        "results": results,
+        "models": models,
+        "best_model": best,
+        "aqi_category_distribution": totals[best]["categories"],
+        "features": features,
+        "rows": {"train": n_train, "test": n_test},
+        "target_sample": targets.values()[0],
+        "test_sample": (actual, predicted[list(models).index(best)]),
+    }
@@ -0,0 +1,273 @@
+# backend/scripts/data_store.py
+"""
+Typed, memory-mapped copies of the CSVs in backend/data.
+
+`python data_store.py ingest` parses each CSV once against the schema declared
+in SCHEMAS and writes one .npy file per column under COLUMNAR_DIR/<file stem>/
+(<file stem>-<path hash>/ for a same-named file outside backend/data)
+(string columns are dictionary-encoded: int32 codes plus a sorted dictionary).
+load() then memory-maps only the requested columns instead of re-parsing and
+re-inferring the CSV in every process. A columnar copy whose source CSV changed
+is rebuilt automatically on the next load().
+
+DATA_STORE_FORMAT=csv skips the columnar copies and parses the CSV on every
+load, with the same schema, so both paths return identical frames.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+import model_store
+
+# -------------- Setup File Paths --------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
+COLUMNAR_DIR = os.environ.get("DATA_STORE_DIR") or os.path.join(DATA_DIR, 'columnar')
+# "columnar" (default) or "csv"
+FORMAT = os.environ.get("DATA_STORE_FORMAT", "columnar")
+
+MANIFEST_FILE = 'manifest.json'
+# Bumped whenever the on-disk layout changes
+STORE_FORMAT = 1
+
+# -------------- Schemas --------------
+# Column types, in file order:
+#   "int"      int64, no missing values allowed
+#   "float"    float64, NaN for missing values
+#   "category" whitespace-stripped strings, dictionary-encoded (missing -> NaN)
+#   "date:FMT" datetime parsed with the given strptime format
+_WEATHER = [
+    ("Temperature (°F) MAX", "int"), ("Temperature (°F) AVG", "float"), ("Temperature (°F) MIN", "int"),
+    ("Dew Point (°F) MAX", "int"), ("Dew Point (°F) AVG", "float"), ("Dew Point (°F) MIN", "int"),
+    ("Humidity (%) MAX", "int"), ("Humidity (%) AVG", "float"), ("Humidity (%) MIN", "int"),
+    ("Wind Speed (mph) MAX", "int"), ("Wind Speed (mph) AVG", "float"), ("Wind Speed (mph) MIN", "int"),
+    ("Pressure (in) MAX", "float"), ("Pressure (in) AVG", "float"), ("Pressure (in) MIN", "float"),
+    ("Precipitation", "float"),
+]
+
+SCHEMAS = {
+    "10K_Activity_Dataset.csv": [
+        ("Age", "int"), ("Time_of_Day", "int"), ("AQI", "int"), ("AQI_Category", "category"),
+        ("Temperature", "float"), ("Precipitation", "float"),
+        ("Suggested_Activity", "category"), ("Activity_Suggestion", "category"),
+    ],
+    "activity_recommendation_dataset.csv": [
+        ("User ID", "category"), ("Age", "int"), ("Gender", "category"),
+        ("Health Condition", "category"), ("Activity Level", "category"), ("Preference", "category"),
+        ("Temperature (°C)", "float"), ("Humidity (%)", "float"), ("Wind Speed (km/h)", "float"),
+        ("Air Quality Index", "int"), ("Crime Rate", "float"), ("Traffic Congestion Index", "float"),
+        ("Community Event", "category"), ("Health Advisory", "category"),
+        ("Recommended Activity", "category"),
+    ],
+    "AQE.csv": [
+        ("Date", "date:%m/%d/%Y"), ("Source", "category"), ("Site ID", "int"), ("POC", "int"),
+        ("Daily Max 1-hour NO2 Concentration", "float"), ("Units", "category"),
+        ("Daily AQI Value", "int"), ("Local Site Name", "category"), ("Daily Obs Count", "int"),
+        ("Percent Complete", "int"), ("AQS Parameter Code", "int"),
+        ("AQS Parameter Description", "category"), ("Method Code", "int"), ("CBSA Code", "int"),
+        ("CBSA Name", "category"), ("State FIPS Code", "int"), ("State", "category"),
+        ("County FIPS Code", "int"), ("County", "category"),
+        ("Site Latitude", "float"), ("Site Longitude", "float"),
+    ],
+    "AQW.csv": [("Time", "date:%Y/%m/%d")] + _WEATHER,
+    "BobHopeAirportStationWeatherData.csv": [("date", "date:%Y/%m/%d")] + _WEATHER,
+    "AllYearsAirQualityCalculations.csv": [
+        # population and percentile are measured like the concentration: larger exports have gaps
+        ("geoid", "category"), ("geoid20", "int"), ("year", "int"), ("denom_total_pop", "float"),
+        ("pm25_concentration", "float"), ("pm25_concentration_pctile", "float"),
+    ],
+    "los-angeles-north-main-street-air-quality.csv": [
+        ("date", "date:%Y/%m/%d"), ("pm25", "float"), ("pm10", "float"), ("o3", "float"),
+        ("no2", "float"), ("so2", "float"), ("co", "float"),
+    ],
+}
+
+_ingest_lock = threading.Lock()
+
+
+class SchemaError(ValueError):
+    """A CSV does not match its declared schema."""
+
+
+def _resolve(path_or_name):
+    """(schema name, CSV path) for a file name in DATA_DIR or a path to one of the known files."""
+    name = os.path.basename(path_or_name)
+    path = path_or_name if os.path.dirname(path_or_name) else os.path.join(DATA_DIR, name)
+    return name, path
+
+
+def _store_dir(name, path):
+    """
+    Columnar folder for one CSV: its stem for the bundled file, plus a hash of the
+    path for a same-named file elsewhere, so the two never overwrite each other.
+    """
+    stem = os.path.splitext(name)[0]
+    if os.path.realpath(path) == os.path.realpath(os.path.join(DATA_DIR, name)):
+        return os.path.join(COLUMNAR_DIR, stem)
+    digest = hashlib.sha256(os.path.realpath(path).encode()).hexdigest()[:12]
+    return os.path.join(COLUMNAR_DIR, f"{stem}-{digest}")
+
+
+# -------------- CSV Parsing --------------
+def parse_csv(path, name=None):
+    """Parse a CSV against its schema; raises SchemaError on any mismatch."""
+    name = name or os.path.basename(path)
+    schema = SCHEMAS[name]
+    df = pd.read_csv(path, dtype={col: "str" for col, kind in schema if kind != "float"})
+    df.columns = df.columns.str.strip()
+    expected = [col for col, _ in schema]
+    if list(df.columns) != expected:
+        raise SchemaError(f"{name}: expected columns {expected}, found {list(df.columns)}")
+
+    for col, kind in schema:
+        values = df[col]
+        try:
+            if kind == "int":
+                if values.isna().any():
+                    raise ValueError("missing values in an int column")
+                df[col] = values.str.strip().astype(np.int64)
+            elif kind == "float":
+                df[col] = values.astype(np.float64)
+            elif kind == "category":
+                df[col] = pd.Categorical(values.str.strip())
+            elif kind.startswith("date:"):
+                df[col] = pd.to_datetime(values.str.strip(), format=kind[5:])
+            else:
+                raise ValueError(f"unknown column type {kind!r}")
+        except (ValueError, TypeError) as e:
+            raise SchemaError(f"{name}: column {col!r} is not {kind}: {e}") from e
+    return df
+
+
+# -------------- Columnar Store --------------
+def load_manifest(path_or_name):
+    name, path = _resolve(path_or_name)
+    manifest_path = os.path.join(_store_dir(name, path), MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def is_current(path_or_name, manifest=None):
+    """True if the columnar copy exists and was built from the current CSV and schema."""
+    name, path = _resolve(path_or_name)
+    manifest = manifest or load_manifest(path)
+    return (manifest is not None
+            and manifest.get("format") == STORE_FORMAT
+            and manifest.get("schema") == [list(column) for column in SCHEMAS[name]]
+            and manifest.get("source_hash") == model_store.file_hash(path))
+
+
+def ingest(path_or_name):
+    """
+    Convert one CSV to its columnar folder (see _store_dir) and return its manifest.
+
+    Like model_store.save_artifact, the folder is staged and renamed into
+    place so concurrent loads never see a partial copy.
+    """
+    name, path = _resolve(path_or_name)
+    if name not in SCHEMAS:
+        raise SchemaError(f"No schema declared for {name}")
+    df = parse_csv(path, name)
+    target = _store_dir(name, path)
+    os.makedirs(COLUMNAR_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(target)}-", dir=COLUMNAR_DIR)
+    try:
+        columns = []
+        for i, (col, kind) in enumerate(SCHEMAS[name]):
+            entry = {"name": col, "type": kind, "file": f"col_{i:03d}.npy"}
+            if kind == "category":
+                np.save(os.path.join(staging, entry["file"]), df[col].cat.codes.to_numpy(np.int32))
+                entry["dictionary"] = f"dict_{i:03d}.npy"
+                np.save(os.path.join(staging, entry["dictionary"]),
+                        np.asarray(df[col].cat.categories, dtype=str))
+            else:
+                np.save(os.path.join(staging, entry["file"]), df[col].to_numpy())
+            columns.append(entry)
+        manifest = {
+            "source": name,
+            "source_hash": model_store.file_hash(path),
+            "format": STORE_FORMAT,
+            "schema": [list(column) for column in SCHEMAS[name]],
+            "rows": len(df),
+            "columns": columns,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _read_columns(name, path, manifest, columns):
+    folder = _store_dir(name, path)
+    entries = {entry["name"]: entry for entry in manifest["columns"]}
+    data = {}
+    for col in columns:
+        entry = entries[col]
+        # copy-on-write mapping: pages are shared with the file until a caller writes to them
+        values = np.load(os.path.join(folder, entry["file"]), mmap_mode='c')
+        if entry["type"] == "category":
+            dictionary = np.load(os.path.join(folder, entry["dictionary"]))
+            values = pd.Categorical.from_codes(values, categories=pd.Index(dictionary), validate=False)
+        data[col] = values
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def load(path_or_name, columns=None):
+    """
+    DataFrame for one of the known CSVs, typed per SCHEMAS.
+
+    columns: subset to load (in the order given); only those .npy files are
+        mapped. Missing or stale columnar copies are (re)built first.
+    Files without a declared schema fall back to a plain pd.read_csv.
+    """
+    name, path = _resolve(path_or_name)
+    if name not in SCHEMAS:
+        df = pd.read_csv(path)
+        return df if columns is None else df[list(columns)]
+    columns = list(columns) if columns is not None else [col for col, _ in SCHEMAS[name]]
+    unknown = [col for col in columns if col not in dict(SCHEMAS[name])]
+    if unknown:
+        raise KeyError(f"{name} has no columns {unknown}")
+
+    if FORMAT == "csv":
+        return parse_csv(path, name)[columns]
+
+    manifest = load_manifest(path)
+    if not is_current(path, manifest):
+        with _ingest_lock:
+            manifest = load_manifest(path)
+            if not is_current(path, manifest):
+                manifest = ingest(path)
+    return _read_columns(name, path, manifest, columns)
+
+
+# -------------- Main Execution --------------
+if __name__ == "__main__":
+    # Usage: python data_store.py ingest [FILE ...]   (default: every file in SCHEMAS)
+    if len(sys.argv) < 2 or sys.argv[1] != "ingest":
+        print(json.dumps({"error": "Usage: python data_store.py ingest [FILE ...]"}))
+        sys.exit(1)
+    names = sys.argv[2:] or list(SCHEMAS)
+    report = {}
+    try:
+        for file_name in names:
+            manifest = ingest(file_name)
+            report[manifest["source"]] = {"rows": manifest["rows"], "columns": len(manifest["columns"])}
+    except (SchemaError, OSError) as e:
+        print(json.dumps({"error": "Ingest failed", "details": str(e)}))
+        sys.exit(1)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,95 @@
+# backend/scripts/encoders.py
+import json
+
+import numpy as np
+
+
+class FrozenEncoder:
+    """
+    Read-only replacement for a fitted LabelEncoder, backed by a class -> code
+    dict (single values) and a pandas Index (whole columns, built on first use
+    so that single-value lookups never import pandas).
+
+    Codes match the LabelEncoder it was built from. Unknown values map to
+    default_code when one is set, otherwise they raise ValueError like
+    LabelEncoder.transform(). For numeric classes, numeric strings ("14") are
+    accepted as well.
+    """
+    __slots__ = ("classes", "default_code", "_codes", "_classes_array", "_index", "_numeric")
+
+    def __init__(self, classes, default_code=None):
+        self.classes = list(classes)
+        self.default_code = default_code
+        self._codes = {cls: code for code, cls in enumerate(self.classes)}
+        self._classes_array = np.array(self.classes, dtype=object)
+        self._index = None
+        self._numeric = bool(self.classes) and np.asarray(self.classes).dtype.kind in "biuf"
+
+    @classmethod
+    def from_label_encoder(cls, encoder, default=None):
+        """Freeze a fitted LabelEncoder; `default` is the class used for unknown values."""
+        classes = encoder.classes_.tolist()
+        return cls(classes, None if default is None else classes.index(default))
+
+    # -------------- Encoding --------------
+    def encode(self, value):
+        """Code for one value: a dict lookup, no arrays involved."""
+        code = self._codes.get(value)
+        if code is None and self._numeric and isinstance(value, str):
+            try:
+                code = self._codes.get(float(value))
+            except ValueError:
+                pass
+        if code is None:
+            if self.default_code is None:
+                raise ValueError(f"y contains previously unseen labels: {[value]}")
+            code = self.default_code
+        return code
+
+    def decode(self, code):
+        return self.classes[int(code)]
+
+    def encode_column(self, values):
+        """Codes for a whole column (list, array or Series) in one vectorized lookup."""
+        import pandas as pd
+        if self._index is None:
+            self._index = pd.Index(self.classes)
+        values = pd.Series(values, copy=False) if not isinstance(values, pd.Series) else values
+        if self._numeric and not pd.api.types.is_numeric_dtype(values.dtype):
+            values = pd.to_numeric(values, errors='coerce')
+        codes = self._index.get_indexer(values)
+        missing = codes < 0
+        if missing.any():
+            if self.default_code is None:
+                raise ValueError(f"y contains previously unseen labels: {values[missing].unique()[:5].tolist()}")
+            codes[missing] = self.default_code
+        return codes
+
+    def decode_column(self, codes):
+        return self._classes_array[np.asarray(codes, dtype=np.intp)]
+
+    # -------------- Serialization --------------
+    def to_dict(self):
+        return {"classes": self.classes, "default": self.default_code}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["classes"], data.get("default"))
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(state["classes"], state.get("default"))
+
+
+def save_encoders(path, encoders):
+    """Write {column: FrozenEncoder} as one compact JSON file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({col: encoder.to_dict() for col, encoder in encoders.items()}, f,
+                  separators=(',', ':'), ensure_ascii=False)
+
+
+def load_encoders(path):
+    with open(path, encoding='utf-8') as f:
+        return {col: FrozenEncoder.from_dict(data) for col, data in json.load(f).items()}
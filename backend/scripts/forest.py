@@ -0,0 +1,162 @@
+# backend/scripts/forest.py
+"""
+Flattened inference representation for fitted sklearn RandomForestClassifiers.
+
+All trees are packed into shared node arrays (feature, threshold, children,
+per-node class probabilities). Prediction walks every tree for every row at
+once with NumPy gathers, one step per tree level over the (row, tree) pairs
+that have not reached a leaf yet, and skips sklearn's DataFrame/input
+validation. Comparisons use float32 inputs against float64 thresholds and
+per-tree probabilities are summed in tree order, exactly as sklearn does, so
+predict_proba() is bit-identical to the source model.
+"""
+import numpy as np
+
+# Rows whose per-tree probabilities are gathered at once; bounds the (trees, rows, classes) buffer
+CHUNK_ROWS = 1024
+# numba is optional; when installed, batches larger than this use forest_kernels
+NUMBA_MIN_ROWS = 64
+
+_kernel = None
+
+
+def _numba_kernel():
+    """forest_kernels.predict_proba, imported on first use; False when numba is not installed."""
+    global _kernel
+    if _kernel is None:
+        try:
+            import forest_kernels
+            _kernel = forest_kernels.predict_proba
+        except ImportError:  # pragma: no cover - depends on the deployment
+            _kernel = False
+    return _kernel
+
+
+ARRAY_KEYS = ("feature", "threshold", "left", "right", "missing_left", "proba", "roots", "classes")
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, left, right, missing_left, proba, roots, classes, depth):
+        # plain ndarray views: fancy indexing through np.memmap's subclass hooks is much slower
+        self.feature = np.asarray(feature)
+        self.threshold = np.asarray(threshold)
+        self.left = np.asarray(left)
+        self.right = np.asarray(right)
+        self.missing_left = np.asarray(missing_left)
+        self.proba = np.asarray(proba)
+        self.roots = np.asarray(roots)
+        self.classes = np.asarray(classes)
+        self.depth = int(depth)
+        # leaves are the nodes that point at themselves
+        self.is_leaf = self.left == np.arange(self.left.size)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Pack the trees of a fitted RandomForestClassifier (single output)."""
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        n_classes = int(model.n_classes_)
+        features, thresholds, lefts, rights, missing, probas, roots = [], [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            nodes = np.arange(offset, offset + n, dtype=np.int64)
+            # leaves point at themselves (see is_leaf)
+            lefts.append(np.where(leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(leaf, nodes, tree.children_right + offset))
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            missing.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(n)), dtype=bool))
+            value = tree.value[:, 0, :n_classes]
+            totals = value.sum(axis=1)
+            if not np.allclose(totals, 1.0):
+                # scikit-learn < 1.4 stores class counts; predict_proba normalized them per row
+                totals[totals == 0.0] = 1.0
+                value = value / totals[:, np.newaxis]
+            probas.append(value)
+            roots.append(offset)
+            offset += n
+            depth = max(depth, tree.max_depth)
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            missing_left=np.concatenate(missing),
+            proba=np.ascontiguousarray(np.concatenate(probas), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            depth=depth,
+        )
+
+    # -------------- Persistence --------------
+    def to_arrays(self, prefix="forest_"):
+        """Arrays for model_store.save_artifact(arrays=...), including the traversal depth."""
+        arrays = {prefix + key: getattr(self, key) for key in ARRAY_KEYS}
+        arrays[prefix + "depth"] = np.asarray([self.depth], dtype=np.int64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix="forest_"):
+        """Rebuild from to_arrays() output, e.g. memory-mapped model_store.load_arrays()."""
+        return cls(depth=int(arrays[prefix + "depth"][0]),
+                   **{key: arrays[prefix + key] for key in ARRAY_KEYS})
+
+    @staticmethod
+    def array_keys(prefix="forest_"):
+        return [prefix + key for key in ARRAY_KEYS + ("depth",)]
+
+    # -------------- Inference --------------
+    @property
+    def n_trees(self):
+        return self.roots.size
+
+    def leaves(self, X):
+        """Leaf node index reached in every tree, shape (rows, trees)."""
+        # sklearn casts inputs to float32 and compares them against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        has_nan = bool(np.isnan(values).any())
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees)
+        # only (row, tree) pairs that have not reached a leaf are stepped
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            x = values[row_offsets[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_nan:
+                go_left = np.where(np.isnan(x), self.missing_left[current], go_left)
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        X = np.atleast_2d(X)
+        kernel = _numba_kernel() if X.shape[0] > NUMBA_MIN_ROWS else False
+        if kernel:
+            out = np.zeros((X.shape[0], self.proba.shape[1]))
+            kernel(np.asarray(X, dtype=np.float32).astype(np.float64), self.feature,
+                   self.threshold, self.left, self.right, self.missing_left,
+                   self.is_leaf, self.proba, self.roots, out)
+        else:
+            leaves = self.leaves(X)
+            out = np.empty((X.shape[0], self.proba.shape[1]))
+            for lo in range(0, X.shape[0], CHUNK_ROWS):
+                # (trees, rows, classes) summed over the leading axis: NumPy only uses pairwise
+                # summation along the contiguous axis, so this adds the trees strictly in order
+                out[lo:lo + CHUNK_ROWS] = self.proba[leaves[lo:lo + CHUNK_ROWS].T].sum(axis=0)
+        out /= self.n_trees
+        return out
+
+    def predict_codes(self, X):
+        """Index into `classes` of the predicted class for each row."""
+        return np.argmax(self.predict_proba(X), axis=1)
+
+    def predict(self, X):
+        return self.classes.take(self.predict_codes(X), axis=0)
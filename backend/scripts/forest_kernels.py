@@ -0,0 +1,30 @@
+# backend/scripts/forest_kernels.py
+"""
+numba kernels for forest.CompiledForest. Imported on the first batch large
+enough to use them, so single-row predictions never pay for importing numba.
+"""
+import numba
+import numpy as np
+
+BLOCK_ROWS = 256
+
+
+@numba.njit(nogil=True, parallel=True, cache=True)
+def predict_proba(X, feature, threshold, left, right, missing_left, is_leaf, proba, roots, out):
+    # Same comparisons as sklearn's Cython predictor. Row blocks run in parallel; within a
+    # block each tree is walked for every row, so each row still adds the trees in order.
+    n_blocks = (X.shape[0] + BLOCK_ROWS - 1) // BLOCK_ROWS
+    for b in numba.prange(n_blocks):
+        lo = b * BLOCK_ROWS
+        hi = min(lo + BLOCK_ROWS, X.shape[0])
+        for t in range(roots.shape[0]):
+            for i in range(lo, hi):
+                node = roots[t]
+                while not is_leaf[node]:
+                    x = X[i, feature[node]]
+                    if x <= threshold[node] or (missing_left[node] and np.isnan(x)):
+                        node = left[node]
+                    else:
+                        node = right[node]
+                for c in range(proba.shape[1]):
+                    out[i, c] += proba[node, c]
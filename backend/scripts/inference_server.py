@@ -0,0 +1,254 @@
+# backend/scripts/inference_server.py
+"""
+Long-lived inference server for the backend routes.
+
+Instead of spawning one Python interpreter per HTTP request, the Node server
+starts this process once and talks to it over stdin/stdout using JSON lines:
+
+    request:  {"id": 1, "method": "predict_pm25", "params": {"temperature": "70", ...}}
+    response: {"id": 1, "result": {...}, "timing": {...}}  or  {"id": 1, "error": "...", "details": "..."}
+
+"timing" is the request's per-stage timing block (see instrumentation.py); it
+is omitted when instrumentation is switched off.
+
+Each script's model is loaded on first use and kept in memory. Requests are
+handled concurrently by a thread pool; "reload" (or SIGHUP) waits for in-flight
+requests to finish and then re-imports the shared helper modules (model_store,
+prediction_cache, encoders, forest, ...) followed by every script, so new
+data/artifacts and code changes in either are picked up. The modules in
+KEEP_ON_RELOAD and changes to third-party packages still need a restart.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import instrumentation  # noqa: E402
+import serialization  # noqa: E402
+
+# method name -> (module name, function name)
+METHODS = {
+    "recommend_activity": ("activity_recommender", "run"),
+    "recommend_activity_v2": ("activityrecommendationv2", "run"),
+    "recommend_activities_v2": ("activityrecommendationv2", "run_batch"),
+    "predict_pm25": ("aqi_prediction", "run"),
+    "pm25_cache_stats": ("aqi_prediction", "cache_stats"),
+    "predict_pollutants": ("aqi_prediction", "run_multi"),
+    "forecast_no2": ("capstone_airquality", "run"),
+    "regression_report": ("airquality_regression", "run"),
+    "tract_lookup": ("tract_index", "run"),
+    "newsfeed": ("newsfeed", "run"),
+}
+
+# Sibling modules reload leaves alone: the server's own plumbing, and plot_renderer, whose
+# process pool and pending renders would be orphaned by re-running the module
+KEEP_ON_RELOAD = {"__main__", "inference_server", "instrumentation", "serialization", "plot_renderer"}
+
+# method name -> function that loads that script's model ahead of the first request
+WARMUP = {
+    "recommend_activity": ("activity_recommender", "load_model"),
+    "recommend_activity_v2": ("activityrecommendationv2", "load_model"),
+    "predict_pm25": ("aqi_prediction", "load_model"),
+    "predict_pollutants": ("aqi_prediction", "load_multi_model"),
+    "forecast_no2": ("capstone_airquality", "load_model"),
+    "tract_lookup": ("tract_index", "load_index"),
+    # starts the background feed refresher so the first request already finds articles
+    "newsfeed": ("newsfeed", "start_refresher"),
+}
+
+
+class ReloadLock:
+    """
+    Readers/writer lock: requests hold it shared, reload holds it exclusively.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    def acquire_shared(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_shared(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_exclusive(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._writing = True
+            while self._readers:
+                self._cond.wait()
+
+    def release_exclusive(self):
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+
+class InferenceServer:
+    def __init__(self, out, workers):
+        self.out = out
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.modules = {}
+        self.lock = ReloadLock()
+        self._write_lock = threading.Lock()
+        self._import_lock = threading.Lock()
+        self._handled_lock = threading.Lock()
+        self.started = time.time()
+        self.handled = 0
+
+    # -------------- Module Management --------------
+    def get_module(self, name):
+        with self._import_lock:
+            module = self.modules.get(name)
+            if module is None:
+                module = importlib.import_module(name)
+                self.modules[name] = module
+            return module
+
+    def warmup(self, methods):
+        for method in methods:
+            module_name, func_name = WARMUP.get(method, (METHODS[method][0], None))
+            module = self.get_module(module_name)
+            if func_name:
+                getattr(module, func_name)()
+
+    def helper_modules(self):
+        """Loaded sibling modules that are not scripts (and not in KEEP_ON_RELOAD)."""
+        helpers = []
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if (path and os.path.dirname(os.path.abspath(path)) == BASE_DIR
+                    and name not in self.modules and name not in KEEP_ON_RELOAD):
+                helpers.append((name, module))
+        return helpers
+
+    def reload(self):
+        """
+        Wait for in-flight requests, then re-import the helper modules and every
+        loaded script, so that module-level caches (models, prediction caches,
+        file hashes, mapped arrays) are dropped and rebuilt from current
+        data/artifacts. Helpers go first so the scripts bind to the new code.
+        """
+        self.lock.acquire_exclusive()
+        try:
+            with self._import_lock:
+                helpers = []
+                for name, module in self.helper_modules():
+                    importlib.reload(module)
+                    helpers.append(name)
+                reloaded = []
+                for name, module in list(self.modules.items()):
+                    self.modules[name] = importlib.reload(module)
+                    reloaded.append(name)
+            return {"reloaded": reloaded, "helpers": helpers}
+        finally:
+            self.lock.release_exclusive()
+
+    # -------------- Request Handling --------------
+    def call(self, method, params):
+        if method == "ping":
+            return {"uptime": round(time.time() - self.started, 3), "handled": self.handled}
+        if method == "reload":
+            return self.reload()
+        if method not in METHODS:
+            raise KeyError(f"Unknown method: {method}")
+
+        module_name, func_name = METHODS[method]
+        self.lock.acquire_shared()
+        try:
+            func = getattr(self.get_module(module_name), func_name)
+            if isinstance(params, list):
+                return func(*params)
+            return func(**(params or {}))
+        finally:
+            self.lock.release_shared()
+
+    def handle(self, request):
+        request_id = request.get("id")
+        try:
+            with instrumentation.collect(str(request.get("method"))) as record:
+                result = self.call(request.get("method"), request.get("params"))
+                with instrumentation.stage("serialize"):
+                    body = serialization.RawJSON(serialization.dumps(result))
+            response = {"id": request_id, "result": body}
+            if record is not None:
+                response["timing"] = record.block()
+        except BaseException as e:  # scripts may sys.exit() on bad input; never let that kill the server
+            response = {"id": request_id, "error": f"{request.get('method')} failed", "details": str(e) or type(e).__name__}
+        with self._handled_lock:
+            self.handled += 1
+        self.send(response)
+
+    def send(self, response):
+        line = serialization.dumps(response)
+        with self._write_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def serve(self, stream):
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self.send({"id": None, "error": "Invalid JSON request", "details": str(e)})
+                continue
+            if request.get("method") == "reload":
+                # Run reload off the reader thread so stdin keeps draining while it waits.
+                threading.Thread(target=self.handle, args=(request,), daemon=True).start()
+            else:
+                self.executor.submit(self.handle, request)
+        self.executor.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON-lines inference server for the backend scripts.")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("INFERENCE_WORKERS", "4")),
+                        help="number of requests handled concurrently")
+    parser.add_argument("--preload", default=os.environ.get("INFERENCE_PRELOAD", ""),
+                        help="comma-separated methods whose models are loaded at startup, or 'all'")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print an import-time breakdown of this server and exit")
+    args = parser.parse_args()
+    if args.profile_startup:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+
+    # Protocol messages own stdout; anything the scripts print goes to stderr instead.
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    server = InferenceServer(protocol_out, args.workers)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *_: threading.Thread(target=server.reload, daemon=True).start())
+
+    preload = list(METHODS) if args.preload == "all" else [m for m in args.preload.split(",") if m]
+    try:
+        server.warmup(preload)
+    except Exception as e:
+        print(f"Preload failed: {e}", file=sys.stderr)
+    server.send({"id": None, "event": "ready", "methods": sorted(METHODS)})
+    server.serve(sys.stdin)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# backend/scripts/instrumentation.py
+"""
+Per-stage timers and counters for the backend scripts.
+
+Scripts mark their hot-path stages with `with stage("predict"):` or the
+@timed("load_data") decorator, and count events with count("cache_hit").
+Everything recorded while a collect() block is active (one request in the
+inference server, one run of a CLI script) is gathered into a timing block:
+
+    {"total_ms": 12.4,
+     "stages": {"load_model": {"ms": 3.1, "calls": 1}, "predict": {"ms": 0.2, "calls": 1}},
+     "counters": {"artifact_hit": 1}}
+
+CLI runs call collect_process() instead, which collects the whole run and
+writes its block at exit (to stderr when no INSTRUMENTATION_FILE is set, so
+stdout stays the script's JSON output).
+
+Stages may nest (e.g. "fit" inside "tune"), so stage times can add up to more
+than total_ms. Durations measured elsewhere (e.g. in a worker process) are
+added with add().
+
+Settings (environment):
+  INSTRUMENTATION=0         - off switch: stage() returns a shared no-op context
+                              manager, timed() leaves functions undecorated and
+                              count()/add() return immediately
+  INSTRUMENTATION_FILE      - also write each block to this file
+  INSTRUMENTATION_FORMAT    - "jsonl" (default): one JSON line appended per block;
+                              "prometheus": the process-wide totals, rewritten in
+                              the text exposition format after every block
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import tempfile
+import threading
+import functools
+import contextlib
+import contextvars
+
+ENABLED = os.environ.get("INSTRUMENTATION", "1").lower() not in ("0", "off", "false", "no")
+OUTPUT_FILE = os.environ.get("INSTRUMENTATION_FILE", "")
+OUTPUT_FORMAT = os.environ.get("INSTRUMENTATION_FORMAT", "jsonl")
+METRIC_PREFIX = "greenearth"
+
+_current = contextvars.ContextVar("instrumentation_record", default=None)
+_NOOP = contextlib.nullcontext()
+_lock = threading.Lock()
+# Process-wide totals since startup, exported in the Prometheus format
+_totals = {"stages": {}, "counters": {}, "blocks": {}}
+
+
+class Record:
+    """Stage times and counters of one collect() block."""
+    __slots__ = ("label", "started", "finished", "stages", "counters")
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.finished = None
+        self.stages = {}  # name -> [seconds, calls]
+        self.counters = {}
+
+    def block(self):
+        """The timing block as a JSON-ready dict (milliseconds)."""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "total_ms": round((end - self.started) * 1000.0, 3),
+            "stages": {name: {"ms": round(seconds * 1000.0, 3), "calls": calls}
+                       for name, (seconds, calls) in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+# -------------- Recording --------------
+def add(name, seconds, calls=1):
+    """Add a duration measured elsewhere to stage `name`."""
+    if not ENABLED:
+        return
+    record = _current.get()
+    if record is not None:
+        entry = record.stages.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+    with _lock:
+        entry = _totals["stages"].setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+
+
+def count(name, value=1):
+    """Increment counter `name`."""
+    if not ENABLED:
+        return
+    record = _current.get()
+    if record is not None:
+        record.counters[name] = record.counters.get(name, 0) + value
+    with _lock:
+        _totals["counters"][name] = _totals["counters"].get(name, 0) + value
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def stage(name):
+    """Context manager timing the enclosed block as stage `name`."""
+    return _Stage(name) if ENABLED else _NOOP
+
+
+def timed(name):
+    """Decorator timing every call of the function as stage `name`."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# -------------- Collection --------------
+@contextlib.contextmanager
+def _collect(label):
+    record = Record(label)
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+        record.finished = time.perf_counter()
+        with _lock:
+            entry = _totals["blocks"].setdefault(label, [0.0, 0])
+            entry[0] += record.finished - record.started
+            entry[1] += 1
+        if OUTPUT_FILE:
+            write(record)
+
+
+def collect(label):
+    """
+    Gather the stages and counters recorded in this context (thread) into a
+    Record, written to INSTRUMENTATION_FILE on exit. Yields None when disabled.
+    """
+    return _collect(label) if ENABLED else _NOOP
+
+
+def collect_process(label):
+    """Collect everything the main thread records until exit (for CLI runs)."""
+    if not ENABLED:
+        return
+    context = _collect(label)
+    record = context.__enter__()
+
+    def finish():
+        context.__exit__(None, None, None)
+        if not OUTPUT_FILE:
+            print(json.dumps({"timing": dict(record.block(), label=label)}), file=sys.stderr)
+    atexit.register(finish)
+
+
+# -------------- Output --------------
+def prometheus_text():
+    """The process-wide totals in the Prometheus text exposition format."""
+    with _lock:
+        stages = {name: list(entry) for name, entry in _totals["stages"].items()}
+        counters = dict(_totals["counters"])
+        blocks = {label: list(entry) for label, entry in _totals["blocks"].items()}
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    lines = []
+    for metric, kind, help_text, label, rows in (
+        ("stage_seconds_total", "counter", "Time spent in each instrumented stage.", "stage",
+         [(name, seconds) for name, (seconds, _) in stages.items()]),
+        ("stage_calls_total", "counter", "Calls of each instrumented stage.", "stage",
+         [(name, calls) for name, (_, calls) in stages.items()]),
+        ("request_seconds_total", "counter", "Time spent in collected requests, by method.", "method",
+         [(name, seconds) for name, (seconds, _) in blocks.items()]),
+        ("requests_total", "counter", "Collected requests, by method.", "method",
+         [(name, calls) for name, (_, calls) in blocks.items()]),
+        ("events_total", "counter", "Instrumentation counters.", "name", list(counters.items())),
+    ):
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in sorted(rows):
+            lines.append(f'{name}{{{label}="{escape(key)}"}} {value:.6g}' if isinstance(value, float)
+                         else f'{name}{{{label}="{escape(key)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write(record, path=None, fmt=None):
+    """Append `record` as a JSON line, or rewrite the Prometheus totals, at `path`."""
+    path = path or OUTPUT_FILE
+    fmt = fmt or OUTPUT_FORMAT
+    try:
+        if fmt == "prometheus":
+            # atomically replaced so a scraper never reads a partial file
+            directory = os.path.dirname(os.path.abspath(path))
+            fd, staging = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+            with os.fdopen(fd, "w") as f:
+                f.write(prometheus_text())
+            os.replace(staging, path)
+        else:
+            line = json.dumps(dict(record.block(), label=record.label, pid=os.getpid(),
+                                   at=time.strftime('%Y-%m-%dT%H:%M:%S')))
+            with _lock, open(path, "a") as f:
+                f.write(line + "\n")
+    except OSError:
+        # instrumentation must never fail a request
+        pass
@@ -0,0 +1,192 @@
+# backend/scripts/lag_features.py
+import numpy as np
+import pandas as pd
+
+
+def _as_days(dates):
+    return np.asarray(pd.DatetimeIndex(dates).values.astype('datetime64[D]'))
+
+
+def _rolling_max(values, window):
+    """
+    Sliding-window max (window ending at each position) in O(n) using the
+    van Herk/Gil-Werman block prefix/suffix trick. NaNs are ignored; a window
+    with no values yields NaN.
+    """
+    n = values.size
+    if n == 0:
+        return values.copy()
+    filled = np.where(np.isnan(values), -np.inf, values)
+    pad = (-n) % window
+    blocks = np.concatenate([filled, np.full(pad, -np.inf)]).reshape(-1, window)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    out = np.full(n, -np.inf)
+    # window [i - window + 1, i] spans at most two blocks
+    ends = np.arange(window - 1, n)
+    out[window - 1:] = np.maximum(suffix[ends - window + 1], prefix[ends])
+    # the first window - 1 positions only see a partial window starting at 0
+    out[:window - 1] = np.maximum.accumulate(filled[:window - 1])
+    out[np.isneginf(out)] = np.nan
+    return out
+
+
+class LagFeatureEngine:
+    """
+    Lag and rolling-window features for a daily series, stored as a NumPy array
+    indexed by day offset from start_date.
+
+    lags: {feature name: days back} (or a sequence of day offsets, named lag<k>d).
+    rolling_mean / rolling_max: sequences of (window, offset) pairs; the feature
+        for day i aggregates days [i - offset - window + 1, i - offset], ignoring
+        missing days. Offset defaults to 1 (the window ends the day before).
+
+    Days that are missing from the source series are NaN, as are lag sources that
+    fall before start_date or after the last appended day. Feature rows can be
+    requested for days past the end of the series (e.g. a forecast horizon), and
+    new days can be appended without touching history.
+    """
+
+    def __init__(self, start_date, lags=(), rolling_mean=(), rolling_max=(), capacity=1024):
+        self.start = np.datetime64(pd.Timestamp(start_date).date(), 'D')
+        if isinstance(lags, dict):
+            self.lags = dict(lags)
+        else:
+            self.lags = {f"lag{days}d": days for days in lags}
+        self.rolling_mean = [self._window_spec(spec) for spec in rolling_mean]
+        self.rolling_max = [self._window_spec(spec) for spec in rolling_max]
+        self._buffer = np.full(max(capacity, 1), np.nan)
+        self._length = 0
+
+    @staticmethod
+    def _window_spec(spec):
+        if np.isscalar(spec):
+            return int(spec), 1
+        window, offset = spec
+        return int(window), int(offset)
+
+    @classmethod
+    def from_series(cls, dates, values, **config):
+        """
+        Build an engine from (possibly gappy, unsorted) dates and values. When a
+        date appears more than once the last value wins.
+        """
+        days = _as_days(dates)
+        values = np.asarray(values, dtype=np.float64)
+        if days.size == 0:
+            raise ValueError("Cannot build lag features from an empty series")
+        start = days.min()
+        offsets = (days - start).astype(np.int64)
+        length = int(offsets.max()) + 1
+        engine = cls(start, capacity=length, **config)
+        engine._buffer[offsets] = values
+        engine._length = length
+        return engine
+
+    def copy(self):
+        """Independent engine over a copy of the series (e.g. to extend with predictions)."""
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._buffer = self._buffer.copy()
+        return clone
+
+    # -------------- Series Storage --------------
+    @property
+    def values(self):
+        """Daily values from start_date to the last appended day (read-only view)."""
+        view = self._buffer[:self._length]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def end_date(self):
+        return self.start + np.timedelta64(self._length - 1, 'D')
+
+    @property
+    def feature_names(self):
+        names = list(self.lags)
+        names += [f"roll_mean{w}_{o}" for w, o in self.rolling_mean]
+        names += [f"roll_max{w}_{o}" for w, o in self.rolling_max]
+        return names
+
+    @property
+    def max_lookback(self):
+        """Largest number of days back any feature reads."""
+        spans = list(self.lags.values())
+        spans += [w + o - 1 for w, o in self.rolling_mean + self.rolling_max]
+        return max(spans, default=0)
+
+    def offsets(self, dates):
+        """Day offsets from start_date for the given dates."""
+        return (_as_days(dates) - self.start).astype(np.int64)
+
+    def _reserve(self, length):
+        if length > self._buffer.size:
+            grown = np.full(max(length, 2 * self._buffer.size), np.nan)
+            grown[:self._length] = self._buffer[:self._length]
+            self._buffer = grown
+
+    def append(self, values):
+        """Append values for the days following the current end (amortized O(k))."""
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        self._reserve(self._length + values.size)
+        self._buffer[self._length:self._length + values.size] = values
+        self._length += values.size
+
+    def set(self, offsets, values):
+        """Overwrite existing days (e.g. replace a prediction with an observation)."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if offsets.size and (offsets.min() < 0 or offsets.max() >= self._length):
+            raise IndexError("offset outside the stored series")
+        self._buffer[offsets] = values
+
+    # -------------- Feature Computation --------------
+    def _segment(self, lo, hi):
+        """Series values for offsets [lo, hi), NaN outside the stored range."""
+        out = np.full(hi - lo, np.nan)
+        src_lo, src_hi = max(lo, 0), min(hi, self._length)
+        if src_hi > src_lo:
+            out[src_lo - lo:src_hi - lo] = self._buffer[src_lo:src_hi]
+        return out
+
+    def features(self, start, stop):
+        """
+        Feature columns for the contiguous day offsets [start, stop). Only the
+        rows asked for (plus the lookback window) are touched, so computing
+        features for newly appended days does not revisit history.
+        """
+        n = max(stop - start, 0)
+        out = {}
+        for name, days in self.lags.items():
+            out[name] = self._segment(start - days, stop - days)
+
+        for window, offset in self.rolling_mean:
+            seg = self._segment(start - offset - window + 1, stop - offset)
+            present = ~np.isnan(seg)
+            sums = np.concatenate([[0.0], np.cumsum(np.where(present, seg, 0.0))])
+            counts = np.concatenate([[0], np.cumsum(present)])
+            total = sums[window:window + n] - sums[:n]
+            count = counts[window:window + n] - counts[:n]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out[f"roll_mean{window}_{offset}"] = np.where(count > 0, total / count, np.nan)
+
+        for window, offset in self.rolling_max:
+            seg = self._segment(start - offset - window + 1, stop - offset)
+            out[f"roll_max{window}_{offset}"] = _rolling_max(seg, window)[window - 1:window - 1 + n]
+        return out
+
+    def features_for_dates(self, dates):
+        """
+        Feature columns for arbitrary dates (any order, gaps and repeats allowed),
+        gathered from one contiguous computation over their day range.
+        """
+        offsets = self.offsets(dates)
+        if offsets.size == 0:
+            return {name: np.empty(0) for name in self.feature_names}
+        lo = int(offsets.min())
+        block = self.features(lo, int(offsets.max()) + 1)
+        rows = offsets - lo
+        return {name: values[rows] for name, values in block.items()}
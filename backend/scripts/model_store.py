@@ -0,0 +1,127 @@
+# backend/scripts/model_store.py
+import os
+import json
+import hashlib
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+import instrumentation
+
+# -------------- Setup File Paths --------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# ARTIFACTS_DIR holds one sub-directory per model, with one versioned folder per trained artifact.
+ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR") or os.path.join(BASE_DIR, '..', 'artifacts')
+
+METADATA_FILE = 'metadata.json'
+
+# (abs path, mtime_ns, size) -> sha256, so unchanged files are not re-read on every lookup
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+
+def _single_file_hash(path):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        if key in _hash_memo:
+            return _hash_memo[key]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    with _hash_lock:
+        _hash_memo[key] = digest.hexdigest()
+    return _hash_memo[key]
+
+
+def file_hash(*paths):
+    """
+    Return a SHA-256 hex digest over the contents of one or more files.
+
+    Each file's digest is memoized on its (mtime, size), so repeated calls in a
+    long-lived process only re-read files that actually changed.
+    """
+    if len(paths) == 1:
+        return _single_file_hash(paths[0])
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(_single_file_hash(path).encode())
+    return digest.hexdigest()
+
+
+def artifact_path(name, version):
+    return os.path.join(ARTIFACTS_DIR, name, version)
+
+
+def save_artifact(name, version, objects, metadata, arrays=None, files=None):
+    """
+    Persist a trained artifact as <ARTIFACTS_DIR>/<name>/<version>/.
+
+    objects (dict): name -> Python object, each written with joblib.
+    metadata (dict): JSON-serializable description (data hash, params, scores...).
+    arrays (dict): name -> NumPy array, written as .npy so it can be memory-mapped.
+    files (dict): file name -> callable(path) for formats with their own writer
+        (e.g. an XGBoost booster's save_model).
+
+    The folder is written to a temporary location first and renamed into place,
+    so concurrent readers never observe a half-written artifact.
+    """
+    import joblib  # deferred: only needed when an artifact holds pickled objects
+    target = artifact_path(name, version)
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{version}-", dir=parent)
+    try:
+        for key, obj in objects.items():
+            joblib.dump(obj, os.path.join(staging, f"{key}.joblib"))
+        for key, array in (arrays or {}).items():
+            np.save(os.path.join(staging, f"{key}.npy"), array, allow_pickle=False)
+        for filename, writer in (files or {}).items():
+            writer(os.path.join(staging, filename))
+        with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2, sort_keys=True)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target
+
+
+def load_metadata(name, version):
+    """
+    Return the metadata dict of an artifact, or None if it does not exist.
+    """
+    path = os.path.join(artifact_path(name, version), METADATA_FILE)
+    if not os.path.exists(path):
+        instrumentation.count("artifact_miss")
+        return None
+    instrumentation.count("artifact_hit")
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_artifact(name, version, keys):
+    """
+    Load an artifact written by save_artifact.
+
+    Returns a (objects, metadata) tuple, or None if the version is missing.
+    """
+    metadata = load_metadata(name, version)
+    if metadata is None:
+        return None
+    import joblib
+    folder = artifact_path(name, version)
+    objects = {key: joblib.load(os.path.join(folder, f"{key}.joblib")) for key in keys}
+    return objects, metadata
+
+
+def load_arrays(name, version, keys, mmap_mode='r'):
+    """
+    Load the .npy arrays of an artifact, memory-mapped read-only by default.
+    """
+    folder = artifact_path(name, version)
+    return {key: np.load(os.path.join(folder, f"{key}.npy"), mmap_mode=mmap_mode) for key in keys}
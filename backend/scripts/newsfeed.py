@@ -1,53 +1,372 @@
 # backend\scripts\newsfeed.py
-import feedparser
+import os
+import sys
 import json
-from transformers import pipeline
-
-# Instantiate pipelines globally to avoid repeated initialization delays
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-sentiment_analyzer = pipeline("sentiment-analysis")
-headline_generator = pipeline("text-generation", model="gpt2")
-
-def get_air_quality_news():
-    rss_url = "https://news.google.com/rss/search?q=air+quality+AQI+USA&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(rss_url)
-    articles = []
-    for entry in feed.entries[:5]:  # top 5 articles
-        title = entry.title
-        link = entry.link
-        description = entry.summary if "summary" in entry else ""
-        articles.append({"title": title, "description": description, "link": link})
-    return articles
-
-def summarize_text(text):
-    summary = summarizer(text, max_length=50, min_length=25, do_sample=True)[0]['summary_text']
-    return summary
-
-def analyze_sentiment(text):
-    result = sentiment_analyzer(text)[0]
-    return f"{result['label']} (Confidence: {result['score']:.2f})"
-
-def generate_headline(original_title):
-    new_headline = headline_generator(original_title, max_new_tokens=50, num_return_sequences=1)[0]["generated_text"]
-    return new_headline.strip()
-
-def process_articles():
-    articles = get_air_quality_news()
-    processed = []
-    for article in articles:
-        text_to_summarize = article['description'] if article['description'] else article['title']
-        summary = summarize_text(text_to_summarize)
-        sentiment = analyze_sentiment(summary)
-        clickbait_headline = generate_headline(article['title'])
-        processed.append({
-            "original_title": article['title'],
-            "link": article['link'],
-            "summary": summary,
-            "sentiment": sentiment,
-            "clickbait_headline": clickbait_headline
-        })
+import time
+import hashlib
+import tempfile
+import threading
+
+import instrumentation
+import model_store
+
+# -------------- Settings --------------
+RSS_URL = "https://news.google.com/rss/search?q=air+quality+AQI+USA&hl=en-US&gl=US&ceid=US:en"
+# NEWSFEED_SOURCE can point at a local file (e.g. data/fixtures/air_quality_news.xml) instead of the network
+FEED_SOURCE = os.environ.get("NEWSFEED_SOURCE") or RSS_URL
+MAX_ARTICLES = int(os.environ.get("NEWSFEED_ENTRIES", "5"))  # top 5 articles by default
+# Seconds between background refreshes; 0 disables the refresher thread
+REFRESH_SECONDS = float(os.environ.get("NEWSFEED_REFRESH_SECONDS", "900"))
+BATCH_SIZE = int(os.environ.get("NEWSFEED_BATCH_SIZE", "8"))
+# Processed articles are cached as <ARTIFACTS_DIR>/newsfeed/<link hash>-<content hash>.json
+CACHE_DIR = os.path.join(model_store.ARTIFACTS_DIR, 'newsfeed')
+# Latest processed feed plus the conditional-fetch state; this is all the API reads
+STORE_FILE = os.path.join(CACHE_DIR, 'feed_store.json')
+
+# pipeline name -> (task, model); loaded on first use only
+PIPELINES = {
+    "summarizer": ("summarization", "facebook/bart-large-cnn"),
+    # the sentiment-analysis pipeline's default checkpoint, pinned
+    "sentiment_analyzer": ("sentiment-analysis", "distilbert/distilbert-base-uncased-finetuned-sst-2-english"),
+    "headline_generator": ("text-generation", "gpt2"),
+}
+
+# -------------- Model Tiers --------------
+# full:      the checkpoints above, fp32 torch
+# int8:      same checkpoints with dynamic int8 quantization of their Linear layers
+# distilled: smaller distilled checkpoints, read from NEWSFEED_MODEL_DIR/<name> when present
+# onnx:      the full checkpoints exported to ONNX Runtime (needs `pip install optimum[onnxruntime]`)
+TIERS = ("full", "int8", "distilled", "onnx")
+MODEL_TIER = os.environ.get("NEWSFEED_MODEL_TIER", "full")
+MODEL_DIR = os.environ.get("NEWSFEED_MODEL_DIR")
+DISTILLED_MODELS = {
+    "summarizer": "sshleifer/distilbart-cnn-12-6",
+    "sentiment_analyzer": "distilbert/distilbert-base-uncased-finetuned-sst-2-english",
+    "headline_generator": "distilbert/distilgpt2",
+}
+# Exported ONNX models are kept here so the export only happens once
+ONNX_DIR = os.path.join(model_store.ARTIFACTS_DIR, 'newsfeed_onnx')
+# Sampling makes summaries vary between runs; NEWSFEED_DO_SAMPLE=0 gives reproducible output
+DO_SAMPLE = os.environ.get("NEWSFEED_DO_SAMPLE", "1") != "0"
+
+_pipelines = {}
+_pipeline_lock = threading.Lock()
+
+
+def model_source(name, tier=MODEL_TIER):
+    """(task, model id or local path) for a pipeline under the given tier."""
+    if tier not in TIERS:
+        raise ValueError(f"Unknown model tier: {tier} (expected one of {', '.join(TIERS)})")
+    task, model = PIPELINES[name]
+    if tier == "distilled":
+        model = DISTILLED_MODELS[name]
+        if MODEL_DIR:
+            local = os.path.join(MODEL_DIR, model.split('/')[-1])
+            if os.path.isdir(local):
+                model = local
+    return task, model
+
+
+def _onnx_model(task, model, name):
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM, ORTModelForSeq2SeqLM, ORTModelForSequenceClassification
+    except ImportError as e:
+        raise ImportError("The onnx tier needs optimum[onnxruntime] installed") from e
+    ort_class = {
+        "summarization": ORTModelForSeq2SeqLM,
+        "sentiment-analysis": ORTModelForSequenceClassification,
+        "text-generation": ORTModelForCausalLM,
+    }[task]
+    exported = os.path.join(ONNX_DIR, name)
+    if os.path.isdir(exported):
+        return ort_class.from_pretrained(exported), exported
+    ort_model = ort_class.from_pretrained(model, export=True)
+    ort_model.save_pretrained(exported)
+    return ort_model, model
+
+
+def build_pipeline(name, tier=MODEL_TIER):
+    from transformers import pipeline
+    task, model = model_source(name, tier)
+    if tier == "onnx":
+        from transformers import AutoTokenizer
+        ort_model, tokenizer_source = _onnx_model(task, model, name)
+        pipe = pipeline(task, model=ort_model, tokenizer=AutoTokenizer.from_pretrained(tokenizer_source))
+    else:
+        pipe = pipeline(task, model=model)
+        if tier == "int8":
+            import torch
+            pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+    if task == "text-generation":
+        # gpt2 has no pad token; batched generation needs one (left padding for decoder-only models)
+        pipe.tokenizer.pad_token_id = pipe.model.config.eos_token_id
+        pipe.tokenizer.padding_side = "left"
+    return pipe
+
+
+def get_pipeline(name, tier=MODEL_TIER):
+    """
+    Build a pipeline for the tier the first time it is needed and keep it.
+    """
+    with _pipeline_lock:
+        if (tier, name) not in _pipelines:
+            with instrumentation.stage("load_model"):
+                _pipelines[(tier, name)] = build_pipeline(name, tier)
+        return _pipelines[(tier, name)]
+
+
+# -------------- Fetching --------------
+@instrumentation.timed("fetch")
+def fetch_feed(source=FEED_SOURCE, etag=None, modified=None):
+    """
+    Parse an RSS feed from a URL or a local file path. With etag/modified the
+    request is conditional and an unchanged feed comes back with status 304.
+    """
+    import feedparser
+    return feedparser.parse(source, etag=etag, modified=modified)
+
+
+def entry_article(entry):
+    return {
+        "id": entry.get("id") or entry.link,
+        "title": entry.title,
+        "description": entry.summary if "summary" in entry else "",
+        "link": entry.link
+    }
+
+
+def get_air_quality_news(fetch=fetch_feed, source=FEED_SOURCE, limit=MAX_ARTICLES):
+    feed = fetch(source)
+    return [entry_article(entry) for entry in feed.entries[:limit]]
+
+
+# -------------- Article Cache --------------
+def cache_key(article, tier=MODEL_TIER):
+    """
+    Link hash + hash of the text the models read (and the model tier), so an
+    article whose title or description is edited upstream is processed again.
+    """
+    link = hashlib.sha256(article['link'].encode()).hexdigest()[:16]
+    text = f"{article['title']}\n{article['description']}"
+    if tier != "full":
+        text = f"{tier}\n{text}"
+    content = hashlib.sha256(text.encode()).hexdigest()[:16]
+    return f"{link}-{content}"
+
+
+def load_cached(article, cache_dir=CACHE_DIR):
+    try:
+        with open(os.path.join(cache_dir, cache_key(article) + '.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def save_cached(article, processed, cache_dir=CACHE_DIR):
+    _write_json(os.path.join(cache_dir, cache_key(article) + '.json'), processed)
+
+
+# -------------- Batched Inference --------------
+@instrumentation.timed("summarize")
+def summarize_texts(texts, pipelines=None):
+    summarizer = (pipelines or {}).get("summarizer") or get_pipeline("summarizer")
+    results = summarizer(texts, max_length=50, min_length=25, do_sample=DO_SAMPLE, batch_size=BATCH_SIZE)
+    return [result['summary_text'] for result in results]
+
+
+@instrumentation.timed("sentiment")
+def analyze_sentiments(texts, pipelines=None):
+    sentiment_analyzer = (pipelines or {}).get("sentiment_analyzer") or get_pipeline("sentiment_analyzer")
+    results = sentiment_analyzer(texts, batch_size=BATCH_SIZE)
+    return [f"{result['label']} (Confidence: {result['score']:.2f})" for result in results]
+
+
+@instrumentation.timed("headline")
+def generate_headlines(titles, pipelines=None):
+    headline_generator = (pipelines or {}).get("headline_generator") or get_pipeline("headline_generator")
+    results = headline_generator(titles, max_new_tokens=50, num_return_sequences=1, batch_size=BATCH_SIZE)
+    return [result[0]["generated_text"].strip() for result in results]
+
+
+def process_articles(articles=None, pipelines=None, cache_dir=CACHE_DIR):
+    """
+    Summarize, score and re-headline articles. Cached articles are returned
+    as-is; the rest go through each pipeline as one batch, so the models are
+    only loaded when there is something new to process.
+
+    pipelines: optional {name: callable} overriding the Hugging Face pipelines.
+    """
+    if articles is None:
+        articles = get_air_quality_news()
+    processed = [load_cached(article, cache_dir) if cache_dir else None for article in articles]
+    pending = [article for article, cached in zip(articles, processed) if cached is None]
+    instrumentation.count("article_cache_hit", len(articles) - len(pending))
+    instrumentation.count("article_cache_miss", len(pending))
+
+    if pending:
+        texts = [article['description'] if article['description'] else article['title'] for article in pending]
+        summaries = summarize_texts(texts, pipelines)
+        sentiments = analyze_sentiments(summaries, pipelines)
+        headlines = generate_headlines([article['title'] for article in pending], pipelines)
+        fresh = iter(zip(pending, summaries, sentiments, headlines))
+        for i, cached in enumerate(processed):
+            if cached is not None:
+                continue
+            article, summary, sentiment, clickbait_headline = next(fresh)
+            processed[i] = {
+                "original_title": article['title'],
+                "link": article['link'],
+                "summary": summary,
+                "sentiment": sentiment,
+                "clickbait_headline": clickbait_headline
+            }
+            if cache_dir:
+                save_cached(article, processed[i], cache_dir)
     return processed
 
+
+# -------------- Incremental Refresh --------------
+_refresh_lock = threading.Lock()
+
+
+@instrumentation.timed("load_data")
+def load_store(store_file=STORE_FILE):
+    try:
+        with open(store_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def entry_key(article):
+    """(feed entry id, content hash): a new key for a new entry or an upstream edit of one."""
+    return (article["id"], cache_key(article))
+
+
+def refresh(source=FEED_SOURCE, limit=MAX_ARTICLES, fetch=fetch_feed, pipelines=None, store_file=STORE_FILE):
+    """
+    Fetch the feed conditionally (ETag/Last-Modified from the previous refresh)
+    and process only entries whose id and content (see entry_key) are not
+    already in the store, so an entry edited upstream is processed again and
+    replaces its old version. The newest `limit` processed articles are written
+    to the store that run() serves; an entry that drops out of it and later
+    returns is processed again (usually straight from the per-article cache).
+
+    Returns a summary: {"status", "new", "articles"}.
+    """
+    with _refresh_lock:
+        store = load_store(store_file) or {}
+        if store.get("source") != source or store.get("tier", "full") != MODEL_TIER:
+            # a different feed or model tier invalidates the validators and the stored articles
+            store = {"source": source, "tier": MODEL_TIER, "articles": [], "keys": []}
+        if store.get("limit") != limit:
+            # more entries may be wanted than the last full fetch returned
+            store.update(etag=None, modified=None, limit=limit)
+        feed = fetch(source, etag=store.get("etag"), modified=store.get("modified"))
+        status = getattr(feed, "status", None)
+        store["checked_at"] = time.time()
+
+        if status == 304:
+            _write_json(store_file, store)
+            return {"status": 304, "new": 0, "articles": len(store["articles"])}
+        if getattr(feed, "bozo", False) and not feed.entries:
+            raise RuntimeError(f"Failed to fetch feed: {getattr(feed, 'bozo_exception', 'no entries')}")
+
+        # stored article for each (id, content hash); "keys" runs parallel to "articles"
+        stored = {tuple(key): article for key, article in zip(store.get("keys", []), store["articles"])}
+        entries = [entry_article(entry) for entry in feed.entries[:limit]]
+        new = [article for article in entries if entry_key(article) not in stored]
+        processed = process_articles(new, pipelines=pipelines) if new else []
+        stored.update(zip(map(entry_key, new), processed))
+
+        # current feed order first, then older articles that have dropped out of it
+        # (an older version of an entry that is still in the feed is dropped)
+        current = list(dict.fromkeys(map(entry_key, entries)))
+        ids = {key[0] for key in current}
+        keys = current + [key for key in stored if key not in current and key[0] not in ids]
+        keys = keys[:limit]
+        store.update({
+            "etag": getattr(feed, "etag", None),
+            "modified": getattr(feed, "modified", None),
+            "articles": [stored[key] for key in keys],
+            "keys": [list(key) for key in keys],
+            "refreshed_at": store["checked_at"]
+        })
+        _write_json(store_file, store)
+        return {"status": status, "new": len(new), "articles": len(store["articles"])}
+
+
+def _refresh_loop(interval, stop, **kwargs):
+    while not stop.is_set():
+        try:
+            with instrumentation.collect("newsfeed_refresh"):
+                result = refresh(**kwargs)
+            print(f"newsfeed refresh: {json.dumps(result)}", file=sys.stderr)
+        except Exception as e:
+            print(f"newsfeed refresh failed: {e}", file=sys.stderr)
+        stop.wait(interval)
+
+
+_refresher = None
+
+
+def start_refresher(interval=REFRESH_SECONDS, **kwargs):
+    """
+    Start the background refresh thread (once per process); kwargs go to refresh().
+    Returns the thread's stop event, or None when refreshing is disabled.
+    """
+    global _refresher
+    if interval <= 0:
+        return None
+    for thread in threading.enumerate():
+        # survives importlib.reload() of this module inside the inference server
+        if thread.name == "newsfeed-refresher" and thread.is_alive():
+            return getattr(thread, "stop_event", None)
+    stop = threading.Event()
+    _refresher = threading.Thread(target=_refresh_loop, args=(interval, stop), kwargs=kwargs,
+                                  name="newsfeed-refresher", daemon=True)
+    _refresher.stop_event = stop
+    _refresher.start()
+    return stop
+
+
+def run():
+    """
+    Serve the latest refreshed articles from the local store; never runs the
+    models itself. Until the first refresh finishes the article list is empty.
+    """
+    start_refresher()
+    store = load_store() or {}
+    return {"articles": store.get("articles", []), "refreshed_at": store.get("refreshed_at")}
+
+
 if __name__ == "__main__":
-    output = {"articles": process_articles()}
-    print(json.dumps(output))
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+    instrumentation.collect_process(os.path.basename(__file__))
+    # refresh            -> one conditional refresh (e.g. from cron), prints its summary
+    # refresher [SECS]   -> refresh every SECS seconds until interrupted
+    # (no arguments)     -> refresh once, then print the stored articles
+    mode = sys.argv[1] if len(sys.argv) > 1 else None
+    try:
+        if mode == "refresh":
+            print(json.dumps(refresh()))
+        elif mode == "refresher":
+            interval = float(sys.argv[2]) if len(sys.argv) > 2 else REFRESH_SECONDS
+            _refresh_loop(interval, threading.Event())
+        else:
+            refresh()
+            store = load_store() or {}
+            print(json.dumps({"articles": store.get("articles", []), "refreshed_at": store.get("refreshed_at")}))
+    except Exception as e:
+        print(json.dumps({"error": "Failed to refresh newsfeed", "details": str(e)}))
+        sys.exit(1)
@@ -0,0 +1,228 @@
+# backend/scripts/plot_renderer.py
+"""
+Content-addressed, off-request rendering of the regression report plots.
+
+submit(kind, payload) names the PNG after a hash of its input data and returns
+its /plots URL straight away. If that file already exists it is simply reused;
+otherwise it is rendered by a pool of PLOT_WORKERS processes (each with its own
+matplotlib state), written to a temporary file and renamed into place, so the
+URL starts resolving once the image is complete and never serves a partial
+file. PLOT_WORKERS=0 renders in the calling thread instead.
+"""
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+
+import numpy as np
+
+import instrumentation
+
+# Headless backend chosen before anything can import pyplot (workers and servers have no display)
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Served statically by the Node server under /plots
+PLOTS_DIR = os.path.join(BASE_DIR, '..', 'plots')
+PLOT_WORKERS = int(os.environ.get("PLOT_WORKERS", "1"))
+# Rendered files kept per plot kind; older ones are removed
+MAX_PLOTS_PER_KIND = int(os.environ.get("MAX_PLOTS_PER_KIND", "20"))
+# Bumped whenever a renderer changes, so cached files are not reused
+PLOT_FORMAT = 1
+
+_executor = None
+_pending = {}  # filename -> Future
+_lock = threading.Lock()
+
+
+# -------------- Renderers --------------
+# Each takes the payload given to submit() and the output path; run in a worker process.
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+def draw_model_performance(payload, path):
+    import pandas as pd
+    plt, _ = _pyplot()
+    results_df = pd.DataFrame(payload["results"]).T
+    results_df[['MAE', 'MSE', 'R2']].plot(kind='bar', colormap='viridis')
+    plt.title("Model Performance Comparison")
+    plt.ylabel("Score")
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path, format='png')
+    plt.close('all')
+
+
+def draw_actual_vs_predicted(payload, path):
+    plt, sns = _pyplot()
+    plt.figure(figsize=(10, 6))
+    sns.scatterplot(x=payload["actual"], y=payload["predicted"])
+    plt.xlabel("Actual PM2.5 Concentration")
+    plt.ylabel("Predicted PM2.5 Concentration")
+    plt.title("Actual vs Predicted PM2.5 Concentration")
+    plt.tight_layout()
+    plt.savefig(path, format='png')
+    plt.close('all')
+
+
+def draw_feature_importance(payload, path):
+    import pandas as pd
+    plt, sns = _pyplot()
+    importance_df = pd.DataFrame({'Feature': payload["features"], 'Importance': payload["importance"]})
+    importance_df = importance_df.sort_values(by='Importance', ascending=False)
+    plt.figure(figsize=(12, 6))
+    sns.barplot(x=importance_df['Importance'], y=importance_df['Feature'], hue=importance_df['Feature'],
+                palette='viridis', legend=False)
+    plt.title(f"Feature Importance ({payload['model_name']})")
+    plt.xlabel("Importance")
+    plt.ylabel("Feature")
+    plt.tight_layout()
+    plt.savefig(path, format='png')
+    plt.close('all')
+
+
+def draw_pm25_distribution(payload, path):
+    plt, sns = _pyplot()
+    plt.figure(figsize=(10, 6))
+    sns.histplot(payload["values"], bins=30, kde=True, color='blue')
+    plt.title("Distribution of PM2.5 Concentration")
+    plt.xlabel("PM2.5 Concentration")
+    plt.ylabel("Frequency")
+    plt.tight_layout()
+    plt.savefig(path, format='png')
+    plt.close('all')
+
+
+RENDERERS = {
+    "model_performance": draw_model_performance,
+    "actual_vs_predicted": draw_actual_vs_predicted,
+    "feature_importance": draw_feature_importance,
+    "pm25_distribution": draw_pm25_distribution,
+}
+
+
+def render(kind, payload, path):
+    """Draw one plot into `path` atomically (temporary file + rename)."""
+    fd, staging = tempfile.mkstemp(prefix=".render-", suffix=".png", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        RENDERERS[kind](payload, staging)
+        os.replace(staging, path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+    return path
+
+
+# -------------- Content Addressing --------------
+def content_hash(kind, payload):
+    """SHA-256 over the plot kind, PLOT_FORMAT and the payload (arrays by dtype, shape and bytes)."""
+    digest = hashlib.sha256(f"{kind}:{PLOT_FORMAT}".encode())
+    for key in sorted(payload):
+        value = payload[key]
+        digest.update(key.encode())
+        if isinstance(value, (np.ndarray, list, tuple)) and not isinstance(value, str):
+            array = np.ascontiguousarray(np.asarray(value))
+            if array.dtype.kind in "OUS":
+                digest.update(json.dumps(array.tolist(), default=str).encode())
+            else:
+                digest.update(str((array.dtype, array.shape)).encode())
+                digest.update(array.tobytes())
+        else:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def plot_url(filename):
+    return f"/plots/{filename}"
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawned, not forked: the inference server calls this from worker threads, and a forked
+        # child can inherit locks (e.g. the import lock) held by another thread
+        _executor = ProcessPoolExecutor(max_workers=PLOT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def _prune(kind):
+    """Keep the MAX_PLOTS_PER_KIND most recently rendered or reused files of one kind."""
+    prefix = f"{kind}-"
+    files = [os.path.join(PLOTS_DIR, f) for f in os.listdir(PLOTS_DIR)
+             if f.startswith(prefix) and f.endswith(".png")]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[MAX_PLOTS_PER_KIND:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _finished(filename, kind, future):
+    with _lock:
+        _pending.pop(filename, None)
+    error = future.exception()
+    if error is not None:
+        logging.error(f"Rendering {filename} failed: {error}")
+    else:
+        _prune(kind)
+
+
+@instrumentation.timed("plot")
+def submit(kind, payload):
+    """
+    Return the URL of the plot for `payload`, scheduling it for rendering
+    unless an identical plot already exists or is being rendered.
+    """
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    filename = f"{kind}-{content_hash(kind, payload)[:16]}.png"
+    path = os.path.join(PLOTS_DIR, filename)
+    with _lock:
+        if filename in _pending:
+            instrumentation.count("plot_reused")
+            return plot_url(filename)
+        try:
+            # mark an existing plot recently used, so _prune does not remove it right after its URL is returned
+            os.utime(path)
+        except OSError:
+            pass  # not rendered yet (or just pruned): render it below
+        else:
+            instrumentation.count("plot_reused")
+            return plot_url(filename)
+        instrumentation.count("plot_scheduled")
+        if PLOT_WORKERS <= 0:
+            future = None
+        else:
+            future = _get_executor().submit(render, kind, payload, path)
+            _pending[filename] = future
+    if future is None:
+        render(kind, payload, path)
+        _prune(kind)
+    else:
+        future.add_done_callback(lambda f: _finished(filename, kind, f))
+    return plot_url(filename)
+
+
+def pending(urls):
+    """The URLs among `urls` (None entries ignored) whose files are not rendered yet."""
+    with _lock:
+        rendering = {plot_url(name) for name in _pending}
+    return [url for url in urls if url and url in rendering]
+
+
+def wait(timeout=None):
+    """Block until every scheduled plot is rendered (e.g. before a CLI run exits)."""
+    with _lock:
+        futures = list(_pending.values())
+    wait_futures(futures, timeout=timeout)
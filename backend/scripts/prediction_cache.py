@@ -0,0 +1,233 @@
+# backend/scripts/prediction_cache.py
+"""
+Memoized predictions keyed by quantized inputs.
+
+Inputs are snapped to a grid (e.g. temperature to 0.5 °F, humidity to 1 %)
+before both the lookup and the prediction, so near-identical requests share
+one entry and a cached answer is exactly what the model returns for the
+snapped inputs. Entries are kept in an in-memory LRU of at most `max_entries`
+and written through to a small SQLite file, so they survive restarts: a
+memory miss falls back to the file before the model is called. Entries expire
+after `ttl` seconds and are tied to a model version; the first lookup under a
+new version drops every entry of the older ones.
+"""
+import os
+import json
+import math
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import instrumentation
+import model_store
+
+CACHE_PATH = os.path.join(model_store.ARTIFACTS_DIR, 'prediction_cache.sqlite')
+
+
+def parse_quantization(text):
+    """{"temperature": 0.5, ...} from "temperature=0.5,humidity=1"."""
+    steps = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, step = item.partition("=")
+        steps[name.strip()] = float(step)
+    return steps
+
+
+def quantize(value, step):
+    """`value` snapped to the nearest multiple of `step` (unchanged when step is 0)."""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Cannot quantize non-finite value {value}")
+    if not step:
+        return value
+    # rounded again so that e.g. 0.1 * 7 is stored as 0.7
+    return round(round(value / step) * step, 10)
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache of JSON-serializable predictions in front of one model,
+    persisted to the `predictions` table of a SQLite file shared by every cache.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS predictions (
+            cache TEXT NOT NULL,
+            version TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (cache, version, key)
+        )
+    """
+
+    def __init__(self, name, quantization, max_entries=4096, ttl=86400.0, path=CACHE_PATH):
+        self.name = name
+        self.quantization = dict(quantization)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.version = None
+        self._entries = OrderedDict()  # key -> (value, created_at), least recently used first
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            try:
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+                with self._conn:
+                    self._conn.execute(self.SCHEMA)
+            except sqlite3.Error:
+                # the cache still works in memory without its file
+                self._conn = None
+        self.stats_counts = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self._seconds = {"hits": 0.0, "misses": 0.0}
+
+    # -------------- Keys --------------
+    def snap(self, inputs):
+        """The inputs with every quantized field snapped to its grid."""
+        return {name: quantize(value, self.quantization[name]) if name in self.quantization else value
+                for name, value in inputs.items()}
+
+    @staticmethod
+    def key(snapped):
+        return json.dumps(snapped, sort_keys=True)
+
+    # -------------- Storage --------------
+    def _use_version(self, version):
+        """Drop every entry (in memory and on disk) that belongs to another model version."""
+        if version == self.version:
+            return
+        self.version = version
+        self._entries.clear()
+        if self._conn is not None:
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM predictions WHERE cache=? AND version<>?", (self.name, version))
+            except sqlite3.Error:
+                pass
+
+    def _expired(self, created_at, now):
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None and self._conn is not None:
+            try:
+                row = self._conn.execute("SELECT value, created_at FROM predictions WHERE cache=? AND version=? AND key=?",
+                                         (self.name, self.version, key)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is not None:
+                entry = (json.loads(row[0]), row[1])
+                self._remember(key, entry)
+                self.stats_counts["disk_hits"] += 1
+        if entry is None:
+            return None
+        if self._expired(entry[1], now):
+            self._entries.pop(key, None)
+            self.stats_counts["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats_counts["evictions"] += 1
+
+    def _store(self, key, value, now):
+        self._remember(key, (value, now))
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                                   (self.name, self.version, key, json.dumps(value), now))
+                # the file keeps the newest max_entries entries of this cache
+                self._conn.execute(
+                    "DELETE FROM predictions WHERE cache=? AND rowid NOT IN "
+                    "(SELECT rowid FROM predictions WHERE cache=? ORDER BY created_at DESC LIMIT ?)",
+                    (self.name, self.name, self.max_entries))
+        except sqlite3.Error:
+            pass
+
+    # -------------- Lookup --------------
+    def get_or_compute(self, version, inputs, compute):
+        """
+        The cached value for `inputs` under model `version`, or compute(snapped inputs),
+        stored before it is returned. Values must round-trip through JSON.
+        """
+        started = time.perf_counter()
+        snapped = self.snap(inputs)
+        key = self.key(snapped)
+        with self._lock:
+            self._use_version(version)
+            value = self._lookup(key, time.time())
+        if value is not None:
+            instrumentation.count("prediction_cache_hit")
+            self._record("hits", started)
+            return value
+
+        instrumentation.count("prediction_cache_miss")
+        # JSON round trip so a miss returns exactly what a later hit would
+        value = json.loads(json.dumps(compute(snapped)))
+        with self._lock:
+            if version == self.version:
+                self._store(key, value, time.time())
+        self._record("misses", started)
+        return value
+
+    def _record(self, outcome, started):
+        with self._lock:
+            self.stats_counts[outcome] += 1
+            self._seconds[outcome] += time.perf_counter() - started
+
+    def clear(self):
+        """Drop every entry of this cache."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM predictions WHERE cache=?", (self.name,))
+
+    def stats(self):
+        """Hit rate, mean hit/miss latency (ms) and entry counts since the cache was created."""
+        with self._lock:
+            counts = dict(self.stats_counts)
+            seconds = dict(self._seconds)
+            entries = len(self._entries)
+            stored = None
+            if self._conn is not None:
+                try:
+                    stored = self._conn.execute("SELECT COUNT(*) FROM predictions WHERE cache=?",
+                                                (self.name,)).fetchone()[0]
+                except sqlite3.Error:
+                    pass
+        lookups = counts["hits"] + counts["misses"]
+
+        def mean_ms(outcome):
+            return round(seconds[outcome] / counts[outcome] * 1000.0, 3) if counts[outcome] else None
+
+        return dict(
+            counts,
+            cache=self.name,
+            version=self.version,
+            lookups=lookups,
+            hit_rate=round(counts["hits"] / lookups, 4) if lookups else None,
+            hit_ms=mean_ms("hits"),
+            miss_ms=mean_ms("misses"),
+            entries=entries,
+            stored_entries=stored,
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl,
+            quantization=self.quantization,
+        )
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,103 @@
+# backend/scripts/serialization.py
+import json
+import uuid
+
+import numpy as np
+
+# orjson is optional; the standard library encoder is used when it is not installed.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+
+class RawJSON:
+    """
+    Already-encoded JSON text to embed as-is when the enclosing object is dumped
+    (e.g. a large records array produced by records_json()).
+    """
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    Serialize obj to a JSON string. NumPy scalars/arrays are converted natively
+    and RawJSON values are spliced in without being re-encoded.
+    """
+    fragments = {}
+
+    def default(value):
+        if isinstance(value, RawJSON):
+            key = f"@raw-{uuid.uuid4().hex}"
+            fragments[key] = value.text
+            return key
+        return _default(value)
+
+    if orjson is not None:
+        text = orjson.dumps(obj, default=default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    else:
+        text = json.dumps(obj, default=default)
+    for key, raw in fragments.items():
+        text = text.replace(f'"{key}"', raw, 1)
+    return text
+
+
+def column_tokens(values):
+    """
+    Encode a whole column of scalars to a list of JSON tokens with one encoder call.
+
+    A raw newline can never appear inside an encoded JSON value (it is escaped
+    inside strings), so it is safe to use as the separator to split on.
+    """
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == 'f' and np.isnan(values).any():
+            # NaN is not valid JSON; emit null like orjson does
+            values = np.where(np.isnan(values), None, values.astype(object))
+        values = values.tolist()
+    else:
+        values = list(values)
+    if not values:
+        return []
+    return json.dumps(values, separators=('\n', ':'), default=_default)[1:-1].split('\n')
+
+
+def _row_template(names, item_sep=",", key_sep=":"):
+    # %-formatting template with the keys pre-encoded, e.g. {"date":%s,"value":%s}
+    fields = [json.dumps(name).replace('%', '%%') + key_sep + '%s' for name in names]
+    return "{" + item_sep.join(fields) + "}"
+
+
+def records_json(columns):
+    """
+    Serialize equal-length columns (name -> array/list) as a JSON array of
+    records, without building a dict per row. Returns a RawJSON fragment.
+    """
+    names = list(columns)
+    tokens = [column_tokens(columns[name]) for name in names]
+    # same spacing as json.dumps' defaults
+    template = _row_template(names, ", ", ": ")
+    return RawJSON("[" + ", ".join([template % row for row in zip(*tokens)]) + "]")
+
+
+def write_jsonl(columns, stream, chunk_size=10000):
+    """
+    Stream equal-length columns to `stream` as JSON lines, one record per line.
+    """
+    names = list(columns)
+    template = _row_template(names)
+    length = len(columns[names[0]]) if names else 0
+    for lo in range(0, length, chunk_size):
+        hi = min(lo + chunk_size, length)
+        tokens = [column_tokens(columns[name][lo:hi]) for name in names]
+        stream.write("".join([template % row + "\n" for row in zip(*tokens)]))
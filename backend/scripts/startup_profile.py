@@ -0,0 +1,94 @@
+# backend/scripts/startup_profile.py
+"""
+Import-time breakdown of a backend script, from `python -X importtime`.
+
+Every script accepts --profile-startup, which imports the script again in a
+fresh interpreter (so nothing is cached from the current process) and prints:
+
+  total_ms  - cumulative time to import the script
+  imports   - its direct imports, slowest first (cumulative and self ms)
+  heaviest  - the slowest modules anywhere in the import tree, by self time
+
+Usage:
+    python startup_profile.py [SCRIPT ...]     (default: every script in SCRIPTS)
+    python <script>.py --profile-startup
+"""
+import os
+import sys
+import json
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = [
+    "activity_recommender", "activityrecommendationv2", "aqi_prediction", "capstone_airquality",
+    "airquality_regression", "tract_index", "newsfeed", "inference_server",
+]
+# Entries listed under "imports" and "heaviest"
+TOP_N = int(os.environ.get("STARTUP_PROFILE_TOP", "10"))
+
+
+def parse_importtime(stderr):
+    """
+    [(module, depth, self_us, cumulative_us)] from -X importtime output, in the order printed
+    (a module's nested imports come before it).
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append((stripped.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _ms(us):
+    return round(us / 1000.0, 1)
+
+
+def report(script):
+    """Profile importing `script` (a module name or path) in a fresh interpreter."""
+    module = os.path.splitext(os.path.basename(script))[0]
+    env = dict(os.environ, PYTHONPATH=BASE_DIR)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit code {proc.returncode}")
+
+    rows = parse_importtime(proc.stderr)
+    # the script is the last top-level entry; its direct imports are the depth-1 rows just before it
+    end = max(i for i, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    direct = [row for row in rows[start:end] if row[1] == 1]
+    tree = rows[start:end + 1]
+    return {
+        "script": module,
+        "total_ms": _ms(rows[end][3]),
+        "modules": len(tree),
+        "imports": [{"module": name, "cumulative_ms": _ms(cumulative), "self_ms": _ms(self_us)}
+                    for name, _, self_us, cumulative in sorted(direct, key=lambda r: -r[3])[:TOP_N]],
+        "heaviest": [{"module": name, "self_ms": _ms(self_us)}
+                     for name, _, self_us, _ in sorted(tree, key=lambda r: -r[2])[:TOP_N]],
+    }
+
+
+def profile_and_exit(script):
+    """Print report(script) as JSON and exit; used by each script's --profile-startup flag."""
+    try:
+        print(json.dumps(report(script), indent=2))
+    except Exception as e:
+        print(json.dumps({"error": "Failed to profile startup", "details": str(e)}))
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    try:
+        print(json.dumps([report(script) for script in sys.argv[1:] or SCRIPTS], indent=2))
+    except Exception as e:
+        print(json.dumps({"error": "Failed to profile startup", "details": str(e)}))
+        sys.exit(1)
@@ -0,0 +1,246 @@
+# backend/scripts/tract_index.py
+"""
+Sorted, memory-mapped index over AllYearsAirQualityCalculations.csv for
+tract/year lookups.
+
+build() sorts the rows by (geoid, year) once and saves them as .npy columns
+(a model_store artifact keyed by the CSV hash), together with:
+
+  geoids / tract_start      - sorted tract ids and each tract's row range
+  geoid20_sorted / _tract   - numeric geoid20 -> tract, for lookups by number
+  years / year_start        - the years and each year's range in by_year
+  by_year                   - row numbers ordered by year, then PM2.5 (worst first)
+
+Every query is a few binary searches over mapped arrays: a tract's rows are
+tract_start[i]:tract_start[i + 1] (its years ascending within), and the N
+worst tracts of a year are the first N entries of that year's by_year range.
+
+Usage:
+    python tract_index.py build
+    python tract_index.py lookup TRACT [TRACT ...] [--year Y | --years FROM-TO]
+    python tract_index.py worst YEAR [N]
+TRACT is a geoid (1400000US06037115103) or a geoid20 (6037115103).
+"""
+import os
+import sys
+import json
+import threading
+
+import numpy as np
+
+import instrumentation
+import model_store
+
+DATA_FILE = os.environ.get("DATA_FILE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'AllYearsAirQualityCalculations.csv')
+
+# Index artifacts live under <ARTIFACTS_DIR>/tract_index/<CSV hash prefix>-v<format>/
+# (2: population and percentile stored as float, NaN when missing)
+ARTIFACT_NAME = 'tract_index'
+ARTIFACT_FORMAT = 2
+# Row columns, as returned by every query
+VALUE_COLUMNS = ["year", "denom_total_pop", "pm25_concentration", "pm25_concentration_pctile"]
+ARRAYS = ["geoids", "tract_geoid20", "tract_start", "geoid20_sorted", "geoid20_tract", "row_tract",
+          "years", "year_start", "by_year"] + VALUE_COLUMNS
+MAX_WORST = 1000
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def index_version(data_file=DATA_FILE):
+    return f"{model_store.file_hash(data_file)[:16]}-v{ARTIFACT_FORMAT}"
+
+
+# -------------- Build --------------
+@instrumentation.timed("build_index")
+def build(data_file=DATA_FILE):
+    """Sort the dataset into the index arrays and save them; returns the artifact metadata."""
+    import data_store
+    df = data_store.load(data_file)
+    geoid = df["geoid"].astype(str).to_numpy()
+    year = df["year"].to_numpy(np.int64)
+    pm25 = df["pm25_concentration"].to_numpy(np.float64)
+
+    order = np.lexsort((year, geoid))
+    geoids, row_tract = np.unique(geoid[order], return_inverse=True)
+    tract_start = np.searchsorted(row_tract, np.arange(len(geoids) + 1)).astype(np.int64)
+    tract_geoid20 = df["geoid20"].to_numpy(np.int64)[order][tract_start[:-1]]
+    geoid20_tract = np.argsort(tract_geoid20, kind="stable").astype(np.int64)
+
+    # by year, then worst PM2.5 first (missing values last), then geoid for stable ties
+    sorted_year, sorted_pm25 = year[order], pm25[order]
+    by_year = np.lexsort((row_tract, np.where(np.isnan(sorted_pm25), np.inf, -sorted_pm25), sorted_year))
+    years = np.unique(sorted_year)
+    year_start = np.searchsorted(sorted_year[by_year], np.append(years, years[-1] + 1 if len(years) else 0))
+
+    arrays = {
+        "geoids": geoids.astype(str),
+        "tract_geoid20": tract_geoid20,
+        "tract_start": tract_start,
+        "geoid20_sorted": tract_geoid20[geoid20_tract],
+        "geoid20_tract": geoid20_tract,
+        "row_tract": row_tract.astype(np.int64),
+        "years": years,
+        "year_start": year_start.astype(np.int64),
+        "by_year": by_year.astype(np.int64),
+    }
+    for col in VALUE_COLUMNS:
+        arrays[col] = df[col].to_numpy()[order]
+
+    version = index_version(data_file)
+    metadata = {
+        "data_file": os.path.basename(data_file),
+        "version": version,
+        "rows": int(len(df)),
+        "tracts": int(len(geoids)),
+        "years": [int(y) for y in years],
+    }
+    model_store.save_artifact(ARTIFACT_NAME, version, {}, metadata, arrays=arrays)
+    return metadata
+
+
+@instrumentation.timed("load_index")
+def load_index(data_file=DATA_FILE):
+    """The mapped index arrays for the current CSV, built first if missing or stale."""
+    global _index, _index_version
+    version = index_version(data_file)
+    with _index_lock:
+        if _index is not None and _index_version == version:
+            return _index
+        if model_store.load_metadata(ARTIFACT_NAME, version) is None:
+            build(data_file)
+        _index = model_store.load_arrays(ARTIFACT_NAME, version, ARRAYS)
+        _index_version = version
+        return _index
+
+
+# -------------- Queries --------------
+def find_tract(index, tract):
+    """Position of a tract (geoid string or geoid20 number) in the index, or None."""
+    text = str(tract).strip()
+    if text.isdigit():
+        keys, tracts, key = index["geoid20_sorted"], index["geoid20_tract"], int(text)
+    else:
+        keys, tracts, key = index["geoids"], None, text
+    i = int(np.searchsorted(keys, key))
+    if i == len(keys) or keys[i] != key:
+        return None
+    return int(tracts[i]) if tracts is not None else i
+
+
+def _whole(value):
+    """A stored count or percentile as an int, None where it is missing (NaN)."""
+    return None if np.isnan(value) else int(value)
+
+
+def _row(index, row, tract=None):
+    tract = int(index["row_tract"][row]) if tract is None else tract
+    return {
+        "geoid": str(index["geoids"][tract]),
+        "geoid20": int(index["tract_geoid20"][tract]),
+        "year": int(index["year"][row]),
+        "denom_total_pop": _whole(index["denom_total_pop"][row]),
+        "pm25_concentration": float(index["pm25_concentration"][row]),
+        "pm25_concentration_pctile": _whole(index["pm25_concentration_pctile"][row]),
+    }
+
+
+def tract_rows(index, tract, start_year=None, end_year=None):
+    """Row numbers of one tract position between two years (inclusive; None = open)."""
+    first, last = int(index["tract_start"][tract]), int(index["tract_start"][tract + 1])
+    years = index["year"][first:last]
+    lo = first + (int(np.searchsorted(years, start_year, side="left")) if start_year is not None else 0)
+    hi = first + (int(np.searchsorted(years, end_year, side="right")) if end_year is not None else last - first)
+    return range(lo, hi)
+
+
+@instrumentation.timed("lookup")
+def lookup(tracts, year=None, start_year=None, end_year=None):
+    """
+    PM2.5 rows for one or more tracts, optionally for one year or a year range.
+    Returns {"results": [row, ...], "missing": [tract, ...]}.
+    """
+    if year is not None:
+        start_year = end_year = int(year)
+    index = load_index()
+    if isinstance(tracts, (str, int)):
+        tracts = [tracts]
+    results, missing = [], []
+    for tract in tracts:
+        position = find_tract(index, tract)
+        if position is None:
+            missing.append(tract)
+            continue
+        results.extend(_row(index, row, position) for row in tract_rows(index, position, start_year, end_year))
+    return {"results": results, "missing": missing}
+
+
+@instrumentation.timed("worst")
+def worst(year, n=10):
+    """The n tracts with the highest PM2.5 in `year`, worst first."""
+    index = load_index()
+    n = max(0, min(int(n), MAX_WORST))
+    i = int(np.searchsorted(index["years"], int(year)))
+    if i == len(index["years"]) or index["years"][i] != int(year):
+        return {"year": int(year), "results": [], "available_years": [int(y) for y in index["years"]]}
+    first, last = int(index["year_start"][i]), int(index["year_start"][i + 1])
+    rows = index["by_year"][first:min(last, first + n)]
+    return {"year": int(year), "results": [_row(index, int(row)) for row in rows]}
+
+
+def _optional_int(value):
+    return int(value) if value not in (None, "") else None
+
+
+def run(tracts=None, year=None, start_year=None, end_year=None, worst_n=None):
+    """
+    Server entry point: lookup(tracts, ...) when tracts are given, otherwise
+    the worst_n (default 10) worst tracts of `year`.
+    """
+    if tracts:
+        if isinstance(tracts, str):
+            tracts = [t for t in tracts.split(",") if t.strip()]
+        return lookup(tracts, _optional_int(year), _optional_int(start_year), _optional_int(end_year))
+    if year in (None, ""):
+        raise ValueError("Either tracts or a year is required")
+    return worst(year, 10 if worst_n in (None, "") else worst_n)
+
+
+# -------------- Main Execution --------------
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Tract/year lookups over AllYearsAirQualityCalculations.csv")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build")
+    find = commands.add_parser("lookup")
+    find.add_argument("tracts", nargs="+")
+    find.add_argument("--year", type=int)
+    find.add_argument("--years", help="FROM-TO, inclusive")
+    top = commands.add_parser("worst")
+    top.add_argument("year", type=int)
+    top.add_argument("n", type=int, nargs="?", default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        return build()
+    if args.command == "worst":
+        return worst(args.year, args.n)
+    start_year = end_year = None
+    if args.years:
+        start, _, end = args.years.partition("-")
+        start_year, end_year = int(start) if start else None, int(end) if end else None
+    return lookup(args.tracts, args.year, start_year, end_year)
+
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile_and_exit(__file__)
+    instrumentation.collect_process(os.path.basename(__file__))
+    try:
+        output = main(sys.argv[1:])
+    except Exception as e:
+        print(json.dumps({"error": "Tract query failed", "details": str(e)}))
+        sys.exit(1)
+    print(json.dumps(output))
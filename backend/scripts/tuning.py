@@ -0,0 +1,272 @@
+# backend/scripts/tuning.py
+"""
+Shared hyperparameter search for the backend models.
+
+tune() replaces an exhaustive GridSearchCV with successive halving (or a plain
+grid / random search) over the same cross-validation splits. Candidates are
+evaluated in parallel with joblib, and every (dataset hash, estimator, params,
+CV, fold, training size) score is kept in a local SQLite cache, so reruns and
+grid extensions only fit the points that were never evaluated before.
+"""
+import os
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import ParameterGrid, ParameterSampler, check_cv
+
+import instrumentation
+import model_store
+
+# Score cache shared by every model; TUNING_CACHE overrides the location
+CACHE_PATH = os.environ.get("TUNING_CACHE") or os.path.join(model_store.ARTIFACTS_DIR, 'tuning_cache.sqlite')
+# "halving" (default), "grid" (every candidate on the full folds) or "random"
+STRATEGY = os.environ.get("TUNING_STRATEGY", "halving")
+N_JOBS = int(os.environ.get("TUNING_JOBS", "-1"))
+STRATEGIES = ("halving", "grid", "random")
+
+
+# -------------- Score Cache --------------
+class ScoreCache:
+    """
+    SQLite table of fold scores. Only the tuning process writes to it; the
+    joblib workers just fit and score.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            dataset TEXT NOT NULL,
+            estimator TEXT NOT NULL,
+            params TEXT NOT NULL,
+            cv TEXT NOT NULL,
+            fold INTEGER NOT NULL,
+            resources INTEGER NOT NULL,
+            score REAL NOT NULL,
+            fit_seconds REAL NOT NULL,
+            cpu_seconds REAL NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (dataset, estimator, params, cv, fold, resources)
+        )
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute(self.SCHEMA)
+
+    def get(self, dataset, estimator, params, cv, fold, resources):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score FROM scores WHERE dataset=? AND estimator=? AND params=? AND cv=? AND fold=? AND resources=?",
+                (dataset, estimator, params, cv, fold, resources)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put_many(self, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row + (time.time(),) for row in rows]
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+# -------------- Keys --------------
+def dataset_hash(X, y):
+    """SHA-256 over the training features (values and column names) and target."""
+    digest = hashlib.sha256()
+    columns = list(getattr(X, "columns", []))
+    digest.update(json.dumps([str(c) for c in columns]).encode())
+    for array in (np.asarray(X), np.asarray(y)):
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype, array.shape)).encode())
+        digest.update(array.tobytes() if array.dtype != object else json.dumps(array.tolist(), default=str).encode())
+    return digest.hexdigest()
+
+
+def _json_key(obj):
+    return json.dumps(obj, sort_keys=True, default=str)
+
+
+def estimator_key(estimator, searched):
+    # class plus every fixed parameter (e.g. random_state), but not the searched ones
+    params = {k: v for k, v in estimator.get_params(deep=False).items() if k not in searched}
+    return f"{type(estimator).__module__}.{type(estimator).__name__}:{_json_key(params)}"
+
+
+def _rows(data, index):
+    return data.iloc[index] if hasattr(data, "iloc") else data[index]
+
+
+# -------------- Evaluation --------------
+def _evaluate(estimator, params, X, y, train, test, scoring):
+    model = clone(estimator).set_params(**params)
+    wall, cpu = time.perf_counter(), time.process_time()
+    model.fit(_rows(X, train), _rows(y, train))
+    score = check_scoring(model, scoring=scoring)(model, _rows(X, test), _rows(y, test))
+    return float(score), time.perf_counter() - wall, time.process_time() - cpu
+
+
+def _subsample(train, resources, seed):
+    """The first `resources` indices of a fixed shuffle of the fold's training rows."""
+    if resources >= train.size:
+        return train
+    rng = np.random.default_rng(seed)
+    return np.sort(train[rng.permutation(train.size)[:resources]])
+
+
+@instrumentation.timed("tune")
+def tune(estimator, param_grid, X, y, cv=3, scoring=None, strategy=None, n_jobs=None,
+         factor=3, min_resources=None, n_candidates=20, random_state=0, cache_path=None, refit=True,
+         max_candidates=None, max_resources=None):
+    """
+    Search param_grid for `estimator` and return (best_estimator, report).
+
+    strategy: "halving" evaluates every candidate on a small share of each
+        fold's training rows, keeps the best 1/factor and multiplies the rows
+        by `factor`, until the last few survivors are scored on the full folds.
+        "grid" scores every candidate on the full folds (what GridSearchCV does).
+        "random" does that for `n_candidates` sampled points.
+    cv/scoring: as for GridSearchCV (stratified folds for classifiers, the
+        estimator's default score when scoring is None).
+    n_jobs: joblib workers for the fold fits (TUNING_JOBS, default all cores).
+    max_candidates: search a fixed sample of at most this many grid points.
+    max_resources: score candidates on at most this many training rows per
+        fold, so the search costs the same however large the data grows (the
+        refit still uses every row).
+    Both bound training time at the risk of missing the best grid point.
+
+    The report holds the chosen params, their mean CV score, per-round counts
+    and the total wall/CPU time (CPU time includes the workers' fits; cached
+    scores cost nothing).
+    """
+    strategy = strategy or STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown tuning strategy: {strategy} (expected one of {', '.join(STRATEGIES)})")
+    n_jobs = N_JOBS if n_jobs is None else n_jobs
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+
+    if strategy == "random":
+        candidates = list(ParameterSampler(param_grid, n_iter=n_candidates, random_state=random_state))
+    else:
+        candidates = list(ParameterGrid(param_grid))
+    if max_candidates is not None and len(candidates) > max_candidates:
+        # grid order is kept so that ties still resolve like GridSearchCV
+        keep = np.random.default_rng(random_state).choice(len(candidates), max_candidates, replace=False)
+        candidates = [candidates[i] for i in np.sort(keep)]
+    searched = set().union(*[c.keys() for c in candidates]) if candidates else set()
+
+    splitter = check_cv(cv, y, classifier=is_classifier(estimator))
+    folds = [(np.asarray(train), np.asarray(test)) for train, test in splitter.split(X, y)]
+    full_resources = min(train.size for train, _ in folds)
+    max_resources = min(full_resources, max_resources or full_resources)
+
+    if strategy == "halving" and len(candidates) > 1:
+        # each round keeps 1/factor of the candidates; the last one still compares 2..factor of them
+        n_rounds = max(1, math.ceil(math.log(len(candidates), factor) - 1e-9))
+        if min_resources is None:
+            # the rows grow by `factor` per round up to the full folds, but every class needs a few rows
+            n_classes = len(np.unique(y)) if is_classifier(estimator) else 1
+            min_resources = max(2 * n_classes * len(folds), max_resources // factor ** (n_rounds - 1))
+        resources = [max(min_resources, max_resources // factor ** (n_rounds - 1 - i)) for i in range(n_rounds)]
+        resources = [min(r, max_resources) for r in resources]
+    else:
+        resources = [max_resources]
+
+    cache = ScoreCache(cache_path or CACHE_PATH)
+    data_key = dataset_hash(X, y)
+    model_key = estimator_key(estimator, searched)
+    cv_key = f"{type(splitter).__name__}:{len(folds)}:{_json_key(getattr(splitter, '__dict__', {}))}"
+    param_keys = [_json_key(c) for c in candidates]
+
+    survivors = list(range(len(candidates)))
+    rounds = []
+    worker_cpu = 0.0
+    evaluated = cached = 0
+    mean_scores = {}
+    try:
+        with Parallel(n_jobs=n_jobs) as parallel:
+            for round_index, budget in enumerate(resources):
+                scores = {}
+                pending = []
+                for c in survivors:
+                    for fold, (train, test) in enumerate(folds):
+                        score = cache.get(data_key, model_key, param_keys[c], cv_key, fold, budget)
+                        if score is None:
+                            pending.append((c, fold, train, test))
+                        else:
+                            scores[(c, fold)] = score
+                round_cached = len(scores)
+
+                results = parallel(
+                    delayed(_evaluate)(estimator, candidates[c], X, y,
+                                       # uncapped, the last round uses each fold's full training rows
+                                       _subsample(train, budget, random_state + fold) if budget < full_resources else train,
+                                       test, scoring)
+                    for c, fold, train, test in pending
+                )
+                cache.put_many([
+                    (data_key, model_key, param_keys[c], cv_key, fold, budget, score, fit_seconds, cpu_seconds)
+                    for (c, fold, _, _), (score, fit_seconds, cpu_seconds) in zip(pending, results)
+                ])
+                for (c, fold, _, _), (score, _, cpu_seconds) in zip(pending, results):
+                    scores[(c, fold)] = score
+                    worker_cpu += cpu_seconds
+
+                mean_scores = {c: float(np.mean([scores[(c, f)] for f in range(len(folds))])) for c in survivors}
+                rounds.append({
+                    "resources": budget,
+                    "candidates": len(survivors),
+                    "evaluated": len(pending),
+                    "cached": round_cached
+                })
+                evaluated += len(pending)
+                cached += round_cached
+                if round_index < len(resources) - 1:
+                    keep = max(1, math.ceil(len(survivors) / factor))
+                    # stable ordering: ties keep the earlier grid point, like GridSearchCV
+                    survivors = sorted(survivors, key=lambda c: (-mean_scores[c], c))[:keep]
+                    if len(survivors) == 1:
+                        # nothing left to compare; a further round would only refit the winner
+                        break
+    finally:
+        cache.close()
+
+    best = max(survivors, key=lambda c: (mean_scores[c], -c))
+    best_estimator = None
+    if refit:
+        best_estimator = clone(estimator).set_params(**candidates[best])
+        with instrumentation.stage("fit"):
+            best_estimator.fit(X, y)
+    instrumentation.count("tuning_fits", evaluated)
+    instrumentation.count("tuning_cached_scores", cached)
+
+    report = {
+        "strategy": strategy,
+        "best_params": candidates[best],
+        "best_score": mean_scores[best],
+        "candidates": len(candidates),
+        "folds": len(folds),
+        "rounds": rounds,
+        "evaluated": evaluated,
+        "cached": cached,
+        "dataset_hash": data_key,
+        "n_jobs": n_jobs,
+        "wall_seconds": round(time.perf_counter() - started_wall, 3),
+        # this process (including the refit) plus the fits done in worker processes;
+        # with one job the fits already run in this process and are not counted twice
+        "cpu_seconds": round(time.process_time() - started_cpu + (worker_cpu if effective_n_jobs(n_jobs) > 1 else 0.0), 3),
+    }
+    return best_estimator, report
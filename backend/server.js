@@ -18,6 +18,7 @@ import activityRoutes from './routes/activityRecommender.js';
 import activityRoutesV2 from './routes/activityRecommendationV2.js';
 import aqiRegressionRoutes from './routes/aqiRegression.js';
 import newsRoutes from './routes/newsfeed.js';
+import inferenceServer from './utils/inferenceServer.js';
 
 // Workaround to obtain __dirname in ES modules:
 const __filename = fileURLToPath(import.meta.url);
@@ -86,6 +87,13 @@ app.get('*', (req, res) => {
   res.sendFile(path.join(__dirname, '..', 'frontend', 'build', 'index.html'));
 });
 
+// SIGHUP reloads the Python models (e.g. after retraining) without restarting the server
+process.on('SIGHUP', () => {
+  inferenceServer.reload()
+    .then((result) => console.log('Inference server reloaded:', result))
+    .catch((error) => console.error('Inference server reload failed:', error));
+});
+
 const port = process.env.PORT || 5000;
 app.listen(port, '0.0.0.0', () => {
   console.log(`Server running on port ${port}`.green.bold);
@@ -0,0 +1,139 @@
+// backend/utils/inferenceServer.js
+import { spawn } from 'child_process';
+import readline from 'readline';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+// Workaround for __dirname in ES modules:
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const scriptPath = path.join(__dirname, '..', 'scripts', 'inference_server.py');
+const pythonBin = process.env.PYTHON_BIN || 'python3';
+// A call with no response after this long is rejected (a cold train or a streamed report can take minutes)
+const callTimeoutMs = Number(process.env.INFERENCE_TIMEOUT_MS) || 300000;
+
+/**
+ * Client for scripts/inference_server.py.
+ *
+ * The Python process is started once (on the first call) and kept alive; each
+ * call writes one JSON line to its stdin and resolves when the response with the
+ * matching id comes back on stdout. If the process dies, pending calls are
+ * rejected and the next call starts a fresh process. A call that gets no
+ * response within its timeout is rejected and forgotten; a late response is
+ * ignored.
+ *
+ * Responses may carry a per-stage timing block (see scripts/instrumentation.py);
+ * callTimed() returns it alongside the result and setServerTiming() forwards it
+ * to the HTTP client as a Server-Timing header.
+ */
+class InferenceServer {
+  constructor() {
+    this.process = null;
+    this.pending = new Map();
+    this.nextId = 1;
+  }
+
+  start() {
+    if (this.process) {
+      return this.process;
+    }
+    const pythonProcess = spawn(pythonBin, [scriptPath], {
+      cwd: path.dirname(scriptPath),
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+
+    const lines = readline.createInterface({ input: pythonProcess.stdout });
+    lines.on('line', (line) => this.onLine(line));
+
+    pythonProcess.stderr.on('data', (data) => {
+      console.error(`Python stderr: ${data.toString()}`);
+    });
+
+    pythonProcess.on('close', (code) => {
+      console.error(`Inference server exited with code ${code}`);
+      this.process = null;
+      for (const { reject, timer } of this.pending.values()) {
+        clearTimeout(timer);
+        reject(new Error(`Inference server exited with code ${code}`));
+      }
+      this.pending.clear();
+    });
+
+    this.process = pythonProcess;
+    return pythonProcess;
+  }
+
+  onLine(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (e) {
+      console.error('Unparseable inference server output:', line);
+      return;
+    }
+    const entry = this.pending.get(message.id);
+    if (!entry) {
+      return;
+    }
+    this.pending.delete(message.id);
+    clearTimeout(entry.timer);
+    if (message.error) {
+      entry.reject(new Error(`${message.error}: ${message.details}`));
+    } else {
+      entry.resolve({ result: message.result, timing: message.timing || null });
+    }
+  }
+
+  /**
+   * Call a method on the Python server and resolve with its JSON result.
+   */
+  async call(method, params = {}, timeoutMs = callTimeoutMs) {
+    const { result } = await this.callTimed(method, params, timeoutMs);
+    return result;
+  }
+
+  /**
+   * Like call(), but resolve with { result, timing } (timing is null when the
+   * server's instrumentation is switched off).
+   */
+  callTimed(method, params = {}, timeoutMs = callTimeoutMs) {
+    const pythonProcess = this.start();
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        if (this.pending.delete(id)) {
+          reject(new Error(`${method} timed out after ${timeoutMs} ms`));
+        }
+      }, timeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      pythonProcess.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+  }
+
+  /**
+   * Drop cached models once in-flight requests have finished.
+   */
+  reload() {
+    return this.call('reload');
+  }
+}
+
+/**
+ * Forward a timing block as a Server-Timing header (one metric per stage, plus
+ * the request total), so browser dev tools and proxies can see where the time went.
+ */
+export function setServerTiming(res, timing) {
+  if (!timing) {
+    return;
+  }
+  const metrics = Object.entries(timing.stages || {}).map(
+    ([name, stage]) => `${name.replace(/[^\w-]/g, '_')};dur=${stage.ms};desc="${stage.calls} call(s)"`
+  );
+  metrics.push(`inference;dur=${timing.total_ms}`);
+  res.set('Server-Timing', metrics.join(', '));
+}
+
+const inferenceServer = new InferenceServer();
+
+export default inferenceServer;
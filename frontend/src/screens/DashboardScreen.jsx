@@ -32,6 +32,21 @@ function getAQIColor(aqi) {
 const isDev = !process.env.NODE_ENV || process.env.NODE_ENV === 'development';
 const baseURL = process.env.REACT_APP_BACKEND_URL || (isDev ? 'http://localhost:5000' : '');
 
+// ===================================================
+// PlotImage Component
+// ===================================================
+// Plots are rendered after the regression report is returned, so a plot URL can
+// 404 for a moment; retry a few times before giving up.
+function PlotImage({ src, alt }) {
+  const [attempt, setAttempt] = useState(0);
+  const handleError = () => {
+    if (attempt < 10) {
+      setTimeout(() => setAttempt((n) => n + 1), 1000);
+    }
+  };
+  return <Image src={attempt ? `${src}?retry=${attempt}` : src} alt={alt} onError={handleError} fluid />;
+}
+
 // ===================================================
 // RegressionSection Component
 // ===================================================
@@ -74,6 +89,18 @@ function RegressionSection() {
                     </li>
                   ))}
                 </ul>
+                {regressionResult.failed_models && Object.keys(regressionResult.failed_models).length > 0 && (
+                  <>
+                    <h6>Failed Models:</h6>
+                    <ul>
+                      {Object.entries(regressionResult.failed_models).map(([modelName, error]) => (
+                        <li key={modelName} className="text-danger">
+                          <strong>{modelName}</strong>: {error}
+                        </li>
+                      ))}
+                    </ul>
+                  </>
+                )}
                 <h6>AQI Category Distribution:</h6>
                 <ul>
                   {Object.entries(regressionResult.aqi_category_distribution).map(([category, count]) => (
@@ -85,16 +112,18 @@ function RegressionSection() {
                 <h6>Plots:</h6>
                 <Row>
                   {regressionResult.plots &&
-                    Object.entries(regressionResult.plots).map(([plotName, plotPath]) => (
-                      <Col key={plotName} md={6} className="mb-3">
-                        <Card>
-                          <Image src={`${baseURL}${plotPath}`} alt={plotName} fluid />
-                          <Card.Body>
-                            <Card.Text>{plotName}</Card.Text>
-                          </Card.Body>
-                        </Card>
-                      </Col>
-                    ))}
+                    Object.entries(regressionResult.plots)
+                      .filter(([, plotPath]) => plotPath)
+                      .map(([plotName, plotPath]) => (
+                        <Col key={plotName} md={6} className="mb-3">
+                          <Card>
+                            <PlotImage src={`${baseURL}${plotPath}`} alt={plotName} />
+                            <Card.Body>
+                              <Card.Text>{plotName}</Card.Text>
+                            </Card.Body>
+                          </Card>
+                        </Col>
+                      ))}
                 </Row>
               </>
             )}